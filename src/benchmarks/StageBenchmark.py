@@ -0,0 +1,75 @@
+import contextlib
+import os
+import time
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class StageResult:
+    stage: str
+    number_of_articles: int
+    wall_time: float
+    cpu_time: float
+    peak_memory: int | None
+    items: int | None = None
+    items_per_second: float | None = None
+
+
+class StageBenchmark:
+
+    def __init__(self, number_of_articles: int, measure_memory: bool = True, verbose: bool = False) -> None:
+        self.number_of_articles = number_of_articles
+        self.measure_memory = measure_memory
+        self.verbose = verbose
+        self.stage_results: list[StageResult] = []
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[StageResult]:
+        # Memory is traced with 'tracemalloc' (numpy arrays included), which also slows down pure Python code
+        stage_result = StageResult(
+            stage=stage,
+            number_of_articles=self.number_of_articles,
+            wall_time=0.0,
+            cpu_time=0.0,
+            peak_memory=None
+        )
+        if self.measure_memory:
+            tracemalloc.start()
+
+        # The output of the stages (prints and progress bars) is discarded unless the benchmark is verbose
+        with contextlib.ExitStack() as output_stack:
+            if not self.verbose:
+                null_output = output_stack.enter_context(open(os.devnull, encoding='utf-8', mode='w'))
+                output_stack.enter_context(contextlib.redirect_stdout(null_output))
+                output_stack.enter_context(contextlib.redirect_stderr(null_output))
+
+            wall_start_time = time.perf_counter()
+            cpu_start_time = time.process_time()
+            try:
+                # The stage may set 'items' on the result, so the throughput can be calculated
+                yield stage_result
+            finally:
+                stage_result.wall_time = time.perf_counter() - wall_start_time
+                stage_result.cpu_time = time.process_time() - cpu_start_time
+                if self.measure_memory:
+                    stage_result.peak_memory = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+        if stage_result.items is not None and stage_result.wall_time > 0:
+            stage_result.items_per_second = stage_result.items / stage_result.wall_time
+
+        self.stage_results.append(stage_result)
+        print(f'{stage:<32} {stage_result.wall_time:10.3f} s (wall) {stage_result.cpu_time:10.3f} s (cpu) '
+              f'{self.__format_memory__(memory=stage_result.peak_memory)}')
+
+    def get_results(self) -> list[dict]:
+        return [asdict(stage_result) for stage_result in self.stage_results]
+
+    @staticmethod
+    def __format_memory__(memory: int | None) -> str:
+        if memory is None:
+            return ''
+
+        return f'{memory / 1024 ** 2:10.1f} MiB (peak)'
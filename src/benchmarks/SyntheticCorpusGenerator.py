@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import numpy as np
+
+from src.constant_values.enums import DataFileTypesNames
+
+
+class SyntheticCorpusGenerator:
+
+    def __init__(
+            self,
+            number_of_articles: int,
+            vocabulary_size: int = 50_000,
+            zipf_exponent: float = 1.1,
+            paragraphs_per_article: int = 6,
+            words_per_paragraph: int = 50,
+            hyperpartisan_proportion: float = 0.5,
+            number_of_stopwords: int = 20,
+            seed: int = 0
+    ) -> None:
+        self.number_of_articles = number_of_articles
+        self.vocabulary_size = vocabulary_size
+        self.paragraphs_per_article = paragraphs_per_article
+        self.words_per_paragraph = words_per_paragraph
+        self.hyperpartisan_proportion = hyperpartisan_proportion
+        self.number_of_stopwords = number_of_stopwords
+        self.random_generator = np.random.default_rng(seed=seed)
+
+        # Word ranks follow a Zipf distribution, so a few words are very frequent and most of them are rare
+        self.words = self.__generate_words__()
+        word_probabilities = 1 / np.arange(1, vocabulary_size + 1, dtype=np.float64) ** zipf_exponent
+        self.cumulative_word_probabilities = np.cumsum(word_probabilities / word_probabilities.sum())
+
+    def __generate_words__(self) -> np.ndarray:
+        letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+        words = set()
+        while len(words) < self.vocabulary_size:
+            word_length = int(self.random_generator.integers(2, 11))
+            words.add(''.join(self.random_generator.choice(letters, size=word_length)))
+
+        # Sets are iterated in hash order, which changes between runs: words of the same length are sorted too
+        return np.array(sorted(words, key=lambda word: (len(word), word)), dtype=object)
+
+    def get_stopwords(self) -> list[str]:
+        # The most frequent words play the role of stopwords
+        return self.words[:self.number_of_stopwords].tolist()
+
+    def generate(self, zip_data_folder_path: str | Path) -> None:
+        if not os.path.exists(zip_data_folder_path):
+            os.makedirs(zip_data_folder_path)
+
+        articles_zip_file_path = os.path.join(zip_data_folder_path, f'{DataFileTypesNames.ARTICLES.value}.zip')
+        ground_truth_zip_file_path = os.path.join(zip_data_folder_path, f'{DataFileTypesNames.GROUND_TRUTH.value}.zip')
+
+        # Both XML files are written article by article, so the corpus is never held in memory
+        with ZipFile(articles_zip_file_path, 'w', compression=ZIP_DEFLATED) as articles_zip_file, \
+                ZipFile(ground_truth_zip_file_path, 'w', compression=ZIP_DEFLATED) as ground_truth_zip_file, \
+                articles_zip_file.open(f'{DataFileTypesNames.ARTICLES.value}.xml', 'w') as articles_file, \
+                ground_truth_zip_file.open(f'{DataFileTypesNames.GROUND_TRUTH.value}.xml', 'w') as ground_truth_file:
+            articles_file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<articles>\n')
+            ground_truth_file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<articles>\n')
+
+            for article_id in range(self.number_of_articles):
+                articles_file.write(self.__generate_article__(article_id=article_id).encode('utf-8'))
+                ground_truth_file.write(self.__generate_ground_truth__(article_id=article_id).encode('utf-8'))
+
+            articles_file.write(b'</articles>\n')
+            ground_truth_file.write(b'</articles>\n')
+
+    def __generate_article__(self, article_id: int) -> str:
+        words = self.__sample_words__(size=self.paragraphs_per_article * self.words_per_paragraph + 5)
+        title = ' '.join(words[:5])
+        paragraphs = ''.join(
+            f'<p>{" ".join(words[start:start + self.words_per_paragraph])}.</p>\n'
+            for start in range(5, len(words), self.words_per_paragraph)
+        )
+
+        return f'<article id="{article_id:07d}" title={quoteattr(title)}>\n{paragraphs}</article>\n'
+
+    def generate_article_text(self) -> str:
+        # Plain text of an article, e.g. to send scoring requests
+        words = self.__sample_words__(size=self.paragraphs_per_article * self.words_per_paragraph)
+        return '\n'.join(
+            f'{" ".join(words[start:start + self.words_per_paragraph])}.'
+            for start in range(0, len(words), self.words_per_paragraph)
+        )
+
+    def __generate_ground_truth__(self, article_id: int) -> str:
+        hyperpartisan = self.random_generator.random() < self.hyperpartisan_proportion
+        return f'<article id="{article_id:07d}" hyperpartisan="{str(hyperpartisan).lower()}"/>\n'
+
+    def __sample_words__(self, size: int) -> list[str]:
+        word_ranks = np.searchsorted(self.cumulative_word_probabilities, self.random_generator.random(size))
+        return self.words[np.minimum(word_ranks, self.vocabulary_size - 1)].tolist()
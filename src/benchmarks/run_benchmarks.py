@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.benchmarks.StageBenchmark import StageBenchmark
+from src.benchmarks.SyntheticCorpusGenerator import SyntheticCorpusGenerator
+from src.constant_values.enums import DocumentType, StopwordsSource, StorageFormat, TokenType
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.get_hyperpartisan_data.HyperpartisanDocumentsFormatter import HyperpartisanDocumentsFormatter
+from src.get_hyperpartisan_data.HyperpartisanDocumentsProcessor import HyperpartisanDocumentsProcessor
+from src.log_odd_ratios.LogOddRatiosAnalyzer import LogOddRatiosAnalyzer
+from src.log_odd_ratios.LogOddRatiosCalculator import LogOddRatiosCalculator
+from src.scoring.HyperpartisanDocumentScorer import HyperpartisanDocumentScorer
+
+
+def run_benchmark(
+        number_of_articles: int,
+        work_folder_path: str | Path,
+        threshold_value: int = 20,
+        number_of_queries: int = 100,
+        measure_memory: bool = True,
+        verbose: bool = False,
+        seed: int = 0
+) -> list[dict]:
+    print(f'Benchmarking {number_of_articles} articles ...')
+    zip_data_folder_path = os.path.join(work_folder_path, 'zip')
+    txt_data_folder_path = os.path.join(work_folder_path, 'txt')
+    pickle_data_folder_path = os.path.join(work_folder_path, 'pickle')
+
+    # The corpus is generated before any stage is measured
+    synthetic_corpus_generator = SyntheticCorpusGenerator(number_of_articles=number_of_articles, seed=seed)
+    synthetic_corpus_generator.generate(zip_data_folder_path=zip_data_folder_path)
+    stopwords_file_path = os.path.join(work_folder_path, 'stopwords.txt')
+    with open(stopwords_file_path, encoding='utf-8', mode='w') as stopwords_file:
+        stopwords_file.write('\n'.join(synthetic_corpus_generator.get_stopwords()))
+
+    stage_benchmark = StageBenchmark(
+        number_of_articles=number_of_articles,
+        measure_memory=measure_memory,
+        verbose=verbose
+    )
+
+    with stage_benchmark.measure(stage='xml_to_txt') as stage_result:
+        HyperpartisanDocumentsFormatter(
+            zip_data_folder_path=zip_data_folder_path,
+            txt_data_folder_path=txt_data_folder_path,
+            streaming=True,
+            read_from_zip=True
+        ).adapt_dataset_format()
+        stage_result.items = number_of_articles
+
+    # Stopwords are read from a file, so no NLTK corpus has to be downloaded (the NLTK tokenizer data is still needed).
+    # Documents are cached encoded, as the columnar cache format of the command line does
+    hyperpartisan_documents_processor = HyperpartisanDocumentsProcessor(
+        txt_data_folder_path=txt_data_folder_path,
+        pickle_data_folder_path=pickle_data_folder_path,
+        stopwords_source=StopwordsSource.FILE,
+        stopwords_file_path=stopwords_file_path,
+        cache_format=StorageFormat.COLUMNAR
+    )
+    with stage_benchmark.measure(stage='cleaning') as stage_result:
+        encoded_document_lists = {
+            document_type: hyperpartisan_documents_processor.get_clean_documents(document_type=document_type)
+            for document_type in DocumentType
+        }
+        stage_result.items = number_of_articles
+
+    with stage_benchmark.measure(stage='filtering') as stage_result:
+        hyperpartisan_documents, non_hyperpartisan_documents = \
+            hyperpartisan_documents_processor.remove_infrequent_words(
+                hyperpartisan_documents=encoded_document_lists[DocumentType.HYPERPARTISAN],
+                non_hyperpartisan_documents=encoded_document_lists[DocumentType.NON_HYPERPARTISAN],
+                threshold_value=threshold_value
+            )
+        stage_result.items = hyperpartisan_documents.word_count + non_hyperpartisan_documents.word_count
+
+    for token_type in [TokenType.UNIGRAM, TokenType.BIGRAM]:
+        # Counting (when the calculator is created), log-odd ratios and persistence are measured separately, for
+        # each storage format as run by the command line
+        for storage_format in StorageFormat:
+            with stage_benchmark.measure(stage=f'{token_type.value}_counting_{storage_format.value}') as stage_result:
+                log_odd_ratios_calculator = LogOddRatiosCalculator(
+                    hyperpartisan_documents=hyperpartisan_documents,
+                    non_hyperpartisan_documents=non_hyperpartisan_documents,
+                    token_type=token_type,
+                    pickle_data_folder_path=pickle_data_folder_path,
+                    vocabulary=hyperpartisan_documents_processor.vocabulary,
+                    storage_format=storage_format
+                )
+                stage_result.items = hyperpartisan_documents.word_count + non_hyperpartisan_documents.word_count
+
+            with stage_benchmark.measure(stage=f'{token_type.value}_ratios_{storage_format.value}') as stage_result:
+                log_odd_ratios_calculator.calculate_log_odd_ratios(save=False)
+                stage_result.items = len(log_odd_ratios_calculator.log_odd_ratios.scores)
+
+            with stage_benchmark.measure(stage=f'{token_type.value}_persistence_{storage_format.value}') \
+                    as stage_result:
+                log_odd_ratios_calculator.save_log_odd_ratios()
+                stage_result.items = len(log_odd_ratios_calculator.log_odd_ratios.scores)
+
+        for storage_format in StorageFormat:
+            with stage_benchmark.measure(stage=f'{token_type.value}_top_k_{storage_format.value}') as stage_result:
+                log_odd_ratios_analyzer = LogOddRatiosAnalyzer(
+                    token_type=token_type,
+                    pickle_data_folder_path=pickle_data_folder_path,
+                    storage_format=storage_format
+                )
+                for query_index in range(number_of_queries):
+                    log_odd_ratios_analyzer.get_most_relevant_words(
+                        document_type=list(DocumentType)[query_index % 2],
+                        infinite_values=query_index % 4 < 2
+                    )
+                stage_result.items = number_of_queries
+
+    # Articles are scored end to end (cleaning included) on a single process, as the scoring service does
+    articles = [synthetic_corpus_generator.generate_article_text() for _ in range(min(number_of_articles, 10_000))]
+    with stage_benchmark.measure(stage='scorer_loading'):
+        hyperpartisan_document_scorer = HyperpartisanDocumentScorer(
+            token_types=[TokenType.UNIGRAM, TokenType.BIGRAM],
+            pickle_data_folder_path=pickle_data_folder_path,
+            document_cleaner=DocumentCleaner(
+                stopwords_source=StopwordsSource.FILE,
+                stopwords_file_path=stopwords_file_path
+            )
+        )
+    with stage_benchmark.measure(stage='scoring') as stage_result:
+        for _ in hyperpartisan_document_scorer.score_documents_in_batches(documents=articles):
+            pass
+        stage_result.items = len(articles)
+
+    print()
+    return stage_benchmark.get_results()
+
+
+def get_environment() -> dict:
+    try:
+        git_commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+
+    return {
+        'git_commit': git_commit,
+        'python_version': platform.python_version(),
+        'numpy_version': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description='Benchmark each stage of the pipeline on synthetic corpora')
+    argument_parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000],
+                                 help='number of articles of each synthetic corpus')
+    argument_parser.add_argument('--threshold-value', type=int, default=20)
+    argument_parser.add_argument('--number-of-queries', type=int, default=100)
+    argument_parser.add_argument('--seed', type=int, default=0)
+    argument_parser.add_argument('--no-memory', action='store_true',
+                                 help='do not trace memory (tracing slows down pure Python stages)')
+    argument_parser.add_argument('--verbose', action='store_true', help='show the output of each stage')
+    argument_parser.add_argument('--work-folder', type=Path, default=None,
+                                 help='folder for the generated corpora (a temporary folder by default)')
+    argument_parser.add_argument('--output-file', type=Path, default=None,
+                                 help='JSON results file (data/benchmarks/benchmark-<timestamp>.json by default)')
+    arguments = argument_parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    results = []
+    for number_of_articles in arguments.sizes:
+        with tempfile.TemporaryDirectory(prefix='benchmark-', dir=arguments.work_folder) as work_folder_path:
+            results.extend(run_benchmark(
+                number_of_articles=number_of_articles,
+                work_folder_path=work_folder_path,
+                threshold_value=arguments.threshold_value,
+                number_of_queries=arguments.number_of_queries,
+                measure_memory=not arguments.no_memory,
+                verbose=arguments.verbose,
+                seed=arguments.seed
+            ))
+
+    output_file_path = arguments.output_file or Path(
+        'data', 'benchmarks', f'benchmark-{started_at.strftime("%Y%m%dT%H%M%SZ")}.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_file_path)), exist_ok=True)
+    with open(output_file_path, encoding='utf-8', mode='w') as output_file:
+        json.dump({
+            'started_at': started_at.isoformat(),
+            'environment': get_environment(),
+            'configuration': {
+                'sizes': arguments.sizes,
+                'threshold_value': arguments.threshold_value,
+                'number_of_queries': arguments.number_of_queries,
+                'seed': arguments.seed,
+                'measure_memory': not arguments.no_memory
+            },
+            'results': results
+        }, output_file, indent=2)
+    print(f'Benchmark results saved into {output_file_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.constant_values.enums import (
+    DocumentType,
+    LogOddRatiosEstimator,
+    ScoreAggregation,
+    StopwordsSource,
+    StorageFormat,
+    TokenType
+)
+from src.utils import instrumentation
+
+if TYPE_CHECKING:
+    from src.get_hyperpartisan_data.HyperpartisanDocumentsProcessor import HyperpartisanDocumentsProcessor
+    from src.utils.CacheManifest import CacheManifest
+
+# Every command imports the modules it needs when it runs, so query commands do not pay for NLTK, lxml or plotting
+
+
+def run_format(arguments: argparse.Namespace) -> None:
+    from src.get_hyperpartisan_data.HyperpartisanDocumentsFormatter import HyperpartisanDocumentsFormatter
+
+    HyperpartisanDocumentsFormatter(
+        zip_data_folder_path=arguments.data_folder / 'zip',
+        xml_data_folder_path=arguments.data_folder / 'xml',
+        txt_data_folder_path=arguments.data_folder / 'txt',
+        streaming=arguments.streaming,
+        read_from_zip=arguments.read_from_zip,
+        manifest=get_manifest(arguments=arguments)
+    ).adapt_dataset_format()
+
+
+def run_clean(arguments: argparse.Namespace) -> None:
+    hyperpartisan_documents_processor = get_hyperpartisan_documents_processor(arguments=arguments)
+    for document_type in DocumentType:
+        hyperpartisan_documents_processor.get_clean_documents(document_type=document_type)
+
+
+def run_compute(arguments: argparse.Namespace) -> None:
+    token_types = [TokenType(token_type) for token_type in arguments.token_types]
+    hyperpartisan_documents_processor = get_hyperpartisan_documents_processor(arguments=arguments)
+
+    if arguments.streaming:
+        from src.log_odd_ratios.StreamingLogOddRatiosPipeline import StreamingLogOddRatiosPipeline
+
+        StreamingLogOddRatiosPipeline(
+            token_types=token_types,
+            hyperpartisan_documents_processor=hyperpartisan_documents_processor,
+            threshold_value=arguments.threshold_value,
+            pickle_data_folder_path=arguments.data_folder / 'pickle',
+            min_count=arguments.min_count,
+            storage_format=StorageFormat(arguments.storage_format),
+            estimator=LogOddRatiosEstimator(arguments.estimator),
+            smoothing_value=arguments.smoothing_value
+        ).run()
+        return
+
+    from src.log_odd_ratios.MultiOrderLogOddRatiosCalculator import MultiOrderLogOddRatiosCalculator
+
+    # Documents cached in the columnar format are encoded, so their vocabulary is needed to count them
+    encoded_documents = StorageFormat(arguments.cache_format) == StorageFormat.COLUMNAR
+    hyperpartisan_documents, non_hyperpartisan_documents = hyperpartisan_documents_processor.remove_infrequent_words(
+        hyperpartisan_documents=hyperpartisan_documents_processor.get_clean_documents(
+            document_type=DocumentType.HYPERPARTISAN
+        ),
+        non_hyperpartisan_documents=hyperpartisan_documents_processor.get_clean_documents(
+            document_type=DocumentType.NON_HYPERPARTISAN
+        ),
+        threshold_value=arguments.threshold_value
+    )
+    MultiOrderLogOddRatiosCalculator(
+        hyperpartisan_documents=hyperpartisan_documents,
+        non_hyperpartisan_documents=non_hyperpartisan_documents,
+        token_types=token_types,
+        pickle_data_folder_path=arguments.data_folder / 'pickle',
+        vocabulary=hyperpartisan_documents_processor.vocabulary if encoded_documents else None,
+        min_count=arguments.min_count,
+        storage_format=StorageFormat(arguments.storage_format),
+        manifest=get_manifest(arguments=arguments),
+        input_hashes=hyperpartisan_documents_processor.get_documents_hashes(threshold_value=arguments.threshold_value),
+        estimator=LogOddRatiosEstimator(arguments.estimator),
+        smoothing_value=arguments.smoothing_value,
+        number_of_workers=arguments.workers
+    ).calculate_log_odd_ratios()
+
+
+def run_top(arguments: argparse.Namespace) -> None:
+    from src.log_odd_ratios.LogOddRatiosAnalyzer import LogOddRatiosAnalyzer
+
+    # A single query is answered with a partial sort, building the sorted index would take longer
+    log_odd_ratios_analyzer = LogOddRatiosAnalyzer(
+        token_type=TokenType(arguments.token_type),
+        pickle_data_folder_path=arguments.data_folder / 'pickle',
+        build_sorted_index=False,
+        storage_format=StorageFormat(arguments.storage_format),
+        estimator=LogOddRatiosEstimator(arguments.estimator)
+    )
+    most_relevant_words = log_odd_ratios_analyzer.get_most_relevant_words(
+        document_type=DocumentType(arguments.document_type),
+        amount=arguments.amount,
+        infinite_values=not arguments.no_infinite_values
+    )
+
+    for token, score in most_relevant_words.items():
+        print(f'{score}\t{token if isinstance(token, str) else " ".join(token)}')
+
+
+def run_score(arguments: argparse.Namespace) -> None:
+    from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+    from src.scoring.HyperpartisanDocumentScorer import HyperpartisanDocumentScorer
+
+    article_names, articles = get_articles(arguments=arguments)
+    hyperpartisan_document_scorer = HyperpartisanDocumentScorer(
+        token_types=[TokenType(token_type) for token_type in arguments.token_types],
+        pickle_data_folder_path=arguments.data_folder / 'pickle',
+        storage_format=StorageFormat(arguments.storage_format),
+        estimator=LogOddRatiosEstimator(arguments.estimator),
+        aggregation=ScoreAggregation(arguments.aggregation),
+        document_cleaner=DocumentCleaner(
+            stopwords_source=StopwordsSource(arguments.stopwords_source),
+            stopwords_file_path=arguments.stopwords_file
+        ),
+        number_of_workers=arguments.workers
+    )
+
+    document_scores = hyperpartisan_document_scorer.score_documents(documents=articles)
+    for article_name, document_score in zip(article_names, document_scores.tolist()):
+        print(f'{document_score}\t{article_name}')
+
+
+def get_articles(arguments: argparse.Namespace) -> tuple[list[str], list[str]]:
+    # Each file (or the standard input) is an article, or holds one article per line
+    texts = {str(file_path): file_path.read_text(encoding='utf-8') for file_path in arguments.files} \
+        if arguments.files else {'<stdin>': sys.stdin.read()}
+    if not arguments.one_per_line:
+        return list(texts.keys()), list(texts.values())
+
+    article_names, articles = [], []
+    for text_name, text in texts.items():
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if line.strip():
+                article_names.append(f'{text_name}:{line_number}')
+                articles.append(line)
+
+    return article_names, articles
+
+
+def get_manifest(arguments: argparse.Namespace) -> 'CacheManifest | None':
+    if arguments.no_manifest:
+        return None
+
+    from src.utils.CacheManifest import CacheManifest
+    return CacheManifest(manifest_file_path=arguments.data_folder / 'manifest.json')
+
+
+def get_hyperpartisan_documents_processor(arguments: argparse.Namespace) -> 'HyperpartisanDocumentsProcessor':
+    from src.get_hyperpartisan_data.HyperpartisanDocumentsProcessor import HyperpartisanDocumentsProcessor
+
+    return HyperpartisanDocumentsProcessor(
+        txt_data_folder_path=arguments.data_folder / 'txt',
+        pickle_data_folder_path=arguments.data_folder / 'pickle',
+        number_of_workers=arguments.workers,
+        stopwords_source=StopwordsSource(arguments.stopwords_source),
+        stopwords_file_path=arguments.stopwords_file,
+        cache_format=StorageFormat(arguments.cache_format),
+        manifest=get_manifest(arguments=arguments)
+    )
+
+
+def add_enum_argument(argument_parser: argparse.ArgumentParser, name: str, enum: type[Enum], default: Enum, **kwargs):
+    argument_parser.add_argument(name, default=default.value, choices=[member.value for member in enum], **kwargs)
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    argument_parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description='Obtain and query the log-odd ratios of the hyperpartisan news dataset'
+    )
+    argument_parser.add_argument('--data-folder', type=Path, default=Path('data'),
+                                 help='folder with the zip, xml, txt and pickle data folders')
+    argument_parser.add_argument('--quiet', action='store_true', help='hide progress messages and bars')
+    argument_parser.add_argument('--events-file', type=Path, default=None, help='JSON lines file for stage events')
+    argument_parser.add_argument('--no-manifest', action='store_true',
+                                 help='do not check cached files against the content hashes of their inputs')
+    subparsers = argument_parser.add_subparsers(dest='command', required=True)
+
+    cleaner_parser = argparse.ArgumentParser(add_help=False)
+    cleaner_parser.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    add_enum_argument(cleaner_parser, '--stopwords-source', StopwordsSource, StopwordsSource.NLTK)
+    cleaner_parser.add_argument('--stopwords-file', type=Path, default=None, help='one stopword per line')
+
+    processor_parser = argparse.ArgumentParser(add_help=False, parents=[cleaner_parser])
+    add_enum_argument(processor_parser, '--cache-format', StorageFormat, StorageFormat.PICKLE,
+                      help='format of the clean documents (columnar stores them encoded)')
+
+    ratios_parser = argparse.ArgumentParser(add_help=False)
+    add_enum_argument(ratios_parser, '--storage-format', StorageFormat, StorageFormat.PICKLE)
+    add_enum_argument(ratios_parser, '--estimator', LogOddRatiosEstimator, LogOddRatiosEstimator.RAW)
+
+    format_parser = subparsers.add_parser('format', help='convert the zipped XML dataset into TXT files')
+    format_parser.add_argument('--streaming', action='store_true', help='parse the XML files incrementally')
+    format_parser.add_argument('--read-from-zip', action='store_true', help='do not extract the XML files')
+    format_parser.set_defaults(function=run_format)
+
+    clean_parser = subparsers.add_parser('clean', parents=[processor_parser], help='clean and cache the documents')
+    clean_parser.set_defaults(function=run_clean)
+
+    compute_parser = subparsers.add_parser('compute', parents=[processor_parser, ratios_parser],
+                                           help='calculate and save the log-odd ratios')
+    compute_parser.add_argument('--token-types', nargs='+', default=[TokenType.UNIGRAM.value, TokenType.BIGRAM.value],
+                                choices=[token_type.value for token_type in TokenType])
+    compute_parser.add_argument('--threshold-value', type=int, default=20,
+                                help='words with fewer occurrences are removed')
+    compute_parser.add_argument('--min-count', type=int, default=1)
+    compute_parser.add_argument('--smoothing-value', type=float, default=1.0)
+    compute_parser.add_argument('--streaming', action='store_true', help='stream the documents from the TXT files')
+    compute_parser.set_defaults(function=run_compute)
+
+    top_parser = subparsers.add_parser('top', parents=[ratios_parser], help='show the most relevant tokens')
+    add_enum_argument(top_parser, '--token-type', TokenType, TokenType.UNIGRAM)
+    add_enum_argument(top_parser, '--document-type', DocumentType, DocumentType.HYPERPARTISAN)
+    top_parser.add_argument('--amount', type=int, default=50)
+    top_parser.add_argument('--no-infinite-values', action='store_true')
+    top_parser.set_defaults(function=run_top)
+
+    score_parser = subparsers.add_parser('score', parents=[cleaner_parser, ratios_parser],
+                                         help='score articles for hyperpartisanship')
+    score_parser.add_argument('files', type=Path, nargs='*', help='articles to score (the standard input by default)')
+    score_parser.add_argument('--one-per-line', action='store_true', help='every line is a different article')
+    score_parser.add_argument('--token-types', nargs='+', default=[TokenType.UNIGRAM.value, TokenType.BIGRAM.value],
+                              choices=[token_type.value for token_type in TokenType])
+    add_enum_argument(score_parser, '--aggregation', ScoreAggregation, ScoreAggregation.MEAN)
+    score_parser.set_defaults(function=run_score)
+
+    return argument_parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    argument_parser = get_argument_parser()
+    arguments = argument_parser.parse_args(argv)
+
+    # Progress messages go to standard error (as the progress bars do), so standard output only holds the results
+    instrumentation.configure(quiet=arguments.quiet, log_stream=sys.stderr, events_file_path=arguments.events_file)
+    arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,4 @@
 ARTICLE_END = '-----END ARTICLE-----'
 INFINITE_VALUES = [float('-inf'), float('inf')]
+UNKNOWN_TOKEN_ID = -1
+NGRAM_TOKENS_SEPARATOR = ' '
@@ -14,3 +14,39 @@ class DataFileTypesNames(Enum):
 class TokenType(Enum):
     UNIGRAM = "unigram"
     BIGRAM = "bigram"
+    TRIGRAM = "trigram"
+    FOURGRAM = "fourgram"
+
+    @property
+    def ngram_size(self) -> int:
+        match self:
+            case TokenType.UNIGRAM:
+                return 1
+            case TokenType.BIGRAM:
+                return 2
+            case TokenType.TRIGRAM:
+                return 3
+            case TokenType.FOURGRAM:
+                return 4
+
+
+class StopwordsSource(Enum):
+    NLTK = "nltk"
+    FILE = "file"
+    NONE = "none"
+
+
+class StorageFormat(Enum):
+    PICKLE = "pickle"
+    COLUMNAR = "columnar"
+
+
+class LogOddRatiosEstimator(Enum):
+    RAW = "raw"
+    ADDITIVE_SMOOTHING = "additive-smoothing"
+    INFORMATIVE_DIRICHLET = "informative-dirichlet"
+
+
+class ScoreAggregation(Enum):
+    SUM = "sum"
+    MEAN = "mean"
@@ -0,0 +1,55 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class EncodedDocumentList:
+    # Token ids of all the documents one after another, and the position where each document starts
+    token_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    document_offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.document_offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.token_ids[self.document_offsets[index]:self.document_offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def get_documents_slice(self, start: int, stop: int) -> 'EncodedDocumentList':
+        document_offsets = self.document_offsets[start:stop + 1]
+        return EncodedDocumentList(
+            token_ids=self.token_ids[document_offsets[0]:document_offsets[-1]],
+            document_offsets=document_offsets - document_offsets[0]
+        )
+
+    def get_chunk_boundaries(self, chunk_size: int) -> list[tuple[int, int]]:
+        # Consecutive documents are grouped into chunks of (roughly) 'chunk_size' tokens
+        chunk_boundaries = []
+        start = 0
+        while start < len(self):
+            chunk_end = self.document_offsets[start] + chunk_size
+            stop = int(np.searchsorted(self.document_offsets, chunk_end, side='right')) - 1
+            stop = min(max(stop, start + 1), len(self))
+            chunk_boundaries.append((start, stop))
+            start = stop
+
+        return chunk_boundaries
+
+    def count_chunks(self, chunk_size: int) -> int:
+        return len(self.get_chunk_boundaries(chunk_size=chunk_size))
+
+    def iterate_chunks(self, chunk_size: int) -> Iterator['EncodedDocumentList']:
+        for start, stop in self.get_chunk_boundaries(chunk_size=chunk_size):
+            yield self.get_documents_slice(start=start, stop=stop)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.token_ids)
+
+    def count_tokens(self, vocabulary_size: int) -> np.ndarray:
+        return np.bincount(self.token_ids, minlength=vocabulary_size)
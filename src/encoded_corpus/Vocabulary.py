@@ -0,0 +1,79 @@
+import json
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values import constants
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+
+
+class Vocabulary:
+
+    def __init__(self, tokens: Iterable[str] = ()) -> None:
+        self.tokens: list[str] = []
+        self.token_ids: dict[str, int] = {}
+
+        for token in tokens:
+            self.add_token(token=token)
+
+    @classmethod
+    def load(cls, file_path: str | Path) -> 'Vocabulary':
+        with open(file_path, encoding='utf-8', mode='r') as vocabulary_file:
+            return cls(tokens=json.load(vocabulary_file))
+
+    def save(self, file_path: str | Path) -> None:
+        # Tokens are stored by id
+        with open(file_path, encoding='utf-8', mode='w') as vocabulary_file:
+            json.dump(self.tokens, vocabulary_file, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.token_ids
+
+    def add_token(self, token: str) -> int:
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.token_ids[token] = token_id
+            self.tokens.append(token)
+
+        return token_id
+
+    def get_token_id(self, token: str) -> int:
+        return self.token_ids.get(token, constants.UNKNOWN_TOKEN_ID)
+
+    def get_token(self, token_id: int) -> str:
+        return self.tokens[token_id]
+
+    def encode_document(self, document: list[str], add_missing_tokens: bool = True) -> np.ndarray:
+        get_token_id = self.add_token if add_missing_tokens else self.get_token_id
+        return np.fromiter(map(get_token_id, document), dtype=np.int32, count=len(document))
+
+    def encode_documents(
+            self,
+            document_list: Iterable[list[str]],
+            add_missing_tokens: bool = True
+    ) -> EncodedDocumentList:
+        get_token_id = self.add_token if add_missing_tokens else self.get_token_id
+
+        # Compact typed buffers avoid keeping a Python object per token while encoding
+        token_ids = array('i')
+        document_offsets = array('q', [0])
+        for document in document_list:
+            token_ids.extend(map(get_token_id, document))
+            document_offsets.append(len(token_ids))
+
+        return EncodedDocumentList(
+            token_ids=np.frombuffer(token_ids, dtype=np.intc).astype(np.int32, copy=False),
+            document_offsets=np.frombuffer(document_offsets, dtype=np.int64)
+        )
+
+    def decode_document(self, token_ids: Iterable[int]) -> list[str]:
+        return [self.tokens[token_id] for token_id in token_ids]
+
+    def decode_documents(self, encoded_document_list: EncodedDocumentList) -> list[list[str]]:
+        return [self.decode_document(token_ids=document.tolist()) for document in encoded_document_list]
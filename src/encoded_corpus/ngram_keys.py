@@ -0,0 +1,138 @@
+import numpy as np
+
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+
+# Keys of n-grams whose token ids do not fit into a single int64: the first half of the tokens is packed into 'high'
+# and the second half into 'low', so every token gets at least 31 bits (any int32 token id)
+WIDE_NGRAM_KEY_DTYPE = np.dtype([('high', np.int64), ('low', np.int64)])
+
+
+def get_bits_per_token(n: int) -> int:
+    # The n token ids of an n-gram are packed into the 63 non-negative bits of an int64 key
+    return 63 // n
+
+
+def needs_wide_ngram_keys(n: int, vocabulary_size: int) -> bool:
+    return vocabulary_size > 1 << get_bits_per_token(n=n)
+
+
+def is_wide(ngram_keys: np.ndarray) -> bool:
+    return ngram_keys.dtype == WIDE_NGRAM_KEY_DTYPE
+
+
+def pack_ngram_keys(token_ids_columns: list[np.ndarray], wide: bool = False) -> np.ndarray:
+    if wide:
+        high_columns_count = (len(token_ids_columns) + 1) // 2
+        ngram_keys = np.empty(len(token_ids_columns[0]), dtype=WIDE_NGRAM_KEY_DTYPE)
+        ngram_keys['high'] = pack_ngram_keys(token_ids_columns=token_ids_columns[:high_columns_count])
+        ngram_keys['low'] = pack_ngram_keys(token_ids_columns=token_ids_columns[high_columns_count:])
+        return ngram_keys
+
+    bits_per_token = get_bits_per_token(n=len(token_ids_columns))
+
+    ngram_keys = np.zeros(len(token_ids_columns[0]), dtype=np.int64)
+    for token_ids in token_ids_columns:
+        if len(token_ids) and token_ids.max() >= 1 << bits_per_token:
+            raise ValueError(f'Token ids do not fit into {bits_per_token} bits, the vocabulary is too large to pack '
+                             f'{len(token_ids_columns)}-grams into int64 keys (wide keys are required)')
+        ngram_keys <<= bits_per_token
+        ngram_keys |= token_ids
+
+    return ngram_keys
+
+
+def unpack_ngram_keys(ngram_keys: np.ndarray, n: int) -> np.ndarray:
+    if is_wide(ngram_keys=ngram_keys):
+        high_columns_count = (n + 1) // 2
+        return np.concatenate([
+            unpack_ngram_keys(ngram_keys=ngram_keys['high'], n=high_columns_count),
+            unpack_ngram_keys(ngram_keys=ngram_keys['low'], n=n - high_columns_count)
+        ], axis=1)
+
+    bits_per_token = get_bits_per_token(n=n)
+    token_id_mask = (1 << bits_per_token) - 1
+
+    token_ids_matrix = np.empty((len(ngram_keys), n), dtype=np.int32)
+    for position in range(n):
+        shift = bits_per_token * (n - 1 - position)
+        token_ids_matrix[:, position] = (ngram_keys >> shift) & token_id_mask
+
+    return token_ids_matrix
+
+
+def widen_ngram_keys(ngram_keys: np.ndarray, n: int) -> np.ndarray:
+    # Both kinds of keys follow the order of their token ids, so sorted keys stay sorted
+    if is_wide(ngram_keys=ngram_keys):
+        return ngram_keys
+
+    token_ids_matrix = unpack_ngram_keys(ngram_keys=ngram_keys, n=n)
+    return pack_ngram_keys(token_ids_columns=list(token_ids_matrix.T.astype(np.int64)), wide=True)
+
+
+def argsort_ngram_keys(ngram_keys: np.ndarray) -> np.ndarray:
+    if not is_wide(ngram_keys=ngram_keys):
+        return np.argsort(ngram_keys, kind='stable')
+
+    # Records are sorted with a generic comparison, two stable int64 sorts (least significant field first) are faster
+    sorting_indexes = np.argsort(ngram_keys['low'], kind='stable')
+    return sorting_indexes[np.argsort(ngram_keys['high'][sorting_indexes], kind='stable')]
+
+
+def searchsorted_ngram_keys(
+        sorted_ngram_keys: np.ndarray,
+        query_ngram_keys: np.ndarray,
+        side: str = 'left'
+) -> np.ndarray:
+    if not is_wide(ngram_keys=sorted_ngram_keys):
+        return np.searchsorted(sorted_ngram_keys, query_ngram_keys, side=side)
+
+    # Queries are first located among the keys with the same 'high' field, then binary searched on their 'low' field
+    sorted_high_keys = sorted_ngram_keys['high']
+    sorted_low_keys = sorted_ngram_keys['low']
+    left_indexes = np.searchsorted(sorted_high_keys, query_ngram_keys['high'], side='left')
+    right_indexes = np.searchsorted(sorted_high_keys, query_ngram_keys['high'], side='right')
+    query_low_keys = query_ngram_keys['low']
+
+    searching = left_indexes < right_indexes
+    while searching.any():
+        middle_indexes = (left_indexes + right_indexes) // 2
+        middle_low_keys = sorted_low_keys[np.minimum(middle_indexes, len(sorted_low_keys) - 1)]
+        lower_keys = searching & (middle_low_keys < query_low_keys if side == 'left'
+                                  else middle_low_keys <= query_low_keys)
+        left_indexes = np.where(lower_keys, middle_indexes + 1, left_indexes)
+        right_indexes = np.where(searching & ~lower_keys, middle_indexes, right_indexes)
+        searching = left_indexes < right_indexes
+
+    return left_indexes
+
+
+def get_ngram_keys(encoded_document_list: EncodedDocumentList, n: int, wide: bool = False) -> np.ndarray:
+    token_ids = encoded_document_list.token_ids.astype(np.int64)
+    if n == 1:
+        return token_ids
+
+    number_of_ngrams = max(len(token_ids) - n + 1, 0)
+    ngram_keys = pack_ngram_keys(
+        token_ids_columns=[token_ids[position:position + number_of_ngrams] for position in range(n)],
+        wide=wide
+    )
+
+    # Discard the n-grams that start less than n tokens before the end of a document
+    valid_ngrams = np.ones(number_of_ngrams, dtype=bool)
+    document_ends = encoded_document_list.document_offsets[1:]
+    for distance_to_document_end in range(1, n):
+        ngram_starts = document_ends - distance_to_document_end
+        valid_ngrams[ngram_starts[(ngram_starts >= 0) & (ngram_starts < number_of_ngrams)]] = False
+
+    return ngram_keys[valid_ngrams]
+
+
+def decode_ngram_keys(ngram_keys: np.ndarray, n: int, vocabulary: Vocabulary) -> list[str | tuple[str, ...]]:
+    # Tokens are looked up a column at a time, without a Python call per token
+    get_token = vocabulary.tokens.__getitem__
+    if n == 1:
+        return list(map(get_token, ngram_keys.tolist()))
+
+    token_ids_matrix = unpack_ngram_keys(ngram_keys=ngram_keys, n=n)
+    return list(zip(*(map(get_token, token_ids_matrix[:, position].tolist()) for position in range(n))))
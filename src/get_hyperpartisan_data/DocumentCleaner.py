@@ -0,0 +1,67 @@
+import hashlib
+from functools import cache, cached_property
+from pathlib import Path
+from types import ModuleType
+
+from src.constant_values.enums import StopwordsSource
+
+
+@cache
+def get_nltk() -> ModuleType:
+    # NLTK takes a while to import, so it is only imported once documents are cleaned (or stopwords loaded)
+    import nltk
+    return nltk
+
+
+class DocumentCleaner:
+
+    def __init__(
+            self,
+            stopwords_source: StopwordsSource = StopwordsSource.NLTK,
+            stopwords_file_path: str | Path | None = None,
+            language: str = 'english'
+    ) -> None:
+        self.stopwords_source = stopwords_source
+        self.stopwords_file_path = stopwords_file_path
+        self.language = language
+
+        if self.stopwords_source == StopwordsSource.FILE and self.stopwords_file_path is None:
+            raise ValueError('A stopwords file path is required when using StopwordsSource.FILE')
+
+    @cached_property
+    def stop_words(self) -> frozenset[str]:
+        # Stopwords are only loaded when documents are cleaned (or hashed)
+        match self.stopwords_source:
+            case StopwordsSource.NLTK:
+                stop_words = get_nltk().corpus.stopwords.words(self.language)
+            case StopwordsSource.FILE:
+                # One stopword per line
+                with open(self.stopwords_file_path, encoding='utf-8', mode='r') as stopwords_file:
+                    stop_words = [line.strip() for line in stopwords_file if line.strip()]
+            case _:
+                stop_words = []
+
+        return frozenset(stop_word.lower() for stop_word in stop_words)
+
+    def get_parameters(self) -> dict[str, str]:
+        # Everything that changes the output of 'clean_document' (the NLTK version is read without importing it)
+        from importlib.metadata import version
+
+        stop_words_hash = hashlib.sha256('\n'.join(sorted(self.stop_words)).encode('utf-8')).hexdigest()
+        return {
+            'tokenizer': f'nltk.word_tokenize ({version("nltk")})',
+            'language': self.language,
+            'stopwords': stop_words_hash
+        }
+
+    def warm_up(self) -> None:
+        # Imports NLTK, loads the stopwords and the tokenizer models, which would otherwise delay the first document
+        self.clean_document(document='Warm up.')
+
+    def clean_document(self, document: str) -> list[str]:
+        # Tokens are lower-cased and filtered in a single pass
+        stop_words = self.stop_words
+        return [
+            token for token in map(str.lower, get_nltk().tokenize.word_tokenize(document, language=self.language))
+            if token not in stop_words
+        ]
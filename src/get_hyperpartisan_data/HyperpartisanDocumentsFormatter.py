@@ -1,12 +1,17 @@
 import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import IO, TextIO
 from zipfile import ZipFile
 
 from lxml import etree
-from tqdm import tqdm
 
 from src.constant_values import constants
-from src.constant_values.enums import DataFileTypesNames
+from src.constant_values.enums import DataFileTypesNames, DocumentType
+from src.get_hyperpartisan_data.TxtOutputSink import TxtOutputSink
+from src.utils import instrumentation
+from src.utils.CacheManifest import CacheManifest
 
 
 class HyperpartisanDocumentsFormatter:
@@ -15,18 +20,27 @@ class HyperpartisanDocumentsFormatter:
             self,
             zip_data_folder_path: str | Path = Path('../data/zip'),
             xml_data_folder_path: str | Path = Path('../data/xml'),
-            txt_data_folder_path: str | Path = Path('../data/txt')
+            txt_data_folder_path: str | Path = Path('../data/txt'),
+            streaming: bool = False,
+            txt_buffer_size: int = 1024 * 1024,
+            read_from_zip: bool = False,
+            manifest: CacheManifest | None = None
     ):
         self.zip_data_folder_path = zip_data_folder_path
         self.xml_data_folder_path = xml_data_folder_path
         self.txt_data_folder_path = txt_data_folder_path
+        self.streaming = streaming
+        self.txt_buffer_size = txt_buffer_size
+        self.read_from_zip = read_from_zip
+        self.manifest = manifest
 
     def adapt_dataset_format(self):
-        self.__extract_xml_files_from_zip_files__()
+        if not self.read_from_zip:
+            self.__extract_xml_files_from_zip_files__()
         self.__extract_data_from_xml_to_txt__()
 
     def __extract_xml_files_from_zip_files__(self) -> None:
-        print("Extracting XML data from zip files ...")
+        instrumentation.log("Extracting XML data from zip files ...")
         data_files_names = [
             DataFileTypesNames.ARTICLES,
             DataFileTypesNames.GROUND_TRUTH
@@ -39,39 +53,95 @@ class HyperpartisanDocumentsFormatter:
 
             # Extract zip file if necessary
             zip_file_name = f"{data_file_name.value}.zip"
-            if os.path.isfile(xml_file_path):
-                print(f'The file {zip_file_name} is already extracted')
+            zip_file_path = os.path.join(self.zip_data_folder_path, zip_file_name)
+            if self.manifest is None:
+                xml_file_up_to_date = os.path.isfile(xml_file_path)
             else:
-                print(f'Extracting file {zip_file_name} ...')
-                zip_file_path = os.path.join(self.zip_data_folder_path, zip_file_name)
-                with ZipFile(zip_file_path, 'r') as zip_file:
-                    zip_file.extractall(path=self.xml_data_folder_path)
-                print(f'File {zip_file_name} extracted')
-
-        print()
+                input_hashes = self.manifest.get_files_hashes(file_paths=[zip_file_path])
+                xml_file_up_to_date = self.manifest.is_up_to_date(
+                    artifact_path=xml_file_path,
+                    input_hashes=input_hashes
+                )
+
+            with instrumentation.stage('extract_zip', component='formatter', file=zip_file_name) as stage_event:
+                if xml_file_up_to_date:
+                    stage_event.cache = 'hit'
+                    instrumentation.log(f'The file {zip_file_name} is already extracted')
+                else:
+                    stage_event.cache = 'miss'
+                    instrumentation.log(f'Extracting file {zip_file_name} ...')
+                    with ZipFile(zip_file_path, 'r') as zip_file:
+                        zip_file.extractall(path=self.xml_data_folder_path)
+                    if self.manifest is not None:
+                        self.manifest.record(artifact_path=xml_file_path, input_hashes=input_hashes)
+                    instrumentation.log(f'File {zip_file_name} extracted')
+
+        instrumentation.log()
 
     def __extract_data_from_xml_to_txt__(self) -> None:
-        articles_file_name = f'{DataFileTypesNames.ARTICLES.value}.xml'
-        articles_file_path = os.path.join(self.xml_data_folder_path, articles_file_name)
-        ground_truth_file_name = f'{DataFileTypesNames.GROUND_TRUTH.value}.xml'
-        ground_truth_file_path = os.path.join(self.xml_data_folder_path, ground_truth_file_name)
+        with instrumentation.stage('xml_to_txt', component='formatter') as stage_event:
+            if self.manifest is not None:
+                input_hashes = self.manifest.get_files_hashes(file_paths=self.__get_input_data_files_paths__())
+                txt_file_paths = [
+                    os.path.join(self.txt_data_folder_path, f'{document_type.value}.txt')
+                    for document_type in DocumentType
+                ]
+                if all(self.manifest.is_up_to_date(artifact_path=txt_file_path, input_hashes=input_hashes)
+                       for txt_file_path in txt_file_paths):
+                    stage_event.cache = 'hit'
+                    instrumentation.log('The TXT files are up to date with the XML data \n')
+                    return
+
+            stage_event.cache = 'miss'
+            with self.__open_xml_data_file__(data_file_name=DataFileTypesNames.GROUND_TRUTH) as ground_truth_file:
+                ground_truths_dict = self.__get_ground_truths_dict_from_xml_data__(xml_file=ground_truth_file)
+
+            with self.__open_xml_data_file__(data_file_name=DataFileTypesNames.ARTICLES) as articles_file:
+                stage_event.items['articles'] = self.__extract_articles_text_from_xml_data__(
+                    ground_truths_dict=ground_truths_dict,
+                    xml_file=articles_file
+                )
+
+            if self.manifest is not None:
+                for txt_file_path in txt_file_paths:
+                    self.manifest.record(artifact_path=txt_file_path, input_hashes=input_hashes)
+
+    def __get_input_data_files_paths__(self) -> list[str]:
+        if self.read_from_zip:
+            return [
+                os.path.join(self.zip_data_folder_path, f'{data_file_name.value}.zip')
+                for data_file_name in DataFileTypesNames
+            ]
+
+        return [
+            os.path.join(self.xml_data_folder_path, f'{data_file_name.value}.xml')
+            for data_file_name in DataFileTypesNames
+        ]
 
-        ground_truths_dict = self.__get_ground_truths_dict_from_xml_data__(xml_file_path=ground_truth_file_path)
-        self.__extract_articles_text_from_xml_data__(
-            ground_truths_dict=ground_truths_dict,
-            xml_file_path=articles_file_path
-        )
+    @contextmanager
+    def __open_xml_data_file__(self, data_file_name: DataFileTypesNames) -> Iterator[IO[bytes]]:
+        xml_file_name = f'{data_file_name.value}.xml'
 
-    @staticmethod
-    def __get_ground_truths_dict_from_xml_data__(xml_file_path: str | Path) -> dict[str, bool]:
-        # Obtain root node
-        xml_parser = etree.XMLParser(remove_blank_text=True)
-        xml_tree = etree.parse(xml_file_path, parser=xml_parser)
-        articles = xml_tree.getroot()
+        if self.read_from_zip:
+            # Decompress the XML data on the fly instead of extracting it to disk
+            zip_file_path = os.path.join(self.zip_data_folder_path, f'{data_file_name.value}.zip')
+            with ZipFile(zip_file_path, 'r') as zip_file, zip_file.open(xml_file_name, 'r') as xml_file:
+                yield xml_file
+        else:
+            xml_file_path = os.path.join(self.xml_data_folder_path, xml_file_name)
+            with open(xml_file_path, 'rb') as xml_file:
+                yield xml_file
+
+    def __get_ground_truths_dict_from_xml_data__(self, xml_file: IO[bytes]) -> dict[str, bool]:
+        articles = self.__get_articles_from_xml_data__(xml_file=xml_file)
 
         # Obtain and store the ground-truth value for each article
         ground_truth_dict = {}
-        for article in tqdm(articles, desc="Getting ground truth values ..."):
+        for article in instrumentation.progress_bar(
+                articles,
+                description="Getting ground truth values ...",
+                total=None if self.streaming else len(articles)
+        ):
             article_id = article.get('id')
             hyperpartisan_str = article.get('hyperpartisan').capitalize()
             hyperpartisan_bool = eval(hyperpartisan_str)
@@ -82,50 +152,67 @@ class HyperpartisanDocumentsFormatter:
     def __extract_articles_text_from_xml_data__(
             self,
             ground_truths_dict: dict[str, bool],
-            xml_file_path: str | Path,
-    ) -> None:
+            xml_file: IO[bytes],
+    ) -> int:
+        articles = self.__get_articles_from_xml_data__(xml_file=xml_file)
+        number_of_articles = 0
+
+        # Add articles into txt files (previous versions are only replaced once all the articles are written)
+        with TxtOutputSink(
+                txt_data_folder_path=self.txt_data_folder_path,
+                buffer_size=self.txt_buffer_size
+        ) as txt_output_sink:
+            # Every article has a ground-truth value, so their number is the total of the progress bar
+            for article in instrumentation.progress_bar(
+                    articles,
+                    description="Extracting text from articles ...",
+                    total=len(ground_truths_dict)
+            ):
+                article_id = article.get('id')
+                hyperpartisan: bool = ground_truths_dict[article_id]
+
+                if hyperpartisan:
+                    txt_file = txt_output_sink.add_article(document_type=DocumentType.HYPERPARTISAN)
+                else:
+                    txt_file = txt_output_sink.add_article(document_type=DocumentType.NON_HYPERPARTISAN)
+                self.__add_article_to_txt_file__(txt_file=txt_file, article=article)
+                number_of_articles += 1
+
+        instrumentation.log()
+        return number_of_articles
+
+    def __get_articles_from_xml_data__(self, xml_file: IO[bytes]) -> Iterable[etree.ElementBase]:
+        if self.streaming:
+            return self.__iterate_articles_from_xml_data__(xml_file=xml_file)
+
         # Obtain root node
         xml_parser = etree.XMLParser(remove_blank_text=True)
-        xml_tree = etree.parse(source=xml_file_path, parser=xml_parser)
-        articles = xml_tree.getroot()
-
-        # Define paths for the output txt files
-        hyperpartisan_txt_file_path = os.path.join(self.txt_data_folder_path, 'hyperpartisan.txt')
-        non_hyperpartisan_txt_file_path = os.path.join(self.txt_data_folder_path, 'non-hyperpartisan.txt')
+        xml_tree = etree.parse(source=xml_file, parser=xml_parser)
+        return xml_tree.getroot()
 
-        # Delete previous version files to avoid stacking content
-        if os.path.exists(self.txt_data_folder_path):
-            self.__delete_previous_txt_files__()
-        else:
-            os.makedirs(self.txt_data_folder_path)
+    @staticmethod
+    def __iterate_articles_from_xml_data__(xml_file: IO[bytes]) -> Iterator[etree.ElementBase]:
+        # Only complete <article> elements are yielded, so the whole tree is never held in memory
+        xml_context = etree.iterparse(source=xml_file, events=('end',), tag='article', remove_blank_text=True)
+        for _, article in xml_context:
+            yield article
 
-        # Add articles into txt files
-        for article in tqdm(articles, desc="Extracting text from articles ..."):
-            article_id = article.get('id')
-            hyperpartisan: bool = ground_truths_dict[article_id]
+            # Free the processed article and the references kept by its already processed siblings
+            article.clear(keep_tail=True)
+            while article.getprevious() is not None:
+                del article.getparent()[0]
 
-            if hyperpartisan:
-                self.__add_article_to_txt_file__(txt_file_path=hyperpartisan_txt_file_path, article=article)
-            else:
-                self.__add_article_to_txt_file__(txt_file_path=non_hyperpartisan_txt_file_path, article=article)
+        del xml_context
 
-        print()
+    @staticmethod
+    def __add_article_to_txt_file__(txt_file: TextIO, article) -> None:
+        # Add article metadata
+        txt_file.write(f"ID: {article.get('id')} ----> Title: {article.get('title')}\n\n")
 
-    def __delete_previous_txt_files__(self) -> None:
-        files_list = os.listdir(self.txt_data_folder_path)
-        for file in files_list:
-            os.remove(os.path.join(self.txt_data_folder_path, file))
+        # Add article text
+        for paragraph in article:
+            text = paragraph.xpath('string()')
+            if text:
+                txt_file.write(f"{text}\n\n")
 
-    @staticmethod
-    def __add_article_to_txt_file__(txt_file_path, article) -> None:
-        with open(txt_file_path, encoding='utf-8', mode='a') as txt_file:
-            # Add article metadata
-            txt_file.write(f"ID: {article.get('id')} ----> Title: {article.get('title')}\n\n")
-
-            # Add article text
-            for paragraph in article:
-                text = paragraph.xpath('string()')
-                if text:
-                    txt_file.write(f"{text}\n\n")
-
-            txt_file.write(f"{constants.ARTICLE_END}\n")
+        txt_file.write(f"{constants.ARTICLE_END}\n")
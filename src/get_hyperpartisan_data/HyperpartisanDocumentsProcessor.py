@@ -1,13 +1,21 @@
 import os.path
 import pickle
-from collections import defaultdict
+from collections.abc import Iterator
+from multiprocessing import Pool
 from pathlib import Path
+from typing import TextIO
 
-import nltk
-from tqdm import tqdm
+import numpy as np
 
 from src.constant_values import constants
-from src.constant_values.enums import DocumentType
+from src.constant_values.enums import DocumentType, StopwordsSource, StorageFormat
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.get_hyperpartisan_data.InfrequentWordsFilter import InfrequentWordsFilter
+from src.get_hyperpartisan_data.TxtOutputSink import TxtOutputSink
+from src.utils import instrumentation
+from src.utils.CacheManifest import CacheManifest
 
 
 class HyperpartisanDocumentsProcessor:
@@ -15,36 +23,178 @@ class HyperpartisanDocumentsProcessor:
     def __init__(
             self,
             txt_data_folder_path=Path('../data/txt'),
-            pickle_data_folder_path=Path('../data/pickle')
+            pickle_data_folder_path=Path('../data/pickle'),
+            number_of_workers: int = 1,
+            chunksize: int = 64,
+            stopwords_source: StopwordsSource = StopwordsSource.NLTK,
+            stopwords_file_path: str | Path | None = None,
+            cache_format: StorageFormat = StorageFormat.PICKLE,
+            manifest: CacheManifest | None = None
     ) -> None:
         self.txt_data_folder_path = txt_data_folder_path
         self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'document_lists')
-        self.unigrams_frequency = defaultdict(int)
+        self.number_of_workers = number_of_workers
+        self.chunksize = chunksize
+        self.document_cleaner = DocumentCleaner(
+            stopwords_source=stopwords_source,
+            stopwords_file_path=stopwords_file_path
+        )
+
+        self.cache_format = cache_format
+        self.manifest = manifest
+        self.vocabulary_file_path = os.path.join(self.pickle_data_folder_path, 'vocabulary.json')
+        self.vocabulary = Vocabulary()
 
         if not os.path.exists(self.pickle_data_folder_path):
             os.makedirs(self.pickle_data_folder_path)
+        if os.path.exists(self.vocabulary_file_path):
+            self.vocabulary = Vocabulary.load(file_path=self.vocabulary_file_path)
+
+    def get_clean_documents(self, document_type: DocumentType) -> list[list[str]] | EncodedDocumentList:
+        if self.cache_format == StorageFormat.COLUMNAR:
+            return self.get_encoded_clean_documents(document_type=document_type)
+
+        pickle_file_path = os.path.join(self.pickle_data_folder_path, f'{document_type.value}.pkl')
+        with instrumentation.stage(
+                'clean_documents',
+                component='processor',
+                document_type=document_type.value,
+                cache_format=self.cache_format.value
+        ) as stage_event:
+            if self.__is_cache_up_to_date__(document_type=document_type, cache_path=pickle_file_path):
+                stage_event.cache = 'hit'
+                instrumentation.log(f'The {document_type.value.upper()} document list already exists. '
+                                    f'Loading it from pickle file ...')
+                clean_document_list = self.__get_clean_documents_from_pickle_file__(
+                    document_type=document_type
+                )
+                instrumentation.log(f"Clean document list ({document_type.value.upper()}) loaded successfully. \n")
+
+            else:
+                stage_event.cache = 'miss'
+                clean_document_list = self.__get_clean_documents_from_txt_file__(
+                    document_type=document_type
+                )
+                instrumentation.log(f"Clean document list ({document_type.value.upper()}) loaded successfully.")
+                instrumentation.log(f"Saving {document_type.value.upper()} document list into pickle file ...")
+                self.__save_document_list_to_pickle_file__(
+                    document_type=document_type,
+                    document_list=clean_document_list
+                )
+                self.__record_cache__(document_type=document_type, cache_path=pickle_file_path)
+                instrumentation.log("Pickle file saved. \n")
+
+            stage_event.items['articles'] = len(clean_document_list)
+            stage_event.items['tokens'] = sum(map(len, clean_document_list))
 
-    def get_clean_documents(self, document_type: DocumentType) -> list[list[str]]:
-        if os.path.exists(f'{self.pickle_data_folder_path}/{document_type.value}.pkl'):
-            print(f'The {document_type.value.upper()} document list already exists. Loading it from pickle file ...')
-            clean_document_list = self.__get_clean_documents_from_pickle_file__(
-                document_type=document_type
-            )
-            print(f"Clean document list ({document_type.value.upper()}) loaded successfully. \n")
+        return clean_document_list
 
-        else:
-            clean_document_list = self.__get_clean_documents_from_txt_file__(
-                document_type=document_type
-            )
-            print(f"Clean document list ({document_type.value.upper()}) loaded successfully.")
-            print(f"Saving {document_type.value.upper()} document list into pickle file ...")
-            self.__save_document_list_to_pickle_file__(
-                document_type=document_type,
-                document_list=clean_document_list
+    def get_encoded_clean_documents(self, document_type: DocumentType) -> EncodedDocumentList:
+        encoded_documents_folder_path = os.path.join(self.pickle_data_folder_path, document_type.value)
+
+        with instrumentation.stage(
+                'clean_documents',
+                component='processor',
+                document_type=document_type.value,
+                cache_format=StorageFormat.COLUMNAR.value
+        ) as stage_event:
+            if self.__is_cache_up_to_date__(document_type=document_type, cache_path=encoded_documents_folder_path):
+                stage_event.cache = 'hit'
+                instrumentation.log(f'The {document_type.value.upper()} document list already exists. '
+                                    f'Opening it from encoded files ...')
+                encoded_document_list = self.__get_encoded_documents_from_files__(
+                    folder_path=encoded_documents_folder_path
+                )
+                instrumentation.log(f"Clean document list ({document_type.value.upper()}) opened successfully. \n")
+
+            else:
+                stage_event.cache = 'miss'
+                # Documents are encoded while they are cleaned, so the list of tokens is never fully materialized
+                encoded_document_list = self.vocabulary.encode_documents(
+                    document_list=self.__iterate_clean_documents_from_txt_file__(document_type=document_type)
+                )
+                instrumentation.log(f"Clean document list ({document_type.value.upper()}) loaded successfully.")
+                instrumentation.log(f"Saving {document_type.value.upper()} document list into encoded files ...")
+                self.__save_encoded_documents_to_files__(
+                    folder_path=encoded_documents_folder_path,
+                    encoded_document_list=encoded_document_list
+                )
+                self.__record_cache__(document_type=document_type, cache_path=encoded_documents_folder_path)
+                instrumentation.log("Encoded files saved. \n")
+
+            stage_event.items['articles'] = len(encoded_document_list)
+            stage_event.items['tokens'] = encoded_document_list.word_count
+
+        return encoded_document_list
+
+    def __is_cache_up_to_date__(self, document_type: DocumentType, cache_path: str | Path) -> bool:
+        if self.manifest is None:
+            if os.path.isdir(cache_path):
+                return os.path.exists(os.path.join(cache_path, 'document_offsets.npy'))
+            return os.path.exists(cache_path)
+
+        return self.manifest.is_up_to_date(
+            artifact_path=cache_path,
+            input_hashes=self.__get_txt_file_hashes__(document_type=document_type),
+            parameters=self.document_cleaner.get_parameters()
+        )
+
+    def __record_cache__(self, document_type: DocumentType, cache_path: str | Path) -> None:
+        if self.manifest is not None:
+            self.manifest.record(
+                artifact_path=cache_path,
+                input_hashes=self.__get_txt_file_hashes__(document_type=document_type),
+                parameters=self.document_cleaner.get_parameters()
             )
-            print("Pickle file saved. \n")
 
-        return clean_document_list
+    def get_documents_hashes(self, threshold_value: int | None = None) -> dict[str, str] | None:
+        # Clean documents (with infrequent words removed, for a threshold value) are identified by the txt files of
+        # the whole corpus and the processing parameters, so calculators do not have to hash the documents themselves
+        if self.manifest is None:
+            return None
+
+        txt_file_hashes = {}
+        for document_type in DocumentType:
+            txt_file_hashes.update(self.__get_txt_file_hashes__(document_type=document_type))
+        return {
+            document_type.value: CacheManifest.get_derived_hash(input_hashes=txt_file_hashes, parameters={
+                'document_type': document_type.value,
+                'cleaner': self.document_cleaner.get_parameters(),
+                'threshold_value': threshold_value
+            }) for document_type in DocumentType
+        }
+
+    def __get_txt_file_hashes__(self, document_type: DocumentType) -> dict[str, str]:
+        txt_file_path = os.path.join(self.txt_data_folder_path, f'{document_type.value}.txt')
+        return self.manifest.get_files_hashes(file_paths=[txt_file_path])
+
+    def iterate_clean_documents(self, document_type: DocumentType) -> Iterator[list[str]]:
+        for document in self.get_encoded_clean_documents(document_type=document_type):
+            yield self.vocabulary.decode_document(token_ids=document.tolist())
+
+    def stream_clean_documents(self, document_type: DocumentType) -> Iterator[list[str]]:
+        # Documents are cleaned straight from the txt file, without reading or writing any cached document list
+        return self.__iterate_clean_documents_from_txt_file__(document_type=document_type)
+
+    @staticmethod
+    def __get_encoded_documents_from_files__(folder_path: str | Path) -> EncodedDocumentList:
+        return EncodedDocumentList(
+            token_ids=np.load(os.path.join(folder_path, 'token_ids.npy'), mmap_mode='r'),
+            document_offsets=np.load(os.path.join(folder_path, 'document_offsets.npy'), mmap_mode='r')
+        )
+
+    def __save_encoded_documents_to_files__(
+            self,
+            folder_path: str | Path,
+            encoded_document_list: EncodedDocumentList
+    ) -> None:
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
+
+        # The vocabulary is shared by both document types, so it is saved every time it may have grown
+        self.vocabulary.save(file_path=self.vocabulary_file_path)
+        np.save(os.path.join(folder_path, 'token_ids.npy'), encoded_document_list.token_ids)
+        np.save(os.path.join(folder_path, 'document_offsets.npy'), encoded_document_list.document_offsets)
 
     def __get_clean_documents_from_pickle_file__(self, document_type: DocumentType) -> list[list[str]]:
         pickle_file_name = f'{document_type.value}.pkl'
@@ -67,107 +217,114 @@ class HyperpartisanDocumentsProcessor:
             pickle.dump(document_list, pickle_file)
 
     def __get_clean_documents_from_txt_file__(self, document_type: DocumentType) -> list[list[str]]:
-        documents = []
-        current_document_line_index = 0
-        current_document_content = []
+        return list(self.__iterate_clean_documents_from_txt_file__(document_type=document_type))
 
+    def __iterate_clean_documents_from_txt_file__(self, document_type: DocumentType) -> Iterator[list[str]]:
         txt_file_name = f'{document_type.value}.txt'
         txt_file_path = os.path.join(self.txt_data_folder_path, txt_file_name)
 
         with open(txt_file_path, encoding='utf-8', mode='r') as txt_file:
             progress_bar_description = f'Getting clean documents from txt files for {document_type.value.upper()} ...'
-            progress_bar = tqdm(desc=progress_bar_description, total=75000)
-            for line in txt_file:
-                # Remove '\n' tokens
-                line = line.strip()
-
-                # First two lines are the title with its id and a '\n' line
-                if current_document_line_index < 2:
-                    current_document_line_index += 1
-                else:
-                    # The article is over
-                    if line == constants.ARTICLE_END:
-                        current_document = " ".join(current_document_content)
-                        current_clean_document = self.__clean_document__(document=current_document)
-                        documents.append(current_clean_document)
+            progress_bar = instrumentation.progress_bar(
+                description=progress_bar_description,
+                total=TxtOutputSink.get_articles_count(
+                    txt_data_folder_path=self.txt_data_folder_path,
+                    document_type=document_type
+                )
+            )
+            raw_documents = self.__get_raw_documents_from_txt_file__(txt_file=txt_file)
+
+            if self.number_of_workers > 1:
+                # Articles are cleaned in parallel, but 'imap' keeps the order of the serial path
+                with Pool(processes=self.number_of_workers) as pool:
+                    clean_documents = pool.imap(
+                        self.document_cleaner.clean_document,
+                        raw_documents,
+                        chunksize=self.chunksize
+                    )
+                    for clean_document in clean_documents:
+                        yield clean_document
                         progress_bar.update(1)
-
-                        # Reset current document values
-                        current_document_line_index = 0
-                        current_document_content = []
-                    else:
-                        # The line is not empty
-                        if line:
-                            current_document_content.append(line)
-
-                        current_document_line_index += 1
-
-        return documents
-
-    def __clean_document__(self, document: str) -> list[str]:
-        clean_document = self.__tokenize_document__(document=document)
-        clean_document = self.__remove_stopwords_from_document__(document=clean_document)
-        clean_document = self.__lower_case_document__(document=clean_document)
-        return clean_document
+            else:
+                for raw_document in raw_documents:
+                    yield self.document_cleaner.clean_document(document=raw_document)
+                    progress_bar.update(1)
 
     @staticmethod
-    def __tokenize_document__(document: str) -> list[str]:
-        return nltk.tokenize.word_tokenize(document)
+    def __get_raw_documents_from_txt_file__(txt_file: TextIO) -> Iterator[str]:
+        current_document_line_index = 0
+        current_document_content = []
 
-    @staticmethod
-    def __remove_stopwords_from_document__(document: list[str]) -> list[str]:
-        stop_words = nltk.corpus.stopwords.words('english')
-        return [word for word in document if not word.lower() in stop_words]
+        for line in txt_file:
+            # Remove '\n' tokens
+            line = line.strip()
+
+            # First two lines are the title with its id and a '\n' line
+            if current_document_line_index < 2:
+                current_document_line_index += 1
+            else:
+                # The article is over
+                if line == constants.ARTICLE_END:
+                    yield " ".join(current_document_content)
+
+                    # Reset current document values
+                    current_document_line_index = 0
+                    current_document_content = []
+                else:
+                    # The line is not empty
+                    if line:
+                        current_document_content.append(line)
 
-    @staticmethod
-    def __lower_case_document__(document: list[str]) -> list[str]:
-        return [word.lower() for word in document]
+                    current_document_line_index += 1
 
     def remove_infrequent_words(
             self,
-            hyperpartisan_documents: list[list[str]],
-            non_hyperpartisan_documents: list[list[str]],
-            threshold_value: int = 20
-    ) -> tuple[list[list[str]], list[list[str]]]:
-        print('Calculating unigrams frequency for the whole corpus ...')
-        self.__set_unigrams_frequency__(
-            hyperpartisan_documents=hyperpartisan_documents,
-            non_hyperpartisan_documents=non_hyperpartisan_documents
-        )
-        print('Unigrams frequency calculated successfully. \n')
-
-        print('Removing infrequent words from the corpus ...')
-        hyperpartisan_processed_sentence_list = self.__remove_infrequent_words_on_document_list__(
-            document_list=hyperpartisan_documents, threshold_value=threshold_value
-        )
-        non_hyperpartisan_processed_sentence_list = self.__remove_infrequent_words_on_document_list__(
-            document_list=non_hyperpartisan_documents, threshold_value=threshold_value
-        )
-        print('Infrequent words removed successfully. \n')
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            threshold_value: int = 20,
+            infrequent_words_filter: InfrequentWordsFilter | None = None
+    ) -> tuple[list[list[str]] | EncodedDocumentList, list[list[str]] | EncodedDocumentList]:
+        with instrumentation.stage('remove_infrequent_words', component='processor', threshold_value=threshold_value) \
+                as stage_event:
+            # A filter passed in is not a cached result, so the cache status is only set when the filter is built
+            if infrequent_words_filter is None:
+                stage_event.cache = 'miss'
+            filtered_document_lists = self.__remove_infrequent_words__(
+                hyperpartisan_documents=hyperpartisan_documents,
+                non_hyperpartisan_documents=non_hyperpartisan_documents,
+                threshold_value=threshold_value,
+                infrequent_words_filter=infrequent_words_filter
+            )
+            stage_event.items['articles'] = len(hyperpartisan_documents) + len(non_hyperpartisan_documents)
 
-        return hyperpartisan_processed_sentence_list, non_hyperpartisan_processed_sentence_list
+        return filtered_document_lists
 
-    def __set_unigrams_frequency__(
+    def __remove_infrequent_words__(
             self,
-            hyperpartisan_documents: list[list[str]],
-            non_hyperpartisan_documents: list[list[str]]
-    ) -> None:
-        self.__get_unigrams_frequency_on_document_list__(document_list=hyperpartisan_documents)
-        self.__get_unigrams_frequency_on_document_list__(document_list=non_hyperpartisan_documents)
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            threshold_value: int,
+            infrequent_words_filter: InfrequentWordsFilter | None
+    ) -> tuple[list[list[str]] | EncodedDocumentList, list[list[str]] | EncodedDocumentList]:
+        # A filter built on the same documents can be passed to reuse its counts with a different threshold
+        if infrequent_words_filter is None:
+            instrumentation.log('Calculating unigrams frequency for the whole corpus ...')
+            infrequent_words_filter = InfrequentWordsFilter(
+                hyperpartisan_documents=hyperpartisan_documents,
+                non_hyperpartisan_documents=non_hyperpartisan_documents,
+                vocabulary=self.vocabulary
+            )
+            instrumentation.log('Unigrams frequency calculated successfully. \n')
 
-    def __get_unigrams_frequency_on_document_list__(self, document_list: list[list[str]]) -> None:
-        for document in document_list:
-            for token in document:
-                self.unigrams_frequency[token] += 1
+        instrumentation.log('Removing infrequent words from the corpus ...')
+        hyperpartisan_processed_sentence_list = infrequent_words_filter.filter_documents(
+            document_list=hyperpartisan_documents,
+            threshold_value=threshold_value
+        )
+        non_hyperpartisan_processed_sentence_list = infrequent_words_filter.filter_documents(
+            document_list=non_hyperpartisan_documents,
+            threshold_value=threshold_value
+        )
+        instrumentation.log('Infrequent words removed successfully. \n')
 
-    def __remove_infrequent_words_on_document_list__(
-            self,
-            document_list: list[list[str]],
-            threshold_value: int
-    ) -> list[list[str]]:
-        processed_sentence_list = []
-        for document in document_list:
-            processed_document = [token for token in document if self.unigrams_frequency[token] >= threshold_value]
-            processed_sentence_list.append(processed_document)
-
-        return processed_sentence_list
+        return hyperpartisan_processed_sentence_list, non_hyperpartisan_processed_sentence_list
@@ -0,0 +1,94 @@
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+
+
+class InfrequentWordsFilter:
+
+    def __init__(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None = None
+    ) -> None:
+        self.encoded_documents = isinstance(hyperpartisan_documents, EncodedDocumentList)
+        if self.encoded_documents != isinstance(non_hyperpartisan_documents, EncodedDocumentList):
+            raise ValueError('Both document lists must be either encoded or lists of tokens')
+
+        # Unigrams are counted once on the whole corpus, every threshold reuses the same counts
+        self.vocabulary = vocabulary
+        self.unigrams_frequency: np.ndarray | Counter
+        if self.encoded_documents:
+            hyperpartisan_unigrams_frequency = hyperpartisan_documents.count_tokens(
+                vocabulary_size=len(vocabulary) if vocabulary is not None else 0
+            )
+            self.unigrams_frequency = non_hyperpartisan_documents.count_tokens(
+                vocabulary_size=len(hyperpartisan_unigrams_frequency)
+            )
+            self.unigrams_frequency[:len(hyperpartisan_unigrams_frequency)] += hyperpartisan_unigrams_frequency
+        else:
+            self.unigrams_frequency = Counter(chain.from_iterable(hyperpartisan_documents))
+            self.unigrams_frequency.update(chain.from_iterable(non_hyperpartisan_documents))
+
+        self.frequent_tokens_masks: dict[int, np.ndarray] = {}
+        self.frequent_tokens: dict[int, frozenset[str]] = {}
+
+    def get_frequent_tokens_mask(self, threshold_value: int) -> np.ndarray:
+        if not self.encoded_documents:
+            raise ValueError('Frequent tokens masks can only be built on encoded documents')
+
+        if threshold_value not in self.frequent_tokens_masks:
+            frequent_tokens_mask = self.unigrams_frequency >= threshold_value
+            frequent_tokens_mask.flags.writeable = False
+            self.frequent_tokens_masks[threshold_value] = frequent_tokens_mask
+
+        return self.frequent_tokens_masks[threshold_value]
+
+    def get_frequent_tokens(self, threshold_value: int) -> frozenset[str]:
+        if threshold_value in self.frequent_tokens:
+            return self.frequent_tokens[threshold_value]
+
+        if self.encoded_documents:
+            frequent_token_ids = np.flatnonzero(self.get_frequent_tokens_mask(threshold_value=threshold_value))
+            frequent_tokens = frozenset(self.vocabulary.get_token(token_id) for token_id in frequent_token_ids.tolist())
+        else:
+            frequent_tokens = frozenset(
+                token for token, frequency in self.unigrams_frequency.items() if frequency >= threshold_value
+            )
+
+        self.frequent_tokens[threshold_value] = frequent_tokens
+        return frequent_tokens
+
+    def filter_documents(
+            self,
+            document_list: list[list[str]] | EncodedDocumentList,
+            threshold_value: int = 20
+    ) -> list[list[str]] | EncodedDocumentList:
+        if isinstance(document_list, EncodedDocumentList):
+            return self.filter_encoded_documents(
+                encoded_document_list=document_list,
+                frequent_tokens_mask=self.get_frequent_tokens_mask(threshold_value=threshold_value)
+            )
+
+        # The input documents are left untouched, filtered copies are returned
+        frequent_tokens = self.get_frequent_tokens(threshold_value=threshold_value)
+        return [[token for token in document if token in frequent_tokens] for document in document_list]
+
+    @staticmethod
+    def filter_encoded_documents(
+            encoded_document_list: EncodedDocumentList,
+            frequent_tokens_mask: np.ndarray
+    ) -> EncodedDocumentList:
+        # Documents keep their boundaries, so n-grams are formed over the remaining words of each document
+        kept_tokens = frequent_tokens_mask[encoded_document_list.token_ids]
+        kept_tokens_offsets = np.zeros(len(kept_tokens) + 1, dtype=np.int64)
+        np.cumsum(kept_tokens, out=kept_tokens_offsets[1:])
+
+        return EncodedDocumentList(
+            token_ids=np.asarray(encoded_document_list.token_ids)[kept_tokens].astype(np.int32),
+            document_offsets=kept_tokens_offsets[encoded_document_list.document_offsets]
+        )
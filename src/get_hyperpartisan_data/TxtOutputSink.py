@@ -0,0 +1,107 @@
+import json
+import os
+from pathlib import Path
+from typing import TextIO
+
+from src.constant_values.enums import DocumentType
+
+
+class TxtOutputSink:
+
+    def __init__(
+            self,
+            txt_data_folder_path: str | Path,
+            buffer_size: int = 1024 * 1024
+    ) -> None:
+        self.txt_data_folder_path = txt_data_folder_path
+        self.buffer_size = buffer_size
+        self.txt_files: dict[DocumentType, TextIO] = {}
+        self.articles_counts: dict[DocumentType, int] = {}
+
+    def __enter__(self) -> 'TxtOutputSink':
+        if not os.path.exists(self.txt_data_folder_path):
+            os.makedirs(self.txt_data_folder_path)
+
+        # Content is written into temporary files, which only replace the final ones once complete
+        for document_type in DocumentType:
+            self.txt_files[document_type] = open(
+                self.__get_temporary_txt_file_path__(document_type=document_type),
+                encoding='utf-8',
+                mode='w',
+                buffering=self.buffer_size
+            )
+            self.articles_counts[document_type] = 0
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.__commit_txt_files__()
+        else:
+            self.__discard_txt_files__()
+
+    def get_txt_file(self, document_type: DocumentType) -> TextIO:
+        return self.txt_files[document_type]
+
+    def add_article(self, document_type: DocumentType) -> TextIO:
+        self.articles_counts[document_type] += 1
+        return self.get_txt_file(document_type=document_type)
+
+    @staticmethod
+    def get_articles_count(txt_data_folder_path: str | Path, document_type: DocumentType) -> int | None:
+        # Counts written with other TXT files (e.g. replaced afterwards) are recognized by their size and ignored
+        articles_counts_file_path = TxtOutputSink.__get_articles_counts_file_path__(
+            txt_data_folder_path=txt_data_folder_path
+        )
+        if not os.path.exists(articles_counts_file_path):
+            return None
+        with open(articles_counts_file_path, encoding='utf-8', mode='r') as articles_counts_file:
+            articles_count = json.load(articles_counts_file).get(document_type.value)
+
+        txt_file_path = os.path.join(txt_data_folder_path, f'{document_type.value}.txt')
+        if articles_count is None or not os.path.exists(txt_file_path) \
+                or os.path.getsize(txt_file_path) != articles_count['size']:
+            return None
+        return articles_count['articles']
+
+    def __commit_txt_files__(self) -> None:
+        # The number of articles of each file is stored next to them, so readers do not have to count them again
+        articles_counts = {}
+        for document_type, txt_file in self.txt_files.items():
+            txt_file.flush()
+            os.fsync(txt_file.fileno())
+            txt_file.close()
+            articles_counts[document_type.value] = {
+                'articles': self.articles_counts[document_type],
+                'size': os.path.getsize(self.__get_temporary_txt_file_path__(document_type=document_type))
+            }
+            os.replace(
+                self.__get_temporary_txt_file_path__(document_type=document_type),
+                self.get_txt_file_path(document_type=document_type)
+            )
+
+        articles_counts_file_path = self.__get_articles_counts_file_path__(
+            txt_data_folder_path=self.txt_data_folder_path
+        )
+        with open(f'{articles_counts_file_path}.tmp', encoding='utf-8', mode='w') as articles_counts_file:
+            json.dump(articles_counts, articles_counts_file)
+        os.replace(f'{articles_counts_file_path}.tmp', articles_counts_file_path)
+
+        self.txt_files = {}
+
+    def __discard_txt_files__(self) -> None:
+        for document_type, txt_file in self.txt_files.items():
+            txt_file.close()
+            os.remove(self.__get_temporary_txt_file_path__(document_type=document_type))
+
+        self.txt_files = {}
+
+    def get_txt_file_path(self, document_type: DocumentType) -> str:
+        return os.path.join(self.txt_data_folder_path, f'{document_type.value}.txt')
+
+    @staticmethod
+    def __get_articles_counts_file_path__(txt_data_folder_path: str | Path) -> str:
+        return os.path.join(txt_data_folder_path, 'articles_counts.json')
+
+    def __get_temporary_txt_file_path__(self, document_type: DocumentType) -> str:
+        return f'{self.get_txt_file_path(document_type=document_type)}.tmp'
@@ -0,0 +1,96 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values import constants
+from src.constant_values.enums import LogOddRatiosEstimator, TokenType
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+
+
+class ColumnarLogOddRatios:
+
+    def __init__(self, folder_path: str | Path) -> None:
+        with open(os.path.join(folder_path, 'metadata.json'), encoding='utf-8', mode='r') as metadata_file:
+            metadata = json.load(metadata_file)
+
+        self.type = TokenType(metadata['type'])
+        self.estimator = LogOddRatiosEstimator(metadata.get('estimator', LogOddRatiosEstimator.RAW.value))
+        self.negative_infinite_values_count: int = metadata['negative_infinite_values_count']
+        self.finite_values_count: int = metadata['finite_values_count']
+        self.positive_infinite_values_count: int = metadata['positive_infinite_values_count']
+
+        # Columns are memory-mapped, so only the pages touched by a query are read from disk
+        self.scores = np.load(os.path.join(folder_path, 'scores.npy'), mmap_mode='r')
+        self.hyperpartisan_counts = np.load(os.path.join(folder_path, 'hyperpartisan_counts.npy'), mmap_mode='r')
+        self.non_hyperpartisan_counts = np.load(
+            os.path.join(folder_path, 'non_hyperpartisan_counts.npy'),
+            mmap_mode='r'
+        )
+        self.token_offsets = np.load(os.path.join(folder_path, 'token_offsets.npy'), mmap_mode='r')
+        self.token_strings = np.load(os.path.join(folder_path, 'token_strings.npy'), mmap_mode='r')
+        self.smoothed_scores = None
+        if self.estimator != LogOddRatiosEstimator.RAW:
+            self.smoothed_scores = np.load(os.path.join(folder_path, 'smoothed_scores.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def get_token(self, index: int) -> str | tuple[str, ...]:
+        token_string = self.token_strings[self.token_offsets[index]:self.token_offsets[index + 1]].tobytes()
+        token = token_string.decode('utf-8')
+        if self.type.ngram_size == 1:
+            return token
+
+        return tuple(token.split(constants.NGRAM_TOKENS_SEPARATOR))
+
+    def get_tokens(self, indexes: np.ndarray) -> list[str | tuple[str, ...]]:
+        return [self.get_token(index=index) for index in indexes.tolist()]
+
+    @staticmethod
+    def save(log_odd_ratios: LogOddRatios, folder_path: str | Path) -> None:
+        if log_odd_ratios.hyperpartisan_counts is None or log_odd_ratios.non_hyperpartisan_counts is None:
+            raise ValueError('The columnar format requires log-odd ratios calculated with the vectorized engine')
+
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
+
+        # Tokens are stored by ascending score, so -inf, finite and +inf values end up in contiguous partitions
+        scores = log_odd_ratios.get_scores()
+        sorting_indexes = np.argsort(scores, kind='stable')
+        scores = scores[sorting_indexes]
+
+        tokens = log_odd_ratios.get_tokens()
+        encoded_tokens = [
+            (token if isinstance(token, str) else constants.NGRAM_TOKENS_SEPARATOR.join(token)).encode('utf-8')
+            for token in (tokens[index] for index in sorting_indexes.tolist())
+        ]
+        del tokens
+        token_offsets = np.zeros(len(encoded_tokens) + 1, dtype=np.int64)
+        np.cumsum([len(encoded_token) for encoded_token in encoded_tokens], out=token_offsets[1:])
+        token_strings = np.frombuffer(b''.join(encoded_tokens), dtype=np.uint8)
+
+        np.save(os.path.join(folder_path, 'scores.npy'), scores)
+        np.save(
+            os.path.join(folder_path, 'hyperpartisan_counts.npy'),
+            log_odd_ratios.hyperpartisan_counts[sorting_indexes]
+        )
+        np.save(
+            os.path.join(folder_path, 'non_hyperpartisan_counts.npy'),
+            log_odd_ratios.non_hyperpartisan_counts[sorting_indexes]
+        )
+        if log_odd_ratios.smoothed_scores is not None:
+            np.save(os.path.join(folder_path, 'smoothed_scores.npy'), log_odd_ratios.smoothed_scores[sorting_indexes])
+        np.save(os.path.join(folder_path, 'token_offsets.npy'), token_offsets)
+        np.save(os.path.join(folder_path, 'token_strings.npy'), token_strings)
+
+        metadata = {
+            'type': log_odd_ratios.type.value,
+            'estimator': log_odd_ratios.estimator.value,
+            'negative_infinite_values_count': int(np.count_nonzero(scores == float('-inf'))),
+            'finite_values_count': int(np.count_nonzero(np.isfinite(scores))),
+            'positive_infinite_values_count': int(np.count_nonzero(scores == float('inf')))
+        }
+        with open(os.path.join(folder_path, 'metadata.json'), encoding='utf-8', mode='w') as metadata_file:
+            json.dump(metadata, metadata_file)
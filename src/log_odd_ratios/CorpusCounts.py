@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values.enums import TokenType
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.log_odd_ratios.NGramCounter import NGramCounter
+from src.log_odd_ratios.TokenCounts import TokenCounts
+
+
+class CorpusCounts:
+
+    def __init__(
+            self,
+            token_type: TokenType,
+            vocabulary: Vocabulary | None = None,
+            hyperpartisan_token_counts: TokenCounts | None = None,
+            non_hyperpartisan_token_counts: TokenCounts | None = None,
+            hyperpartisan_word_count: int = 0,
+            non_hyperpartisan_word_count: int = 0
+    ) -> None:
+        # Token keys (vocabulary ids or packed n-gram keys) are only meaningful together with their vocabulary
+        self.type = token_type
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.hyperpartisan_token_counts = hyperpartisan_token_counts or TokenCounts()
+        self.non_hyperpartisan_token_counts = non_hyperpartisan_token_counts or TokenCounts()
+        self.hyperpartisan_word_count = hyperpartisan_word_count
+        self.non_hyperpartisan_word_count = non_hyperpartisan_word_count
+
+    @staticmethod
+    def get_folder_path(pickle_data_folder_path: str | Path, token_type: TokenType) -> str:
+        return os.path.join(pickle_data_folder_path, 'corpus_counts', f'counts-{token_type.value}')
+
+    @staticmethod
+    def exists(folder_path: str | Path) -> bool:
+        # A save interrupted between moving the previous counts aside and moving the new ones into place is undone
+        previous_folder_path = f'{folder_path}.previous'
+        if not os.path.exists(folder_path) and os.path.exists(previous_folder_path):
+            os.replace(previous_folder_path, folder_path)
+
+        return os.path.exists(os.path.join(folder_path, 'metadata.json'))
+
+    @classmethod
+    def load(cls, folder_path: str | Path) -> 'CorpusCounts':
+        with open(os.path.join(folder_path, 'metadata.json'), encoding='utf-8', mode='r') as metadata_file:
+            metadata = json.load(metadata_file)
+
+        return cls(
+            token_type=TokenType(metadata['type']),
+            vocabulary=Vocabulary.load(file_path=os.path.join(folder_path, 'vocabulary.json')),
+            hyperpartisan_token_counts=cls.__load_token_counts__(
+                file_path=os.path.join(folder_path, 'hyperpartisan_counts.npz')
+            ),
+            non_hyperpartisan_token_counts=cls.__load_token_counts__(
+                file_path=os.path.join(folder_path, 'non_hyperpartisan_counts.npz')
+            ),
+            hyperpartisan_word_count=metadata['hyperpartisan_word_count'],
+            non_hyperpartisan_word_count=metadata['non_hyperpartisan_word_count']
+        )
+
+    def save(self, folder_path: str | Path) -> None:
+        # The counts are written into a sibling folder that then replaces the stored one, so a crash while saving never
+        # leaves new counts next to old metadata
+        temporary_folder_path = f'{folder_path}.tmp'
+        previous_folder_path = f'{folder_path}.previous'
+        if os.path.exists(temporary_folder_path):
+            shutil.rmtree(temporary_folder_path)
+        os.makedirs(temporary_folder_path)
+
+        self.vocabulary.save(file_path=os.path.join(temporary_folder_path, 'vocabulary.json'))
+        self.__save_token_counts__(
+            token_counts=self.hyperpartisan_token_counts,
+            file_path=os.path.join(temporary_folder_path, 'hyperpartisan_counts.npz')
+        )
+        self.__save_token_counts__(
+            token_counts=self.non_hyperpartisan_token_counts,
+            file_path=os.path.join(temporary_folder_path, 'non_hyperpartisan_counts.npz')
+        )
+        metadata = {
+            'type': self.type.value,
+            'hyperpartisan_word_count': self.hyperpartisan_word_count,
+            'non_hyperpartisan_word_count': self.non_hyperpartisan_word_count
+        }
+        with open(os.path.join(temporary_folder_path, 'metadata.json'), encoding='utf-8', mode='w') as metadata_file:
+            json.dump(metadata, metadata_file)
+
+        # Folders cannot replace a non-empty folder, so the stored counts are moved aside first
+        if self.exists(folder_path=folder_path):
+            os.replace(folder_path, previous_folder_path)
+        elif os.path.exists(folder_path):
+            shutil.rmtree(folder_path)
+        os.replace(temporary_folder_path, folder_path)
+        if os.path.exists(previous_folder_path):
+            shutil.rmtree(previous_folder_path)
+
+    def add_documents(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None = None,
+            max_partial_counts: int = 50_000_000
+    ) -> None:
+        # Only the new documents are counted, their counts are then merged into the stored ones
+        hyperpartisan_documents = self.__encode_documents__(
+            document_list=hyperpartisan_documents,
+            vocabulary=vocabulary
+        )
+        non_hyperpartisan_documents = self.__encode_documents__(
+            document_list=non_hyperpartisan_documents,
+            vocabulary=vocabulary
+        )
+
+        self.hyperpartisan_token_counts = TokenCounts.merge(token_counts_list=[
+            self.__get_token_counts_with_current_keys__(token_counts=self.hyperpartisan_token_counts),
+            self.count_tokens(
+                encoded_document_list=hyperpartisan_documents,
+                token_type=self.type,
+                vocabulary_size=len(self.vocabulary),
+                max_partial_counts=max_partial_counts
+            )
+        ])
+        self.non_hyperpartisan_token_counts = TokenCounts.merge(token_counts_list=[
+            self.__get_token_counts_with_current_keys__(token_counts=self.non_hyperpartisan_token_counts),
+            self.count_tokens(
+                encoded_document_list=non_hyperpartisan_documents,
+                token_type=self.type,
+                vocabulary_size=len(self.vocabulary),
+                max_partial_counts=max_partial_counts
+            )
+        ])
+        self.hyperpartisan_word_count += hyperpartisan_documents.word_count
+        self.non_hyperpartisan_word_count += non_hyperpartisan_documents.word_count
+
+    def __get_token_counts_with_current_keys__(self, token_counts: TokenCounts) -> TokenCounts:
+        # Stored n-gram keys are widened once the vocabulary has grown too large to pack them into int64 keys
+        n = self.type.ngram_size
+        if n == 1 or not ngram_keys.needs_wide_ngram_keys(n=n, vocabulary_size=len(self.vocabulary)):
+            return token_counts
+
+        return TokenCounts(
+            keys=ngram_keys.widen_ngram_keys(ngram_keys=token_counts.keys, n=n),
+            counts=token_counts.counts
+        )
+
+    def __encode_documents__(
+            self,
+            document_list: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None
+    ) -> EncodedDocumentList:
+        if not isinstance(document_list, EncodedDocumentList):
+            return self.vocabulary.encode_documents(document_list=document_list)
+        if vocabulary is None:
+            raise ValueError('The vocabulary of the encoded documents is required to update the corpus counts')
+        if vocabulary is self.vocabulary:
+            return document_list
+
+        # Map the ids of the documents' vocabulary onto the ids of the stored vocabulary (new tokens are appended)
+        token_ids_mapping = np.fromiter(
+            (self.vocabulary.add_token(token=token) for token in vocabulary.tokens),
+            dtype=np.int32,
+            count=len(vocabulary)
+        )
+        return EncodedDocumentList(
+            token_ids=token_ids_mapping[document_list.token_ids],
+            document_offsets=document_list.document_offsets
+        )
+
+    @staticmethod
+    def count_tokens(
+            encoded_document_list: EncodedDocumentList,
+            token_type: TokenType,
+            vocabulary_size: int,
+            max_partial_counts: int = 50_000_000
+    ) -> TokenCounts:
+        if token_type == TokenType.UNIGRAM:
+            unigrams_frequency = encoded_document_list.count_tokens(vocabulary_size=vocabulary_size)
+            token_ids = np.flatnonzero(unigrams_frequency)
+            return TokenCounts(keys=token_ids.astype(np.int64), counts=unigrams_frequency[token_ids].astype(np.int64))
+
+        # N-grams are counted as packed int64 keys, they are only decoded back into strings when analyzed
+        ngram_counter = NGramCounter(
+            n=token_type.ngram_size,
+            vocabulary_size=vocabulary_size,
+            max_partial_counts=max_partial_counts
+        )
+        ngram_counter.add_documents(encoded_document_list=encoded_document_list)
+        return ngram_counter.get_token_counts()
+
+    @staticmethod
+    def __save_token_counts__(token_counts: TokenCounts, file_path: str) -> None:
+        np.savez(file_path, keys=token_counts.keys, counts=token_counts.counts)
+
+    @staticmethod
+    def __load_token_counts__(file_path: str) -> TokenCounts:
+        with np.load(file_path) as token_counts_file:
+            return TokenCounts(keys=token_counts_file['keys'], counts=token_counts_file['counts'])
@@ -2,15 +2,19 @@ from dataclasses import dataclass, field
 from functools import cached_property
 
 from src.constant_values.enums import DocumentType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
 
 
 @dataclass
 class DocumentGroup:
-    document_list: list[list[str]] = field(default_factory=list)
+    document_list: list[list[str]] | EncodedDocumentList = field(default_factory=list)
     document_type: DocumentType = field(default=DocumentType)
 
     @cached_property
     def word_count(self) -> int:
+        if isinstance(self.document_list, EncodedDocumentList):
+            return self.document_list.word_count
+
         number_of_words = 0
 
         for document in self.document_list:
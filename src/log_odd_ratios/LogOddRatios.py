@@ -1,9 +1,53 @@
 from dataclasses import dataclass, field
 
-from src.constant_values.enums import TokenType
+import numpy as np
+
+from src.constant_values.enums import LogOddRatiosEstimator, TokenType
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.Vocabulary import Vocabulary
 
 
 @dataclass
 class LogOddRatios:
-    values: dict[str, float] = field(default_factory=dict)
+    values: dict[str | tuple[str, ...], float] = field(default_factory=dict)
     type: TokenType = field(default=TokenType)
+
+    # Array-backed log-odd ratios (calculated on encoded documents), decoded into 'values' only when needed
+    token_keys: np.ndarray | None = None
+    scores: np.ndarray | None = None
+    vocabulary: Vocabulary | None = None
+
+    # Frequency of each token on each document group (aligned with 'values' or 'token_keys', when available)
+    hyperpartisan_counts: np.ndarray | None = None
+    non_hyperpartisan_counts: np.ndarray | None = None
+
+    # Scores of a smoothed estimator (finite for every token), stored next to the raw log-odd ratios
+    estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW
+    smoothed_scores: np.ndarray | None = None
+
+    def get_tokens(self) -> list[str | tuple[str, ...]]:
+        if self.token_keys is None:
+            return list(self.values.keys())
+
+        return ngram_keys.decode_ngram_keys(
+            ngram_keys=self.token_keys,
+            n=self.type.ngram_size,
+            vocabulary=self.vocabulary
+        )
+
+    def get_scores(self, estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW) -> np.ndarray:
+        if estimator != LogOddRatiosEstimator.RAW:
+            if estimator != self.estimator:
+                raise ValueError(f'The log-odd ratios were not calculated with the {estimator.value} estimator')
+            return self.smoothed_scores
+
+        if self.scores is None:
+            return np.fromiter(self.values.values(), dtype=np.float64, count=len(self.values))
+
+        return self.scores
+
+    def decode_values(self) -> None:
+        if self.values or self.token_keys is None:
+            return
+
+        self.values = dict(zip(self.get_tokens(), self.scores.tolist()))
@@ -1,13 +1,16 @@
 import os
-import pickle
 from pathlib import Path
 
-import plotly.express as px
-import pandas as pd
+import numpy as np
 
 from src.constant_values import constants
-from src.constant_values.enums import DocumentType, TokenType
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, StorageFormat, TokenType
+from src.encoded_corpus import ngram_keys
+from src.log_odd_ratios.ColumnarLogOddRatios import ColumnarLogOddRatios
 from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.LogOddRatiosIndex import LogOddRatiosIndex
+from src.log_odd_ratios.LogOddRatiosStorage import LogOddRatiosStorage
+from src.utils import instrumentation
 
 
 class LogOddRatiosAnalyzer:
@@ -15,24 +18,88 @@ class LogOddRatiosAnalyzer:
     def __init__(
             self,
             token_type: TokenType,
-            pickle_data_folder_path=Path('../data/pickle')
+            pickle_data_folder_path=Path('../data/pickle'),
+            build_sorted_index: bool = True,
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW
     ) -> None:
         self.token_type = token_type
+        self.estimator = estimator
         self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'log_odd_ratios')
 
-        self.log_odd_ratios = self.__get_log_odd_ratios_from_pickle_file__()
+        with instrumentation.stage(
+                'load_log_odd_ratios',
+                component='analyzer',
+                token_type=token_type.value,
+                storage_format=storage_format.value,
+                estimator=estimator.value
+        ) as stage_event:
+            self.__load_log_odd_ratios__(storage_format=storage_format, build_sorted_index=build_sorted_index)
+            stage_event.items['tokens'] = len(self.scores)
+
+    def __load_log_odd_ratios__(self, storage_format: StorageFormat, build_sorted_index: bool) -> None:
+        match storage_format:
+            case StorageFormat.PICKLE:
+                self.log_odd_ratios = self.__get_log_odd_ratios_from_pickle_file__()
+                self.tokens, self.scores = self.__get_tokens_and_scores__()
+                self.sorted_index = LogOddRatiosIndex(scores=self.scores) if build_sorted_index else None
+            case StorageFormat.COLUMNAR:
+                self.log_odd_ratios = self.__get_log_odd_ratios_from_columnar_files__()
+                self.tokens, self.scores = None, self.__get_columnar_scores__()
+                if self.estimator == LogOddRatiosEstimator.RAW:
+                    self.sorted_index = LogOddRatiosIndex(scores=self.scores, sorted_scores=True)
+                else:
+                    # Columns are sorted by the raw log-odd ratios, smoothed scores need their own index
+                    self.sorted_index = LogOddRatiosIndex(scores=self.scores) if build_sorted_index else None
 
     def __get_log_odd_ratios_from_pickle_file__(self) -> LogOddRatios:
-        pickle_file_name = f'log-odd-ratios-{self.token_type.value}.pkl'
-        pickle_file_path = os.path.join(self.pickle_data_folder_path, pickle_file_name)
+        instrumentation.log(f'Loading log-odd ratios for {self.token_type.value}s from pickle file ...')
+        log_odd_ratios = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=StorageFormat.PICKLE
+        ).load(token_type=self.token_type)
+        instrumentation.log('Log-odd ratios loaded successfully. \n')
 
-        print(f'Loading log-odd ratios for {self.token_type.value}s from pickle file ...')
-        with open(pickle_file_path, 'rb') as pickle_file:
-            log_odd_ratios = pickle.load(pickle_file)
-        print('Log-odd ratios loaded successfully. \n')
+        return log_odd_ratios
+
+    def __get_log_odd_ratios_from_columnar_files__(self) -> ColumnarLogOddRatios:
+        instrumentation.log(f'Opening columnar log-odd ratios for {self.token_type.value}s ...')
+        log_odd_ratios = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=StorageFormat.COLUMNAR
+        ).load(token_type=self.token_type)
+        instrumentation.log('Log-odd ratios opened successfully. \n')
 
         return log_odd_ratios
 
+    def __get_columnar_scores__(self) -> np.ndarray:
+        if self.estimator == LogOddRatiosEstimator.RAW:
+            return self.log_odd_ratios.scores
+        if self.estimator != self.log_odd_ratios.estimator:
+            raise ValueError(f'The log-odd ratios were not calculated with the {self.estimator.value} estimator')
+
+        return self.log_odd_ratios.smoothed_scores
+
+    def __get_tokens_and_scores__(self) -> tuple[list[str | tuple[str, ...]] | None, np.ndarray]:
+        # Array-backed log-odd ratios are not decoded, tokens are only decoded when they are returned
+        if self.log_odd_ratios.scores is not None:
+            return None, self.log_odd_ratios.get_scores(estimator=self.estimator)
+
+        return list(self.log_odd_ratios.values.keys()), self.log_odd_ratios.get_scores(estimator=self.estimator)
+
+    def __get_tokens_from_indexes__(self, indexes: np.ndarray) -> list[str | tuple[str, ...]]:
+        if isinstance(self.log_odd_ratios, ColumnarLogOddRatios):
+            return self.log_odd_ratios.get_tokens(indexes=indexes)
+
+        if self.tokens is None:
+            return ngram_keys.decode_ngram_keys(
+                ngram_keys=self.log_odd_ratios.token_keys[indexes],
+                n=self.token_type.ngram_size,
+                vocabulary=self.log_odd_ratios.vocabulary
+            )
+
+        return [self.tokens[index] for index in indexes.tolist()]
+
     def get_most_relevant_words(
             self,
             document_type: DocumentType,
@@ -41,41 +108,59 @@ class LogOddRatiosAnalyzer:
     ) -> dict[str | tuple[str, str], float]:
         token_type = self.log_odd_ratios.type
         if infinite_values:
-            print(f'Obtaining top {amount} most relevant {token_type.value}s for {document_type.value.upper()}:')
+            instrumentation.log(f'Obtaining top {amount} most relevant {token_type.value}s for '
+                                f'{document_type.value.upper()}:')
         else:
-            print(f'Obtaining top {amount} most relevant {token_type.value}s for {document_type.value.upper()} '
-                  f'(without infinite values):')
-
-        match document_type:
-            case DocumentType.HYPERPARTISAN:
-                return self.__get_n_highest_values_from_dictionary__(
-                    dictionary=self.log_odd_ratios.values,
-                    n=amount,
-                    infinite_values=infinite_values
-                )
-            case DocumentType.NON_HYPERPARTISAN:
-                return self.__get_n_lowest_values_from_dictionary__(
-                    dictionary=self.log_odd_ratios.values,
-                    n=amount,
-                    infinite_values=infinite_values
-                )
-
-    @staticmethod
-    def __get_n_highest_values_from_dictionary__(dictionary: dict, n: int, infinite_values: bool) -> dict:
-        highest_values = dict(sorted(dictionary.items(), key=lambda item: item[1], reverse=True))
-        if not infinite_values:
-            highest_values = {key: value for key, value in highest_values.items() if value != float('inf')}
-        return dict(list(highest_values.items())[:n])
-
-    @staticmethod
-    def __get_n_lowest_values_from_dictionary__(dictionary: dict, n: int, infinite_values: bool) -> dict:
-        lowest_values = dict(sorted(dictionary.items(), key=lambda item: item[1], reverse=False))
-        if not infinite_values:
-            lowest_values = {key: value for key, value in lowest_values.items() if value != float('-inf')}
-        return dict(list(lowest_values.items())[:n])
+            instrumentation.log(f'Obtaining top {amount} most relevant {token_type.value}s for '
+                                f'{document_type.value.upper()} (without infinite values):')
+
+        with instrumentation.stage(
+                'get_most_relevant_words',
+                component='analyzer',
+                token_type=token_type.value,
+                document_type=document_type.value,
+                amount=amount,
+                infinite_values=infinite_values
+        ) as stage_event:
+            match document_type:
+                case DocumentType.HYPERPARTISAN:
+                    indexes = self.__get_n_highest_indexes__(n=amount, infinite_values=infinite_values)
+                case DocumentType.NON_HYPERPARTISAN:
+                    indexes = self.__get_n_lowest_indexes__(n=amount, infinite_values=infinite_values)
+            most_relevant_words = dict(zip(
+                self.__get_tokens_from_indexes__(indexes=indexes),
+                self.scores[indexes].tolist()
+            ))
+            stage_event.items['tokens'] = len(most_relevant_words)
+
+        return most_relevant_words
+
+    def __get_n_highest_indexes__(self, n: int, infinite_values: bool) -> np.ndarray:
+        if self.sorted_index is None:
+            return LogOddRatiosIndex.get_n_highest_indexes_without_index(
+                scores=self.scores,
+                n=n,
+                infinite_values=infinite_values
+            )
+
+        return self.sorted_index.get_n_highest_indexes(n=n, infinite_values=infinite_values)
+
+    def __get_n_lowest_indexes__(self, n: int, infinite_values: bool) -> np.ndarray:
+        if self.sorted_index is None:
+            return LogOddRatiosIndex.get_n_lowest_indexes_without_index(
+                scores=self.scores,
+                n=n,
+                infinite_values=infinite_values
+            )
+
+        return self.sorted_index.get_n_lowest_indexes(n=n, infinite_values=infinite_values)
 
     def plot_infinite_values_proportion(self) -> None:
-        values = list(self.log_odd_ratios.values.values())
+        # Plotting libraries take seconds to import, so they are only imported when a plot is requested
+        import pandas as pd
+        import plotly.express as px
+
+        values = self.scores.tolist()
 
         log_odd_ratios_distribution_dataframe = pd.DataFrame(
             {
@@ -92,15 +177,10 @@ class LogOddRatiosAnalyzer:
         log_odd_ratios_distribution_pie_chart.show()
 
     def calculate_infinite_values_count(self) -> None:
-        log_odd_ratios_values = self.log_odd_ratios.values.values()
-        infinite_values_count = 0
-
-        for log_odd_ratio in log_odd_ratios_values:
-            if log_odd_ratio in constants.INFINITE_VALUES:
-                infinite_values_count += 1
+        infinite_values_count = np.count_nonzero(np.isinf(self.scores))
 
-        print(f'Proportion of infinite values for {self.token_type.value}s: {infinite_values_count} / '
-              f'{len(log_odd_ratios_values)}')
+        instrumentation.log(f'Proportion of infinite values for {self.token_type.value}s: {infinite_values_count} / '
+                            f'{len(self.scores)}')
 
 
 
@@ -1,26 +1,52 @@
 import math
 import os
-import pickle
 from collections import defaultdict
 from itertools import pairwise
 from pathlib import Path
 
-from tqdm import tqdm
-
 from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
 from src.log_odd_ratios.DocumentGroup import DocumentGroup
-from src.constant_values.enums import DocumentType, TokenType
+from src.log_odd_ratios.LogOddRatiosEngine import LogOddRatiosEngine
+from src.log_odd_ratios.LogOddRatiosStorage import LogOddRatiosStorage
+from src.log_odd_ratios.ShardedTokenCounter import ShardedTokenCounter
+from src.log_odd_ratios.TokenCounts import TokenCounts
+from src.utils import instrumentation
+from src.utils.CacheManifest import CacheManifest
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, StorageFormat, TokenType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
 
 
 class LogOddRatiosCalculator:
 
     def __init__(
             self,
-            hyperpartisan_documents: list[list[str]],
-            non_hyperpartisan_documents: list[list[str]],
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
             token_type: TokenType,
-            pickle_data_folder_path=Path('../data/pickle')
+            pickle_data_folder_path=Path('../data/pickle'),
+            vocabulary: Vocabulary | None = None,
+            vectorized: bool = False,
+            max_partial_counts: int = 50_000_000,
+            min_count: int = 1,
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            manifest: CacheManifest | None = None,
+            input_hashes: dict[str, str] | None = None,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0,
+            number_of_workers: int = 1
     ) -> None:
+        self.encoded_documents = isinstance(hyperpartisan_documents, EncodedDocumentList)
+        if self.encoded_documents != isinstance(non_hyperpartisan_documents, EncodedDocumentList):
+            raise ValueError('Both document lists must be either encoded or lists of tokens')
+        if self.encoded_documents and vocabulary is None:
+            raise ValueError('A vocabulary is required to calculate log-odd ratios on encoded documents')
+        if storage_format == StorageFormat.COLUMNAR and not (self.encoded_documents or vectorized):
+            raise ValueError('The columnar storage format requires the vectorized engine')
+        if estimator != LogOddRatiosEstimator.RAW and not (self.encoded_documents or vectorized):
+            raise ValueError('Smoothed estimators require the vectorized engine')
+
         self.hyperpartisan_document_group = DocumentGroup(
             document_list=hyperpartisan_documents,
             document_type=DocumentType.HYPERPARTISAN
@@ -30,67 +56,260 @@ class LogOddRatiosCalculator:
             document_type=DocumentType.NON_HYPERPARTISAN
         )
         self.token_type = token_type
+        self.vocabulary = vocabulary
+        self.vectorized = vectorized
+        self.max_partial_counts = max_partial_counts
+        self.min_count = min_count
+        self.storage_format = storage_format
+        self.manifest = manifest
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+        self.number_of_workers = number_of_workers
         self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'log_odd_ratios')
+        self.corpus_counts_folder_path = CorpusCounts.get_folder_path(
+            pickle_data_folder_path=pickle_data_folder_path,
+            token_type=token_type
+        )
         if not os.path.exists(self.pickle_data_folder_path):
             os.makedirs(self.pickle_data_folder_path)
+        self.log_odd_ratios_storage = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=storage_format
+        )
 
         self.all_tokens = set()
         self.log_odd_ratios = LogOddRatios(values={}, type=token_type)
 
+        # Counting is skipped when the stored log-odd ratios were calculated from the same documents and parameters.
+        # The documents themselves are only hashed when no hashes derived from their source files are given
+        self.input_hashes = input_hashes
+        self.up_to_date = False
+        if self.manifest is not None:
+            if self.input_hashes is None:
+                self.input_hashes = self.__get_documents_hashes__()
+            self.up_to_date = self.manifest.is_up_to_date(
+                artifact_path=self.log_odd_ratios_storage.get_path(token_type=self.token_type),
+                input_hashes=self.input_hashes,
+                parameters=self.__get_parameters__()
+            )
+
         self.hyperpartisan_tokens_frequency = defaultdict(int)
         self.non_hyperpartisan_tokens_frequency = defaultdict(int)
-        self.__set_tokens_frequency__()
+        if not self.up_to_date:
+            self.__set_tokens_frequency__()
+
+    def __get_parameters__(self) -> dict:
+        return {
+            'token_type': self.token_type.value,
+            'vectorized': self.encoded_documents or self.vectorized,
+            'min_count': self.min_count,
+            'estimator': self.estimator.value,
+            'smoothing_value': self.smoothing_value
+        }
+
+    def __get_documents_hashes__(self) -> dict[str, str]:
+        return {
+            document_group.document_type.value: CacheManifest.get_documents_hash(
+                document_list=document_group.document_list,
+                vocabulary=self.vocabulary
+            ) for document_group in [self.hyperpartisan_document_group, self.non_hyperpartisan_document_group]
+        }
 
     def __set_tokens_frequency__(self) -> None:
-        self.hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency__(
+        self.hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency_with_stage__(
             document_group=self.hyperpartisan_document_group
         )
 
-        self.non_hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency__(
+        self.non_hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency_with_stage__(
             document_group=self.non_hyperpartisan_document_group
         )
 
-        print()
+        instrumentation.log()
+
+    def __calculate_tokens_frequency_with_stage__(
+            self,
+            document_group: DocumentGroup
+    ) -> defaultdict[str | tuple[str, str], int] | TokenCounts:
+        with instrumentation.stage(
+                'count_tokens',
+                component='calculator',
+                token_type=self.token_type.value,
+                document_type=document_group.document_type.value
+        ) as stage_event:
+            tokens_frequency = self.__calculate_tokens_frequency__(document_group=document_group)
+            stage_event.items['articles'] = len(document_group.document_list)
+            stage_event.items['tokens'] = document_group.word_count
+
+        return tokens_frequency
+
+    def __calculate_tokens_frequency__(
+            self,
+            document_group: DocumentGroup
+    ) -> defaultdict[str | tuple[str, str], int] | TokenCounts:
+        if self.number_of_workers > 1:
+            return self.__calculate_tokens_frequency_on_shards__(document_group=document_group)
+        if self.encoded_documents:
+            return self.__calculate_token_counts_on_encoded_documents__(document_group=document_group)
 
-    def __calculate_tokens_frequency__(self, document_group: DocumentGroup) -> defaultdict[str | tuple[str, str], int]:
         tokens_frequency = defaultdict(int)
         progress_bar_description = (f"Calculating {self.token_type.value}s frequency for "
                                     f"{document_group.document_type.value.upper()} ...")
+        documents = instrumentation.progress_bar(document_group.document_list, description=progress_bar_description)
 
         match self.token_type:
             case TokenType.UNIGRAM:
-                for document in tqdm(document_group.document_list, desc=progress_bar_description):
+                for document in documents:
                     for unigram in document:
                         tokens_frequency[unigram] += 1
-                        self.all_tokens.add(unigram)
             case TokenType.BIGRAM:
-                for document in tqdm(document_group.document_list, desc=progress_bar_description):
+                for document in documents:
                     for token_1, token_2 in pairwise(document):
-                        bigram = (token_1, token_2)
-                        tokens_frequency[bigram] += 1
-                        self.all_tokens.add(bigram)
+                        tokens_frequency[(token_1, token_2)] += 1
+            case _:
+                n = self.token_type.ngram_size
+                for document in documents:
+                    for ngram in zip(*(document[position:] for position in range(n))):
+                        tokens_frequency[ngram] += 1
 
+        # The set of all tokens is updated once per document group, not on every token
+        self.all_tokens.update(tokens_frequency.keys())
         return tokens_frequency
 
-    def calculate_log_odd_ratios(self) -> None:
-        hyperpartisan_o_values, non_hyperpartisan_o_values = self.__calculate_o_values__()
-        print("Calculating log-odd ratios ...")
-        self.log_odd_ratios.values = {token: self.__calculate_r_value_on_token__(
-            token=token,
-            hyperpartisan_o_values=hyperpartisan_o_values,
-            non_hyperpartisan_o_values=non_hyperpartisan_o_values
-        ) for token in self.all_tokens}
-        print("Log-odd ratios calculated successfully.")
-        print("Saving log-odd ratios into a pickle file ...")
-        self.__save_log_odd_ratios_to_pickle_file__()
-        print("Pickle file saved. \n\n")
+    def __calculate_tokens_frequency_on_shards__(
+            self,
+            document_group: DocumentGroup
+    ) -> defaultdict[str | tuple[str, str], int] | TokenCounts:
+        instrumentation.log(f"Calculating {self.token_type.value}s frequency for "
+                            f"{document_group.document_type.value.upper()} ...")
+        sharded_token_counter = ShardedTokenCounter(
+            token_types=[self.token_type],
+            number_of_workers=self.number_of_workers,
+            max_partial_counts=self.max_partial_counts
+        )
+
+        if self.encoded_documents:
+            return sharded_token_counter.count_encoded_documents(
+                encoded_document_list=document_group.document_list,
+                vocabulary_size=len(self.vocabulary)
+            )[self.token_type]
+
+        token_counts, vocabulary = sharded_token_counter.count_documents(document_list=document_group.document_list)
+        tokens_frequency = ShardedTokenCounter.get_tokens_frequency(
+            token_counts=token_counts[self.token_type],
+            token_type=self.token_type,
+            vocabulary=vocabulary
+        )
+        self.all_tokens.update(tokens_frequency.keys())
+        return tokens_frequency
+
+    def __calculate_token_counts_on_encoded_documents__(self, document_group: DocumentGroup) -> TokenCounts:
+        document_list: EncodedDocumentList = document_group.document_list
+        instrumentation.log(f"Calculating {self.token_type.value}s frequency for "
+                            f"{document_group.document_type.value.upper()} ...")
+
+        return CorpusCounts.count_tokens(
+            encoded_document_list=document_list,
+            token_type=self.token_type,
+            vocabulary_size=len(self.vocabulary),
+            max_partial_counts=self.max_partial_counts
+        )
+
+    def calculate_log_odd_ratios(self, save: bool = True) -> None:
+        # Without saving, the log-odd ratios are kept in memory until 'save_log_odd_ratios' is called
+        with instrumentation.stage(
+                'calculate_log_odd_ratios',
+                component='calculator',
+                token_type=self.token_type.value,
+                estimator=self.estimator.value
+        ) as stage_event:
+            if self.up_to_date:
+                stage_event.cache = 'hit'
+                instrumentation.log(f"The log-odd ratios for {self.token_type.value}s are up to date. \n\n")
+                self.log_odd_ratios = self.log_odd_ratios_storage.load(token_type=self.token_type)
+                return
 
-    def __save_log_odd_ratios_to_pickle_file__(self) -> None:
-        pickle_file_name = f'log-odd-ratios-{self.token_type.value}.pkl'
-        pickle_file_path = os.path.join(self.pickle_data_folder_path, pickle_file_name)
+            stage_event.cache = 'miss'
+            if self.encoded_documents or self.vectorized:
+                instrumentation.log("Calculating log-odd ratios (vectorized) ...")
+                self.log_odd_ratios = self.__calculate_log_odd_ratios_vectorized__()
+            else:
+                self.__remove_infrequent_tokens__()
+                hyperpartisan_o_values, non_hyperpartisan_o_values = self.__calculate_o_values__()
+                instrumentation.log("Calculating log-odd ratios ...")
+                self.log_odd_ratios.values = {token: self.__calculate_r_value_on_token__(
+                    token=token,
+                    hyperpartisan_o_values=hyperpartisan_o_values,
+                    non_hyperpartisan_o_values=non_hyperpartisan_o_values
+                ) for token in self.all_tokens}
+            instrumentation.log("Log-odd ratios calculated successfully.")
+            stage_event.items['tokens'] = self.__get_tokens_count__()
 
-        with open(pickle_file_path, 'wb') as pickle_file:
-            pickle.dump(self.log_odd_ratios, pickle_file)
+        if save:
+            self.save_log_odd_ratios()
+
+    def save_log_odd_ratios(self) -> None:
+        with instrumentation.stage(
+                'save_log_odd_ratios',
+                component='calculator',
+                token_type=self.token_type.value,
+                storage_format=self.storage_format.value
+        ) as stage_event:
+            self.log_odd_ratios_storage.save(log_odd_ratios=self.log_odd_ratios)
+            stage_event.items['tokens'] = self.__get_tokens_count__()
+
+        if self.manifest is not None:
+            self.manifest.record(
+                artifact_path=self.log_odd_ratios_storage.get_path(token_type=self.token_type),
+                input_hashes=self.input_hashes,
+                parameters=self.__get_parameters__()
+            )
+
+    def __get_tokens_count__(self) -> int:
+        if self.log_odd_ratios.scores is not None:
+            return len(self.log_odd_ratios.scores)
+
+        return len(self.log_odd_ratios.values)
+
+    def __calculate_log_odd_ratios_vectorized__(self) -> LogOddRatios:
+        log_odd_ratios_engine = LogOddRatiosEngine(
+            hyperpartisan_word_count=self.hyperpartisan_document_group.word_count,
+            non_hyperpartisan_word_count=self.non_hyperpartisan_document_group.word_count,
+            estimator=self.estimator,
+            smoothing_value=self.smoothing_value
+        )
+        hyperpartisan_tokens_frequency = self.hyperpartisan_tokens_frequency
+        non_hyperpartisan_tokens_frequency = self.non_hyperpartisan_tokens_frequency
+        del self.hyperpartisan_document_group
+        del self.hyperpartisan_tokens_frequency
+        del self.non_hyperpartisan_document_group
+        del self.non_hyperpartisan_tokens_frequency
+
+        if self.encoded_documents:
+            # The counts are kept, so new documents can later be added without counting the whole corpus again
+            CorpusCounts(
+                token_type=self.token_type,
+                vocabulary=self.vocabulary,
+                hyperpartisan_token_counts=hyperpartisan_tokens_frequency,
+                non_hyperpartisan_token_counts=non_hyperpartisan_tokens_frequency,
+                hyperpartisan_word_count=log_odd_ratios_engine.hyperpartisan_word_count,
+                non_hyperpartisan_word_count=log_odd_ratios_engine.non_hyperpartisan_word_count
+            ).save(folder_path=self.corpus_counts_folder_path)
+
+            return log_odd_ratios_engine.get_log_odd_ratios_from_token_counts(
+                token_type=self.token_type,
+                hyperpartisan_token_counts=hyperpartisan_tokens_frequency,
+                non_hyperpartisan_token_counts=non_hyperpartisan_tokens_frequency,
+                vocabulary=self.vocabulary,
+                min_count=self.min_count
+            )
+
+        return log_odd_ratios_engine.get_log_odd_ratios_from_tokens_frequency(
+            token_type=self.token_type,
+            tokens=self.all_tokens,
+            hyperpartisan_tokens_frequency=hyperpartisan_tokens_frequency,
+            non_hyperpartisan_tokens_frequency=non_hyperpartisan_tokens_frequency,
+            min_count=self.min_count
+        )
 
     def __calculate_r_value_on_token__(
             self,
@@ -107,6 +326,15 @@ class LogOddRatiosCalculator:
         except ValueError:
             return float('-inf')
 
+    def __remove_infrequent_tokens__(self) -> None:
+        # Discard the tokens that are too infrequent in the whole corpus
+        if self.min_count > 1:
+            self.all_tokens = {
+                token for token in self.all_tokens
+                if self.hyperpartisan_tokens_frequency.get(token, 0)
+                + self.non_hyperpartisan_tokens_frequency.get(token, 0) >= self.min_count
+            }
+
     def __calculate_o_values__(self) -> tuple[defaultdict[str, float], defaultdict[str, float]]:
         hyperpartisan_o_values = self.__calculate_o_values_on_document_group__(
             tokens_frequency=self.hyperpartisan_tokens_frequency,
@@ -122,7 +350,7 @@ class LogOddRatiosCalculator:
         del self.non_hyperpartisan_document_group
         del self.non_hyperpartisan_tokens_frequency
 
-        print()
+        instrumentation.log()
         return defaultdict(float, hyperpartisan_o_values), defaultdict(float, non_hyperpartisan_o_values)
 
     def __calculate_o_values_on_document_group__(
@@ -130,11 +358,11 @@ class LogOddRatiosCalculator:
             tokens_frequency: defaultdict[str | tuple[str, str], int],
             document_group: DocumentGroup
     ) -> dict[str, float]:
-        print(f"Calculating o values for {document_group.document_type.value.upper()} ...")
+        instrumentation.log(f"Calculating o values for {document_group.document_type.value.upper()} ...")
         o_values = {token: self.__calculate_o_value_on_token__(
             token=token, tokens_frequency=tokens_frequency, document_group=document_group
         ) for token in tokens_frequency.keys()}
-        print("o values calculated successfully.")
+        instrumentation.log("o values calculated successfully.")
 
         self.__print_tokens_by_descending_order__(dictionary=o_values)
         return o_values
@@ -170,4 +398,4 @@ class LogOddRatiosCalculator:
             key=lambda item: item[1],
             reverse=True)
         )
-        print(f'Highest values: {dict(list(sorted_values.items())[:20])} ... \n')
+        instrumentation.log(f'Highest values: {dict(list(sorted_values.items())[:20])} ... \n')
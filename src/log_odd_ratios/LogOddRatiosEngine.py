@@ -0,0 +1,241 @@
+from collections.abc import Hashable, Iterable, Mapping
+
+import numpy as np
+
+from src.constant_values.enums import LogOddRatiosEstimator, TokenType
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.TokenCounts import TokenCounts
+
+
+class LogOddRatiosEngine:
+
+    def __init__(
+            self,
+            hyperpartisan_word_count: int,
+            non_hyperpartisan_word_count: int,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0
+    ) -> None:
+        self.hyperpartisan_word_count = hyperpartisan_word_count
+        self.non_hyperpartisan_word_count = non_hyperpartisan_word_count
+
+        # 'smoothing_value' is the pseudo-count added to every token (additive smoothing) or the scale of the prior
+        # built from the pooled counts of both document groups (informative Dirichlet prior)
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+
+    def get_log_odd_ratios_from_tokens_frequency(
+            self,
+            token_type: TokenType,
+            tokens: Iterable[Hashable],
+            hyperpartisan_tokens_frequency: Mapping[Hashable, int],
+            non_hyperpartisan_tokens_frequency: Mapping[Hashable, int],
+            min_count: int = 1
+    ) -> LogOddRatios:
+        tokens, hyperpartisan_frequency_vector, non_hyperpartisan_frequency_vector = self.align_tokens_frequency(
+            tokens=tokens,
+            hyperpartisan_tokens_frequency=hyperpartisan_tokens_frequency,
+            non_hyperpartisan_tokens_frequency=non_hyperpartisan_tokens_frequency
+        )
+
+        # Discard the tokens that are too infrequent in the whole corpus
+        if min_count > 1:
+            frequent_tokens = hyperpartisan_frequency_vector + non_hyperpartisan_frequency_vector >= min_count
+            tokens = [token for token, frequent in zip(tokens, frequent_tokens.tolist()) if frequent]
+            hyperpartisan_frequency_vector = hyperpartisan_frequency_vector[frequent_tokens]
+            non_hyperpartisan_frequency_vector = non_hyperpartisan_frequency_vector[frequent_tokens]
+        log_odd_ratios = self.calculate_log_odd_ratios(
+            hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+            non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+        )
+
+        return LogOddRatios(
+            values=dict(zip(tokens, log_odd_ratios.tolist())),
+            type=token_type,
+            hyperpartisan_counts=hyperpartisan_frequency_vector,
+            non_hyperpartisan_counts=non_hyperpartisan_frequency_vector,
+            estimator=self.estimator,
+            smoothed_scores=self.calculate_smoothed_scores(
+                hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+                non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+            )
+        )
+
+    def get_log_odd_ratios_from_token_counts(
+            self,
+            token_type: TokenType,
+            hyperpartisan_token_counts: TokenCounts,
+            non_hyperpartisan_token_counts: TokenCounts,
+            vocabulary: Vocabulary,
+            min_count: int = 1
+    ) -> LogOddRatios:
+        token_keys, hyperpartisan_frequency_vector, non_hyperpartisan_frequency_vector = self.align_token_counts(
+            hyperpartisan_token_counts=hyperpartisan_token_counts,
+            non_hyperpartisan_token_counts=non_hyperpartisan_token_counts,
+            min_count=min_count
+        )
+
+        return LogOddRatios(
+            type=token_type,
+            token_keys=token_keys,
+            scores=self.calculate_log_odd_ratios(
+                hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+                non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+            ),
+            vocabulary=vocabulary,
+            hyperpartisan_counts=hyperpartisan_frequency_vector,
+            non_hyperpartisan_counts=non_hyperpartisan_frequency_vector,
+            estimator=self.estimator,
+            smoothed_scores=self.calculate_smoothed_scores(
+                hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+                non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+            )
+        )
+
+    @staticmethod
+    def align_tokens_frequency(
+            tokens: Iterable[Hashable],
+            hyperpartisan_tokens_frequency: Mapping[Hashable, int],
+            non_hyperpartisan_tokens_frequency: Mapping[Hashable, int]
+    ) -> tuple[list[Hashable], np.ndarray, np.ndarray]:
+        # Both frequency vectors share the same token index (missing tokens have a frequency of 0)
+        tokens = list(tokens)
+        hyperpartisan_frequency_vector = np.fromiter(
+            (hyperpartisan_tokens_frequency.get(token, 0) for token in tokens), dtype=np.int64, count=len(tokens)
+        )
+        non_hyperpartisan_frequency_vector = np.fromiter(
+            (non_hyperpartisan_tokens_frequency.get(token, 0) for token in tokens), dtype=np.int64, count=len(tokens)
+        )
+
+        return tokens, hyperpartisan_frequency_vector, non_hyperpartisan_frequency_vector
+
+    @staticmethod
+    def align_token_counts(
+            hyperpartisan_token_counts: TokenCounts,
+            non_hyperpartisan_token_counts: TokenCounts,
+            min_count: int = 1
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # The tokens that are too infrequent in the whole corpus are discarded while both counts are merged
+        token_keys = TokenCounts.merge_sorted(
+            token_counts_list=[hyperpartisan_token_counts, non_hyperpartisan_token_counts],
+            min_count=min_count
+        ).keys
+
+        return (
+            token_keys,
+            LogOddRatiosEngine.__get_frequency_vector__(
+                token_keys=token_keys,
+                token_counts=hyperpartisan_token_counts
+            ),
+            LogOddRatiosEngine.__get_frequency_vector__(
+                token_keys=token_keys,
+                token_counts=non_hyperpartisan_token_counts
+            )
+        )
+
+    @staticmethod
+    def __get_frequency_vector__(token_keys: np.ndarray, token_counts: TokenCounts) -> np.ndarray:
+        # Both frequency vectors share the same token index (missing tokens have a frequency of 0)
+        frequency_vector = np.zeros(len(token_keys), dtype=np.int64)
+        if not len(token_keys) or not len(token_counts):
+            return frequency_vector
+
+        token_indexes = np.minimum(
+            ngram_keys.searchsorted_ngram_keys(sorted_ngram_keys=token_keys, query_ngram_keys=token_counts.keys),
+            len(token_keys) - 1
+        )
+        kept_tokens = token_keys[token_indexes] == token_counts.keys
+        frequency_vector[token_indexes[kept_tokens]] = token_counts.counts[kept_tokens]
+
+        return frequency_vector
+
+    def calculate_log_odd_ratios(
+            self,
+            hyperpartisan_frequency_vector: np.ndarray,
+            non_hyperpartisan_frequency_vector: np.ndarray
+    ) -> np.ndarray:
+        hyperpartisan_log_o_values = self.__calculate_log_o_values__(
+            frequency_vector=hyperpartisan_frequency_vector,
+            word_count=self.hyperpartisan_word_count
+        )
+        non_hyperpartisan_log_o_values = self.__calculate_log_o_values__(
+            frequency_vector=non_hyperpartisan_frequency_vector,
+            word_count=self.non_hyperpartisan_word_count
+        )
+
+        with np.errstate(invalid='ignore'):
+            log_odd_ratios = hyperpartisan_log_o_values - non_hyperpartisan_log_o_values
+
+        # Tokens that only appear in one of the document groups get an infinite value
+        log_odd_ratios[non_hyperpartisan_frequency_vector == 0] = float('inf')
+        log_odd_ratios[hyperpartisan_frequency_vector == 0] = float('-inf')
+
+        return log_odd_ratios
+
+    def calculate_smoothed_scores(
+            self,
+            hyperpartisan_frequency_vector: np.ndarray,
+            non_hyperpartisan_frequency_vector: np.ndarray
+    ) -> np.ndarray | None:
+        match self.estimator:
+            case LogOddRatiosEstimator.ADDITIVE_SMOOTHING:
+                return self.__calculate_additive_smoothing_log_odd_ratios__(
+                    hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+                    non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+                )
+            case LogOddRatiosEstimator.INFORMATIVE_DIRICHLET:
+                return self.__calculate_informative_dirichlet_z_scores__(
+                    hyperpartisan_frequency_vector=hyperpartisan_frequency_vector,
+                    non_hyperpartisan_frequency_vector=non_hyperpartisan_frequency_vector
+                )
+            case _:
+                return None
+
+    def __calculate_additive_smoothing_log_odd_ratios__(
+            self,
+            hyperpartisan_frequency_vector: np.ndarray,
+            non_hyperpartisan_frequency_vector: np.ndarray
+    ) -> np.ndarray:
+        # Every token gets the same pseudo-count, so none of them has a probability of 0 in either document group
+        smoothing_mass = self.smoothing_value * len(hyperpartisan_frequency_vector)
+        hyperpartisan_log_o_values = self.__calculate_log_o_values__(
+            frequency_vector=hyperpartisan_frequency_vector + self.smoothing_value,
+            word_count=self.hyperpartisan_word_count + smoothing_mass
+        )
+        non_hyperpartisan_log_o_values = self.__calculate_log_o_values__(
+            frequency_vector=non_hyperpartisan_frequency_vector + self.smoothing_value,
+            word_count=self.non_hyperpartisan_word_count + smoothing_mass
+        )
+
+        return hyperpartisan_log_o_values - non_hyperpartisan_log_o_values
+
+    def __calculate_informative_dirichlet_z_scores__(
+            self,
+            hyperpartisan_frequency_vector: np.ndarray,
+            non_hyperpartisan_frequency_vector: np.ndarray
+    ) -> np.ndarray:
+        # Weighted log-odds with an informative Dirichlet prior (Monroe et al., 2008), divided by their standard
+        # deviation. The prior of each token is proportional to its frequency on the whole corpus
+        prior_vector = self.smoothing_value * (hyperpartisan_frequency_vector + non_hyperpartisan_frequency_vector)
+        prior_size = prior_vector.sum()
+
+        hyperpartisan_smoothed_frequency_vector = hyperpartisan_frequency_vector + prior_vector
+        non_hyperpartisan_smoothed_frequency_vector = non_hyperpartisan_frequency_vector + prior_vector
+        delta_values = (
+            np.log(hyperpartisan_smoothed_frequency_vector /
+                   (self.hyperpartisan_word_count + prior_size - hyperpartisan_smoothed_frequency_vector)) -
+            np.log(non_hyperpartisan_smoothed_frequency_vector /
+                   (self.non_hyperpartisan_word_count + prior_size - non_hyperpartisan_smoothed_frequency_vector))
+        )
+        variances = 1 / hyperpartisan_smoothed_frequency_vector + 1 / non_hyperpartisan_smoothed_frequency_vector
+
+        return delta_values / np.sqrt(variances)
+
+    @staticmethod
+    def __calculate_log_o_values__(frequency_vector: np.ndarray, word_count: int) -> np.ndarray:
+        with np.errstate(divide='ignore'):
+            p_values = frequency_vector / word_count
+            o_values = p_values / (1 - p_values)
+            return np.log10(o_values)
@@ -0,0 +1,100 @@
+import bisect
+
+import numpy as np
+
+
+class LogOddRatiosIndex:
+
+    def __init__(self, scores: np.ndarray, sorted_scores: bool = False) -> None:
+        # Equal scores are always ordered by ascending index, both in the highest and in the lowest ones
+        self.scores = scores
+        if sorted_scores:
+            # Scores that are already sorted need no index arrays, just the bounds of each partition
+            finite_values_start = int(np.searchsorted(scores, float('-inf'), side='right'))
+            finite_values_end = int(np.searchsorted(scores, float('inf'), side='left'))
+            self.negative_infinite_indexes = range(0, finite_values_start)
+            self.ascending_finite_indexes = range(finite_values_start, finite_values_end)
+            self.positive_infinite_indexes = range(finite_values_end, len(scores))
+        else:
+            # Infinite values are kept apart from the finite ones, which are sorted only once
+            self.positive_infinite_indexes = np.flatnonzero(scores == float('inf'))
+            self.negative_infinite_indexes = np.flatnonzero(scores == float('-inf'))
+            finite_indexes = np.flatnonzero(np.isfinite(scores))
+            self.ascending_finite_indexes = finite_indexes[np.argsort(scores[finite_indexes], kind='stable')]
+
+    def get_n_highest_indexes(self, n: int, infinite_values: bool) -> np.ndarray:
+        partitions = [self.__get_n_highest_finite_indexes__(n=n), self.negative_infinite_indexes]
+        if infinite_values:
+            partitions.insert(0, self.positive_infinite_indexes)
+
+        return self.__take_n_indexes_from_partitions__(partitions=partitions, n=n)
+
+    def get_n_lowest_indexes(self, n: int, infinite_values: bool) -> np.ndarray:
+        partitions = [self.ascending_finite_indexes, self.positive_infinite_indexes]
+        if infinite_values:
+            partitions.insert(0, self.negative_infinite_indexes)
+
+        return self.__take_n_indexes_from_partitions__(partitions=partitions, n=n)
+
+    def __get_n_highest_finite_indexes__(self, n: int) -> np.ndarray:
+        n = min(max(n, 0), len(self.ascending_finite_indexes))
+        if not n:
+            return np.empty(0, dtype=np.int64)
+
+        # Reversing the ascending order would also reverse the ties: the scores higher than the n-th highest one are
+        # sorted again, and the ties of the n-th highest score are taken in ascending order
+        ascending_finite_indexes = self.ascending_finite_indexes
+        lowest_score = self.scores[ascending_finite_indexes[-n]]
+        ties_start = self.__searchsorted_finite_scores__(score=lowest_score, side='left')
+        ties_end = self.__searchsorted_finite_scores__(score=lowest_score, side='right')
+
+        higher_indexes = np.asarray(ascending_finite_indexes[ties_end:], dtype=np.int64)
+        higher_indexes = higher_indexes[np.lexsort((higher_indexes, -np.asarray(self.scores[higher_indexes])))]
+        ties_indexes = np.asarray(
+            ascending_finite_indexes[ties_start:ties_start + n - len(higher_indexes)],
+            dtype=np.int64
+        )
+
+        return np.concatenate((higher_indexes, ties_indexes))
+
+    def __searchsorted_finite_scores__(self, score: float, side: str) -> int:
+        # Binary search on the finite scores in ascending order, without gathering them into a new array
+        ascending_finite_indexes = self.ascending_finite_indexes
+        search = bisect.bisect_left if side == 'left' else bisect.bisect_right
+        return search(range(len(ascending_finite_indexes)), score,
+                      key=lambda position: self.scores[ascending_finite_indexes[position]])
+
+    @staticmethod
+    def __take_n_indexes_from_partitions__(partitions: list[np.ndarray], n: int) -> np.ndarray:
+        indexes = []
+        for partition in partitions:
+            if n <= 0:
+                break
+            indexes.append(partition[:n])
+            n -= len(indexes[-1])
+
+        return np.concatenate(indexes).astype(np.int64) if indexes else np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def get_n_highest_indexes_without_index(scores: np.ndarray, n: int, infinite_values: bool) -> np.ndarray:
+        return LogOddRatiosIndex.get_n_lowest_indexes_without_index(
+            scores=-scores,
+            n=n,
+            infinite_values=infinite_values
+        )
+
+    @staticmethod
+    def get_n_lowest_indexes_without_index(scores: np.ndarray, n: int, infinite_values: bool) -> np.ndarray:
+        # Only the n lowest scores are sorted, after selecting them with a linear-time partition. The ties of the n-th
+        # lowest score are taken in ascending index order, like with an index
+        candidate_indexes = np.arange(len(scores)) if infinite_values else np.flatnonzero(scores != float('-inf'))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        if n < len(candidate_indexes):
+            candidate_scores = scores[candidate_indexes]
+            highest_score = np.partition(candidate_scores, n - 1)[n - 1]
+            lower_indexes = candidate_indexes[candidate_scores < highest_score]
+            ties_indexes = candidate_indexes[candidate_scores == highest_score][:n - len(lower_indexes)]
+            candidate_indexes = np.concatenate((lower_indexes, ties_indexes))
+
+        return candidate_indexes[np.argsort(scores[candidate_indexes], kind='stable')]
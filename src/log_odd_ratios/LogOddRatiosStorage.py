@@ -0,0 +1,46 @@
+import os
+import pickle
+from pathlib import Path
+
+from src.constant_values.enums import StorageFormat, TokenType
+from src.log_odd_ratios.ColumnarLogOddRatios import ColumnarLogOddRatios
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.utils import instrumentation
+
+
+class LogOddRatiosStorage:
+
+    def __init__(self, folder_path: str | Path, storage_format: StorageFormat = StorageFormat.PICKLE) -> None:
+        self.folder_path = folder_path
+        self.storage_format = storage_format
+
+    def get_path(self, token_type: TokenType) -> str:
+        # A pickle file, or a folder of columnar files, per token type
+        match self.storage_format:
+            case StorageFormat.COLUMNAR:
+                return os.path.join(self.folder_path, f'log-odd-ratios-{token_type.value}')
+            case _:
+                return os.path.join(self.folder_path, f'log-odd-ratios-{token_type.value}.pkl')
+
+    def load(self, token_type: TokenType) -> LogOddRatios | ColumnarLogOddRatios:
+        match self.storage_format:
+            case StorageFormat.COLUMNAR:
+                return ColumnarLogOddRatios(folder_path=self.get_path(token_type=token_type))
+            case _:
+                with open(self.get_path(token_type=token_type), 'rb') as pickle_file:
+                    return pickle.load(pickle_file)
+
+    def save(self, log_odd_ratios: LogOddRatios) -> None:
+        match self.storage_format:
+            case StorageFormat.PICKLE:
+                instrumentation.log("Saving log-odd ratios into a pickle file ...")
+                with open(self.get_path(token_type=log_odd_ratios.type), 'wb') as pickle_file:
+                    pickle.dump(log_odd_ratios, pickle_file)
+                instrumentation.log("Pickle file saved. \n\n")
+            case StorageFormat.COLUMNAR:
+                instrumentation.log("Saving log-odd ratios into columnar files ...")
+                ColumnarLogOddRatios.save(
+                    log_odd_ratios=log_odd_ratios,
+                    folder_path=self.get_path(token_type=log_odd_ratios.type)
+                )
+                instrumentation.log("Columnar files saved. \n\n")
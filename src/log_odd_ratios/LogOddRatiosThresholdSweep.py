@@ -0,0 +1,140 @@
+from collections.abc import Iterable
+
+import numpy as np
+
+from src.constant_values.enums import LogOddRatiosEstimator, TokenType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.get_hyperpartisan_data.InfrequentWordsFilter import InfrequentWordsFilter
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.LogOddRatiosEngine import LogOddRatiosEngine
+from src.log_odd_ratios.TokenCounts import TokenCounts
+from src.utils import instrumentation
+
+
+class LogOddRatiosThresholdSweep:
+
+    def __init__(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            token_type: TokenType,
+            vocabulary: Vocabulary | None = None,
+            max_partial_counts: int = 50_000_000,
+            min_count: int = 1,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0
+    ) -> None:
+        if isinstance(hyperpartisan_documents, EncodedDocumentList) != isinstance(
+                non_hyperpartisan_documents, EncodedDocumentList
+        ):
+            raise ValueError('Both document lists must be either encoded or lists of tokens')
+
+        # Lists of tokens are encoded once, every threshold is then derived from the token ids
+        if not isinstance(hyperpartisan_documents, EncodedDocumentList):
+            vocabulary = Vocabulary()
+            hyperpartisan_documents = vocabulary.encode_documents(document_list=hyperpartisan_documents)
+            non_hyperpartisan_documents = vocabulary.encode_documents(document_list=non_hyperpartisan_documents)
+        elif vocabulary is None:
+            raise ValueError('A vocabulary is required to sweep thresholds on encoded documents')
+
+        self.hyperpartisan_documents = hyperpartisan_documents
+        self.non_hyperpartisan_documents = non_hyperpartisan_documents
+        self.token_type = token_type
+        self.vocabulary = vocabulary
+        self.max_partial_counts = max_partial_counts
+        self.min_count = min_count
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+
+        instrumentation.log("Calculating unigrams frequency for the whole corpus ...")
+        self.hyperpartisan_unigrams_frequency = hyperpartisan_documents.count_tokens(vocabulary_size=len(vocabulary))
+        self.non_hyperpartisan_unigrams_frequency = non_hyperpartisan_documents.count_tokens(
+            vocabulary_size=len(vocabulary)
+        )
+        self.unigrams_frequency = self.hyperpartisan_unigrams_frequency + self.non_hyperpartisan_unigrams_frequency
+        instrumentation.log("Unigrams frequency calculated successfully. \n")
+
+    def sweep(self, threshold_values: Iterable[int]) -> dict[int, LogOddRatios]:
+        log_odd_ratios = {}
+        threshold_values = sorted(set(threshold_values))
+        if self.token_type == TokenType.UNIGRAM:
+            for threshold_value in threshold_values:
+                log_odd_ratios[threshold_value] = self.__get_unigrams_log_odd_ratios__(threshold_value=threshold_value)
+            return log_odd_ratios
+
+        # Removing words creates new n-grams across the gaps, so n-grams are counted again on the filtered token ids.
+        # Thresholds are processed in ascending order, so each one filters the (smaller) result of the previous one
+        hyperpartisan_documents = self.hyperpartisan_documents
+        non_hyperpartisan_documents = self.non_hyperpartisan_documents
+        for threshold_value in threshold_values:
+            instrumentation.log(f"Calculating log-odd ratios on {self.token_type.value}s with threshold "
+                                f"{threshold_value} ...")
+            frequent_tokens_mask = self.unigrams_frequency >= threshold_value
+            hyperpartisan_documents = InfrequentWordsFilter.filter_encoded_documents(
+                encoded_document_list=hyperpartisan_documents,
+                frequent_tokens_mask=frequent_tokens_mask
+            )
+            non_hyperpartisan_documents = InfrequentWordsFilter.filter_encoded_documents(
+                encoded_document_list=non_hyperpartisan_documents,
+                frequent_tokens_mask=frequent_tokens_mask
+            )
+
+            log_odd_ratios[threshold_value] = LogOddRatiosEngine(
+                hyperpartisan_word_count=hyperpartisan_documents.word_count,
+                non_hyperpartisan_word_count=non_hyperpartisan_documents.word_count,
+                estimator=self.estimator,
+                smoothing_value=self.smoothing_value
+            ).get_log_odd_ratios_from_token_counts(
+                token_type=self.token_type,
+                hyperpartisan_token_counts=self.__count_tokens__(encoded_document_list=hyperpartisan_documents),
+                non_hyperpartisan_token_counts=self.__count_tokens__(encoded_document_list=non_hyperpartisan_documents),
+                vocabulary=self.vocabulary,
+                min_count=self.min_count
+            )
+            instrumentation.log("Log-odd ratios calculated successfully. \n")
+
+        return log_odd_ratios
+
+    def __get_unigrams_log_odd_ratios__(self, threshold_value: int) -> LogOddRatios:
+        # Filtering words only removes entries from the unigram count vectors, so they are masked instead of recounted
+        instrumentation.log(f"Calculating log-odd ratios on unigrams with threshold {threshold_value} ...")
+        frequent_tokens_mask = self.unigrams_frequency >= threshold_value
+        hyperpartisan_unigrams_frequency = np.where(frequent_tokens_mask, self.hyperpartisan_unigrams_frequency, 0)
+        non_hyperpartisan_unigrams_frequency = np.where(
+            frequent_tokens_mask,
+            self.non_hyperpartisan_unigrams_frequency,
+            0
+        )
+
+        log_odd_ratios = LogOddRatiosEngine(
+            hyperpartisan_word_count=int(hyperpartisan_unigrams_frequency.sum()),
+            non_hyperpartisan_word_count=int(non_hyperpartisan_unigrams_frequency.sum()),
+            estimator=self.estimator,
+            smoothing_value=self.smoothing_value
+        ).get_log_odd_ratios_from_token_counts(
+            token_type=self.token_type,
+            hyperpartisan_token_counts=self.__get_token_counts__(frequency_vector=hyperpartisan_unigrams_frequency),
+            non_hyperpartisan_token_counts=self.__get_token_counts__(
+                frequency_vector=non_hyperpartisan_unigrams_frequency
+            ),
+            vocabulary=self.vocabulary,
+            min_count=self.min_count
+        )
+        instrumentation.log("Log-odd ratios calculated successfully. \n")
+
+        return log_odd_ratios
+
+    @staticmethod
+    def __get_token_counts__(frequency_vector: np.ndarray) -> TokenCounts:
+        token_ids = np.flatnonzero(frequency_vector)
+        return TokenCounts(keys=token_ids.astype(np.int64), counts=frequency_vector[token_ids].astype(np.int64))
+
+    def __count_tokens__(self, encoded_document_list: EncodedDocumentList) -> TokenCounts:
+        return CorpusCounts.count_tokens(
+            encoded_document_list=encoded_document_list,
+            token_type=self.token_type,
+            vocabulary_size=len(self.vocabulary),
+            max_partial_counts=self.max_partial_counts
+        )
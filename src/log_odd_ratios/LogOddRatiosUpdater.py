@@ -0,0 +1,181 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, StorageFormat, TokenType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.get_hyperpartisan_data.InfrequentWordsFilter import InfrequentWordsFilter
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.LogOddRatiosEngine import LogOddRatiosEngine
+from src.log_odd_ratios.LogOddRatiosStorage import LogOddRatiosStorage
+from src.utils import instrumentation
+from src.utils.CacheManifest import CacheManifest
+
+
+class LogOddRatiosUpdater:
+
+    def __init__(
+            self,
+            token_type: TokenType,
+            pickle_data_folder_path=Path('../data/pickle'),
+            max_partial_counts: int = 50_000_000,
+            min_count: int = 1,
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            infrequent_words_filter: InfrequentWordsFilter | None = None,
+            threshold_value: int = 20,
+            manifest: CacheManifest | None = None,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0
+    ) -> None:
+        self.token_type = token_type
+        self.max_partial_counts = max_partial_counts
+        self.min_count = min_count
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+        # The stored counts were calculated on documents without infrequent words. New documents are filtered with
+        # the frequent words of the corpus the filter was built on, which are not updated with the new documents (a
+        # word that only becomes frequent with them stays removed). Without a filter, new documents are counted whole
+        self.infrequent_words_filter = infrequent_words_filter
+        self.threshold_value = threshold_value
+        self.manifest = manifest
+        self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'log_odd_ratios')
+        if not os.path.exists(self.pickle_data_folder_path):
+            os.makedirs(self.pickle_data_folder_path)
+        self.log_odd_ratios_storage = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=storage_format
+        )
+
+        # The counts stored by a previous calculation are the starting point (an empty corpus if there are none)
+        self.corpus_counts_folder_path = CorpusCounts.get_folder_path(
+            pickle_data_folder_path=pickle_data_folder_path,
+            token_type=token_type
+        )
+        if CorpusCounts.exists(folder_path=self.corpus_counts_folder_path):
+            instrumentation.log(f"Loading stored {token_type.value}s counts ...")
+            self.corpus_counts = CorpusCounts.load(folder_path=self.corpus_counts_folder_path)
+            instrumentation.log("Counts loaded successfully. \n")
+        else:
+            instrumentation.log(f"There are no stored {token_type.value}s counts, starting from an empty corpus. \n")
+            self.corpus_counts = CorpusCounts(token_type=token_type)
+
+        self.log_odd_ratios = LogOddRatios(values={}, type=token_type)
+
+    def add_documents(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None = None
+    ) -> LogOddRatios:
+        instrumentation.log(f"Adding {len(hyperpartisan_documents)} HYPERPARTISAN and "
+                            f"{len(non_hyperpartisan_documents)} NON-HYPERPARTISAN documents to the "
+                            f"{self.token_type.value}s counts ...")
+        if self.infrequent_words_filter is not None:
+            hyperpartisan_documents = self.__remove_infrequent_words__(
+                document_list=hyperpartisan_documents,
+                vocabulary=vocabulary
+            )
+            non_hyperpartisan_documents = self.__remove_infrequent_words__(
+                document_list=non_hyperpartisan_documents,
+                vocabulary=vocabulary
+            )
+        self.corpus_counts.add_documents(
+            hyperpartisan_documents=hyperpartisan_documents,
+            non_hyperpartisan_documents=non_hyperpartisan_documents,
+            vocabulary=vocabulary,
+            max_partial_counts=self.max_partial_counts
+        )
+        self.corpus_counts.save(folder_path=self.corpus_counts_folder_path)
+        instrumentation.log("Counts updated successfully.")
+
+        input_hashes = self.__get_input_hashes__(
+            hyperpartisan_documents=hyperpartisan_documents,
+            non_hyperpartisan_documents=non_hyperpartisan_documents,
+            vocabulary=vocabulary
+        )
+
+        # Word totals change with every batch, so the scores are recalculated from the merged counts (not the corpus)
+        instrumentation.log("Calculating log-odd ratios (vectorized) ...")
+        log_odd_ratios_engine = LogOddRatiosEngine(
+            hyperpartisan_word_count=self.corpus_counts.hyperpartisan_word_count,
+            non_hyperpartisan_word_count=self.corpus_counts.non_hyperpartisan_word_count,
+            estimator=self.estimator,
+            smoothing_value=self.smoothing_value
+        )
+        self.log_odd_ratios = log_odd_ratios_engine.get_log_odd_ratios_from_token_counts(
+            token_type=self.token_type,
+            hyperpartisan_token_counts=self.corpus_counts.hyperpartisan_token_counts,
+            non_hyperpartisan_token_counts=self.corpus_counts.non_hyperpartisan_token_counts,
+            vocabulary=self.corpus_counts.vocabulary,
+            min_count=self.min_count
+        )
+        instrumentation.log("Log-odd ratios calculated successfully.")
+
+        self.log_odd_ratios_storage.save(log_odd_ratios=self.log_odd_ratios)
+        if self.manifest is not None:
+            self.manifest.record(
+                artifact_path=self.log_odd_ratios_storage.get_path(token_type=self.token_type),
+                input_hashes=input_hashes,
+                parameters=self.__get_parameters__()
+            )
+
+        return self.log_odd_ratios
+
+    def __remove_infrequent_words__(
+            self,
+            document_list: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None
+    ) -> list[list[str]] | EncodedDocumentList:
+        frequent_tokens = self.infrequent_words_filter.get_frequent_tokens(threshold_value=self.threshold_value)
+        if not isinstance(document_list, EncodedDocumentList):
+            return [[token for token in document if token in frequent_tokens] for document in document_list]
+
+        # Encoded documents may not share the vocabulary of the filter, their tokens are looked up by string
+        if vocabulary is None:
+            raise ValueError('The vocabulary of the encoded documents is required to remove their infrequent words')
+        frequent_tokens_mask = np.fromiter(
+            (token in frequent_tokens for token in vocabulary.tokens),
+            dtype=bool,
+            count=len(vocabulary)
+        )
+        return InfrequentWordsFilter.filter_encoded_documents(
+            encoded_document_list=document_list,
+            frequent_tokens_mask=frequent_tokens_mask
+        )
+
+    def __get_input_hashes__(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None
+    ) -> dict[str, str] | None:
+        if self.manifest is None:
+            return None
+
+        # The updated log-odd ratios derive from the inputs they were last recorded with and the added documents, so
+        # they are no longer taken as up to date with the documents of the original calculation
+        previous_input_hashes = self.manifest.get_input_hashes(
+            artifact_path=self.log_odd_ratios_storage.get_path(token_type=self.token_type)
+        )
+        return {
+            document_type.value: CacheManifest.get_derived_hash(input_hashes={
+                'previous': previous_input_hashes.get(document_type.value),
+                'added': CacheManifest.get_documents_hash(document_list=document_list, vocabulary=vocabulary)
+            }) for document_type, document_list in [
+                (DocumentType.HYPERPARTISAN, hyperpartisan_documents),
+                (DocumentType.NON_HYPERPARTISAN, non_hyperpartisan_documents)
+            ]
+        }
+
+    def __get_parameters__(self) -> dict:
+        return {
+            'token_type': self.token_type.value,
+            'vectorized': True,
+            'min_count': self.min_count,
+            'estimator': self.estimator.value,
+            'smoothing_value': self.smoothing_value,
+            'threshold_value': self.threshold_value if self.infrequent_words_filter is not None else None
+        }
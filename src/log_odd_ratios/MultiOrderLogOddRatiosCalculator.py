@@ -0,0 +1,307 @@
+import os
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, StorageFormat, TokenType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.log_odd_ratios.ColumnarLogOddRatios import ColumnarLogOddRatios
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
+from src.log_odd_ratios.DocumentGroup import DocumentGroup
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.LogOddRatiosEngine import LogOddRatiosEngine
+from src.log_odd_ratios.LogOddRatiosStorage import LogOddRatiosStorage
+from src.log_odd_ratios.NGramCounter import NGramCounter
+from src.log_odd_ratios.ShardedTokenCounter import ShardedTokenCounter
+from src.log_odd_ratios.TokenCounts import TokenCounts
+from src.utils import instrumentation
+from src.utils.CacheManifest import CacheManifest
+
+
+class MultiOrderLogOddRatiosCalculator:
+
+    def __init__(
+            self,
+            hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            non_hyperpartisan_documents: list[list[str]] | EncodedDocumentList,
+            token_types: Iterable[TokenType],
+            pickle_data_folder_path=Path('../data/pickle'),
+            vocabulary: Vocabulary | None = None,
+            chunk_size: int = 10_000_000,
+            max_partial_counts: int = 50_000_000,
+            min_count: int = 1,
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            manifest: CacheManifest | None = None,
+            input_hashes: dict[str, str] | None = None,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0,
+            number_of_workers: int = 1
+    ) -> None:
+        self.encoded_documents = isinstance(hyperpartisan_documents, EncodedDocumentList)
+        if self.encoded_documents != isinstance(non_hyperpartisan_documents, EncodedDocumentList):
+            raise ValueError('Both document lists must be either encoded or lists of tokens')
+        if self.encoded_documents and vocabulary is None:
+            raise ValueError('A vocabulary is required to calculate log-odd ratios on encoded documents')
+
+        self.hyperpartisan_document_group = DocumentGroup(
+            document_list=hyperpartisan_documents,
+            document_type=DocumentType.HYPERPARTISAN
+        )
+        self.non_hyperpartisan_document_group = DocumentGroup(
+            document_list=non_hyperpartisan_documents,
+            document_type=DocumentType.NON_HYPERPARTISAN
+        )
+        self.token_types = sorted(set(token_types), key=lambda token_type: token_type.ngram_size)
+        self.vocabulary = vocabulary
+        self.chunk_size = chunk_size
+        self.max_partial_counts = max_partial_counts
+        self.min_count = min_count
+        self.storage_format = storage_format
+        self.manifest = manifest
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+        self.number_of_workers = number_of_workers
+        self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'log_odd_ratios')
+        self.corpus_counts_folder_paths = {
+            token_type: CorpusCounts.get_folder_path(
+                pickle_data_folder_path=pickle_data_folder_path,
+                token_type=token_type
+            ) for token_type in self.token_types
+        }
+        if not os.path.exists(self.pickle_data_folder_path):
+            os.makedirs(self.pickle_data_folder_path)
+        self.log_odd_ratios_storage = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=storage_format
+        )
+
+        self.log_odd_ratios: dict[TokenType, LogOddRatios | ColumnarLogOddRatios] = {}
+
+        # Only the token types whose stored log-odd ratios are outdated are counted again. The documents themselves
+        # are only hashed when no hashes derived from their source files are given
+        self.input_hashes = input_hashes
+        if self.manifest is not None:
+            if self.input_hashes is None:
+                self.input_hashes = self.__get_documents_hashes__()
+            up_to_date_token_types = [
+                token_type for token_type in self.token_types if self.manifest.is_up_to_date(
+                    artifact_path=self.log_odd_ratios_storage.get_path(token_type=token_type),
+                    input_hashes=self.input_hashes,
+                    parameters=self.__get_parameters__(token_type=token_type)
+                )
+            ]
+            for token_type in up_to_date_token_types:
+                with instrumentation.stage(
+                        'calculate_log_odd_ratios',
+                        component='multi_order_calculator',
+                        token_type=token_type.value,
+                        estimator=self.estimator.value
+                ) as stage_event:
+                    stage_event.cache = 'hit'
+                    instrumentation.log(f"The log-odd ratios for {token_type.value}s are up to date.")
+                self.log_odd_ratios[token_type] = self.log_odd_ratios_storage.load(token_type=token_type)
+                self.token_types.remove(token_type)
+
+        self.hyperpartisan_tokens_frequency = {}
+        self.non_hyperpartisan_tokens_frequency = {}
+        if self.token_types:
+            self.hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency_with_stage__(
+                document_group=self.hyperpartisan_document_group
+            )
+            self.non_hyperpartisan_tokens_frequency = self.__calculate_tokens_frequency_with_stage__(
+                document_group=self.non_hyperpartisan_document_group
+            )
+            instrumentation.log()
+
+    def __get_parameters__(self, token_type: TokenType) -> dict:
+        return {
+            'token_type': token_type.value,
+            'vectorized': True,
+            'min_count': self.min_count,
+            'estimator': self.estimator.value,
+            'smoothing_value': self.smoothing_value
+        }
+
+    def __get_documents_hashes__(self) -> dict[str, str]:
+        return {
+            document_group.document_type.value: CacheManifest.get_documents_hash(
+                document_list=document_group.document_list,
+                vocabulary=self.vocabulary
+            ) for document_group in [self.hyperpartisan_document_group, self.non_hyperpartisan_document_group]
+        }
+
+    def __calculate_tokens_frequency_with_stage__(
+            self,
+            document_group: DocumentGroup
+    ) -> dict[TokenType, defaultdict[str | tuple[str, ...], int] | TokenCounts]:
+        with instrumentation.stage(
+                'count_tokens',
+                component='multi_order_calculator',
+                token_types=[token_type.value for token_type in self.token_types],
+                document_type=document_group.document_type.value
+        ) as stage_event:
+            tokens_frequency = self.__calculate_tokens_frequency__(document_group=document_group)
+            stage_event.items['articles'] = len(document_group.document_list)
+            stage_event.items['tokens'] = document_group.word_count
+
+        return tokens_frequency
+
+    def __calculate_tokens_frequency__(
+            self,
+            document_group: DocumentGroup
+    ) -> dict[TokenType, defaultdict[str | tuple[str, ...], int] | TokenCounts]:
+        if self.number_of_workers > 1:
+            return self.__calculate_tokens_frequency_on_shards__(document_group=document_group)
+        if self.encoded_documents:
+            return self.__calculate_token_counts_on_encoded_documents__(document_group=document_group)
+
+        tokens_frequency = {token_type: defaultdict(int) for token_type in self.token_types}
+        token_types_names = ', '.join(f'{token_type.value}s' for token_type in self.token_types)
+        progress_bar_description = (f"Calculating {token_types_names} frequency for "
+                                    f"{document_group.document_type.value.upper()} ...")
+
+        # Every token type is counted on the same traversal of the documents
+        for document in instrumentation.progress_bar(
+                document_group.document_list,
+                description=progress_bar_description
+        ):
+            for token_type in self.token_types:
+                n = token_type.ngram_size
+                token_type_frequency = tokens_frequency[token_type]
+                ngrams = document if n == 1 else zip(*(document[position:] for position in range(n)))
+                for ngram in ngrams:
+                    token_type_frequency[ngram] += 1
+
+        return tokens_frequency
+
+    def __calculate_tokens_frequency_on_shards__(
+            self,
+            document_group: DocumentGroup
+    ) -> dict[TokenType, defaultdict[str | tuple[str, ...], int] | TokenCounts]:
+        instrumentation.log(f"Calculating tokens frequency for {document_group.document_type.value.upper()} ...")
+        sharded_token_counter = ShardedTokenCounter(
+            token_types=self.token_types,
+            number_of_workers=self.number_of_workers,
+            max_partial_counts=self.max_partial_counts
+        )
+
+        # Every shard is counted for every token type, so the documents are still traversed once
+        if self.encoded_documents:
+            return sharded_token_counter.count_encoded_documents(
+                encoded_document_list=document_group.document_list,
+                vocabulary_size=len(self.vocabulary)
+            )
+
+        token_counts, vocabulary = sharded_token_counter.count_documents(document_list=document_group.document_list)
+        return {
+            token_type: ShardedTokenCounter.get_tokens_frequency(
+                token_counts=token_type_counts,
+                token_type=token_type,
+                vocabulary=vocabulary
+            ) for token_type, token_type_counts in token_counts.items()
+        }
+
+    def __calculate_token_counts_on_encoded_documents__(
+            self,
+            document_group: DocumentGroup
+    ) -> dict[TokenType, TokenCounts]:
+        document_list: EncodedDocumentList = document_group.document_list
+        ngram_counters = {
+            token_type: NGramCounter(
+                n=token_type.ngram_size,
+                vocabulary_size=len(self.vocabulary),
+                chunk_size=self.chunk_size,
+                max_partial_counts=self.max_partial_counts
+            ) for token_type in self.token_types
+        }
+        progress_bar_description = f"Calculating tokens frequency for {document_group.document_type.value.upper()} ..."
+
+        # Each chunk of documents is counted for every token type before moving on to the next one
+        for documents_chunk in instrumentation.progress_bar(
+                document_list.iterate_chunks(chunk_size=self.chunk_size),
+                description=progress_bar_description,
+                total=document_list.count_chunks(chunk_size=self.chunk_size)
+        ):
+            for ngram_counter in ngram_counters.values():
+                ngram_counter.add_documents(encoded_document_list=documents_chunk)
+
+        return {token_type: ngram_counter.get_token_counts() for token_type, ngram_counter in ngram_counters.items()}
+
+    def calculate_log_odd_ratios(self) -> None:
+        log_odd_ratios_engine = LogOddRatiosEngine(
+            hyperpartisan_word_count=self.hyperpartisan_document_group.word_count,
+            non_hyperpartisan_word_count=self.non_hyperpartisan_document_group.word_count,
+            estimator=self.estimator,
+            smoothing_value=self.smoothing_value
+        )
+        del self.hyperpartisan_document_group
+        del self.non_hyperpartisan_document_group
+
+        for token_type in self.token_types:
+            with instrumentation.stage(
+                    'calculate_log_odd_ratios',
+                    component='multi_order_calculator',
+                    token_type=token_type.value,
+                    estimator=self.estimator.value
+            ) as stage_event:
+                stage_event.cache = 'miss'
+                log_odd_ratios = self.__calculate_log_odd_ratios_on_token_type__(
+                    token_type=token_type,
+                    log_odd_ratios_engine=log_odd_ratios_engine
+                )
+                tokens_count = len(log_odd_ratios.scores) if log_odd_ratios.scores is not None \
+                    else len(log_odd_ratios.values)
+                stage_event.items['tokens'] = tokens_count
+            self.log_odd_ratios[token_type] = log_odd_ratios
+            instrumentation.log("Log-odd ratios calculated successfully.")
+
+            with instrumentation.stage(
+                    'save_log_odd_ratios',
+                    component='multi_order_calculator',
+                    token_type=token_type.value,
+                    storage_format=self.storage_format.value
+            ) as stage_event:
+                self.log_odd_ratios_storage.save(log_odd_ratios=log_odd_ratios)
+                stage_event.items['tokens'] = tokens_count
+            if self.manifest is not None:
+                self.manifest.record(
+                    artifact_path=self.log_odd_ratios_storage.get_path(token_type=token_type),
+                    input_hashes=self.input_hashes,
+                    parameters=self.__get_parameters__(token_type=token_type)
+                )
+
+    def __calculate_log_odd_ratios_on_token_type__(
+            self,
+            token_type: TokenType,
+            log_odd_ratios_engine: LogOddRatiosEngine
+    ) -> LogOddRatios:
+        instrumentation.log(f"Calculating log-odd ratios on {token_type.value}s (vectorized) ...")
+        hyperpartisan_tokens_frequency = self.hyperpartisan_tokens_frequency.pop(token_type)
+        non_hyperpartisan_tokens_frequency = self.non_hyperpartisan_tokens_frequency.pop(token_type)
+
+        if self.encoded_documents:
+            # The counts are kept, so new documents can later be added without counting the whole corpus again
+            CorpusCounts(
+                token_type=token_type,
+                vocabulary=self.vocabulary,
+                hyperpartisan_token_counts=hyperpartisan_tokens_frequency,
+                non_hyperpartisan_token_counts=non_hyperpartisan_tokens_frequency,
+                hyperpartisan_word_count=log_odd_ratios_engine.hyperpartisan_word_count,
+                non_hyperpartisan_word_count=log_odd_ratios_engine.non_hyperpartisan_word_count
+            ).save(folder_path=self.corpus_counts_folder_paths[token_type])
+            return log_odd_ratios_engine.get_log_odd_ratios_from_token_counts(
+                token_type=token_type,
+                hyperpartisan_token_counts=hyperpartisan_tokens_frequency,
+                non_hyperpartisan_token_counts=non_hyperpartisan_tokens_frequency,
+                vocabulary=self.vocabulary,
+                min_count=self.min_count
+            )
+
+        return log_odd_ratios_engine.get_log_odd_ratios_from_tokens_frequency(
+            token_type=token_type,
+            tokens=hyperpartisan_tokens_frequency.keys() | non_hyperpartisan_tokens_frequency.keys(),
+            hyperpartisan_tokens_frequency=hyperpartisan_tokens_frequency,
+            non_hyperpartisan_tokens_frequency=non_hyperpartisan_tokens_frequency,
+            min_count=self.min_count
+        )
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.log_odd_ratios.TokenCounts import TokenCounts
+
+
+class NGramCounter:
+
+    def __init__(
+            self,
+            n: int,
+            vocabulary_size: int,
+            chunk_size: int = 10_000_000,
+            max_partial_counts: int = 50_000_000,
+            spill_folder_path: str | Path | None = None
+    ) -> None:
+        self.n = n
+        # Vocabularies too large to pack n token ids into an int64 key use wide keys
+        self.wide_keys = ngram_keys.needs_wide_ngram_keys(n=n, vocabulary_size=vocabulary_size)
+        self.chunk_size = chunk_size
+        self.max_partial_counts = max_partial_counts
+        self.spill_folder_path = spill_folder_path
+
+        self.partial_counts: list[TokenCounts] = []
+        self.spilled_counts_file_paths: list[str] = []
+        self.spill_folder: tempfile.TemporaryDirectory | None = None
+
+    def add_documents(self, encoded_document_list: EncodedDocumentList) -> None:
+        # Count the n-grams chunk by chunk, so only the keys of one chunk exist at a time
+        for documents_chunk in encoded_document_list.iterate_chunks(chunk_size=self.chunk_size):
+            self.__add_partial_counts__(TokenCounts.from_keys(
+                keys=ngram_keys.get_ngram_keys(
+                    encoded_document_list=documents_chunk,
+                    n=self.n,
+                    wide=self.wide_keys
+                )
+            ))
+
+    def __add_partial_counts__(self, token_counts: TokenCounts) -> None:
+        self.partial_counts.append(token_counts)
+
+        if sum(len(partial_counts) for partial_counts in self.partial_counts) > self.max_partial_counts:
+            self.__spill_partial_counts__()
+
+    def __spill_partial_counts__(self) -> None:
+        if self.spill_folder is None:
+            self.spill_folder = tempfile.TemporaryDirectory(prefix='ngram-counts-', dir=self.spill_folder_path)
+
+        spilled_counts_file_path = os.path.join(
+            self.spill_folder.name,
+            f'partial-counts-{len(self.spilled_counts_file_paths)}'
+        )
+        self.__save_token_counts__(
+            token_counts=TokenCounts.merge(token_counts_list=self.partial_counts),
+            file_path=spilled_counts_file_path
+        )
+        self.spilled_counts_file_paths.append(spilled_counts_file_path)
+        self.partial_counts = []
+
+    def get_token_counts(self) -> TokenCounts:
+        if not self.spilled_counts_file_paths:
+            token_counts = TokenCounts.merge(token_counts_list=self.partial_counts)
+            self.partial_counts = []
+            return token_counts
+
+        # Spilled counts are memory-mapped and merged with the partial counts left in memory by a k-way merge, so
+        # only the merged result and a block of each spill file are held in memory
+        token_counts = TokenCounts.merge_sorted(
+            token_counts_list=[TokenCounts.merge(token_counts_list=self.partial_counts)] + [
+                self.__load_token_counts__(file_path=spilled_counts_file_path)
+                for spilled_counts_file_path in self.spilled_counts_file_paths
+            ],
+            block_size=max(self.max_partial_counts // (len(self.spilled_counts_file_paths) + 1), 1)
+        )
+        self.partial_counts = []
+        self.spilled_counts_file_paths = []
+
+        if self.spill_folder is not None:
+            self.spill_folder.cleanup()
+            self.spill_folder = None
+
+        return token_counts
+
+    @staticmethod
+    def __save_token_counts__(token_counts: TokenCounts, file_path: str) -> None:
+        # Keys and counts are saved as separate '.npy' files, which (unlike '.npz' archives) can be memory-mapped
+        np.save(f'{file_path}-keys.npy', token_counts.keys)
+        np.save(f'{file_path}-counts.npy', token_counts.counts)
+
+    @staticmethod
+    def __load_token_counts__(file_path: str) -> TokenCounts:
+        return TokenCounts(
+            keys=np.load(f'{file_path}-keys.npy', mmap_mode='r'),
+            counts=np.load(f'{file_path}-counts.npy', mmap_mode='r')
+        )
@@ -0,0 +1,195 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from itertools import pairwise
+from multiprocessing.pool import Pool
+
+import numpy as np
+
+from src.constant_values.enums import TokenType
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
+from src.log_odd_ratios.TokenCounts import TokenCounts
+from src.utils import instrumentation
+
+
+class ShardedTokenCounter:
+    # Set in every worker by the pool initializer: forked workers share the parent's documents instead of receiving
+    # a pickled copy of their shard with each task
+    document_list: list[list[str]] | EncodedDocumentList | None = None
+
+    def __init__(
+            self,
+            token_types: Iterable[TokenType],
+            number_of_workers: int,
+            max_partial_counts: int = 50_000_000
+    ) -> None:
+        self.token_types = list(token_types)
+        self.number_of_workers = number_of_workers
+        self.max_partial_counts = max_partial_counts
+
+    def count_encoded_documents(
+            self,
+            encoded_document_list: EncodedDocumentList,
+            vocabulary_size: int
+    ) -> dict[TokenType, TokenCounts]:
+        shards = self.__get_shards__(document_offsets=encoded_document_list.document_offsets)
+
+        with Pool(
+                processes=self.number_of_workers,
+                initializer=self.__set_document_list__,
+                initargs=(encoded_document_list,)
+        ) as pool:
+            instrumentation.log(f'Counting {len(shards)} shards on {self.number_of_workers} processes ...')
+            shards_token_counts = pool.starmap(self.__count_shard__, [
+                (self.token_types, start, stop, vocabulary_size, self.max_partial_counts) for start, stop in shards
+            ], chunksize=1)
+
+            return self.__reduce_token_counts__(pool=pool, shards_token_counts=shards_token_counts)
+
+    def count_documents(self, document_list: list[list[str]]) -> tuple[dict[TokenType, TokenCounts], Vocabulary]:
+        document_offsets = np.zeros(len(document_list) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, document_list), dtype=np.int64, count=len(document_list)),
+                  out=document_offsets[1:])
+        shards = self.__get_shards__(document_offsets=document_offsets)
+
+        with Pool(
+                processes=self.number_of_workers,
+                initializer=self.__set_document_list__,
+                initargs=(document_list,)
+        ) as pool:
+            instrumentation.log(f'Counting {len(shards)} shards on {self.number_of_workers} processes ...')
+
+            # Every shard is encoded with its own vocabulary, whose ids are then mapped onto a shared one
+            shards_tokens_and_token_counts = pool.starmap(self.__count_shard__, [
+                (self.token_types, start, stop, None, self.max_partial_counts) for start, stop in shards
+            ], chunksize=1)
+            vocabulary = Vocabulary()
+            tokens_ids_mappings = [
+                np.fromiter(
+                    (vocabulary.add_token(token=token) for token in shard_tokens),
+                    dtype=np.int64,
+                    count=len(shard_tokens)
+                ) for shard_tokens, _ in shards_tokens_and_token_counts
+            ]
+            shards_token_counts = pool.starmap(self.__remap_token_counts__, [
+                (shard_token_counts, token_ids_mapping, len(vocabulary))
+                for (_, shard_token_counts), token_ids_mapping
+                in zip(shards_tokens_and_token_counts, tokens_ids_mappings)
+            ])
+
+            return self.__reduce_token_counts__(pool=pool, shards_token_counts=shards_token_counts), vocabulary
+
+    @staticmethod
+    def get_tokens_frequency(
+            token_counts: TokenCounts,
+            token_type: TokenType,
+            vocabulary: Vocabulary
+    ) -> defaultdict[str | tuple[str, ...], int]:
+        # Same keys as the counts of the serial path: tokens for unigrams, tuples of tokens for n-grams
+        return defaultdict(int, zip(
+            ngram_keys.decode_ngram_keys(ngram_keys=token_counts.keys, n=token_type.ngram_size, vocabulary=vocabulary),
+            token_counts.counts.tolist()
+        ))
+
+    def __get_shards__(self, document_offsets: np.ndarray) -> list[tuple[int, int]]:
+        # One shard of consecutive documents per worker, with roughly the same number of tokens each
+        token_targets = np.linspace(0, document_offsets[-1], self.number_of_workers + 1)[1:-1]
+        shard_bounds = np.searchsorted(document_offsets, token_targets)
+        shard_bounds = np.unique(np.concatenate(([0], shard_bounds, [len(document_offsets) - 1])))
+
+        return list(pairwise(shard_bounds.tolist()))
+
+    def __reduce_token_counts__(
+            self,
+            pool: Pool,
+            shards_token_counts: list[dict[TokenType, TokenCounts]]
+    ) -> dict[TokenType, TokenCounts]:
+        token_counts_lists = {
+            token_type: [shard_token_counts[token_type] for shard_token_counts in shards_token_counts]
+            for token_type in self.token_types
+        }
+
+        # Tree reduction: the partial counts are merged in pairs, in parallel, halving their number on each round
+        while any(len(token_counts_list) > 1 for token_counts_list in token_counts_lists.values()):
+            merging_tasks = [
+                (token_type, token_counts_list[index:index + 2])
+                for token_type, token_counts_list in token_counts_lists.items()
+                for index in range(0, len(token_counts_list) - 1, 2)
+            ]
+            merged_token_counts = pool.map(TokenCounts.merge, [pair for _, pair in merging_tasks], chunksize=1)
+
+            # An unpaired last partial count is carried over to the next round as it is
+            next_token_counts_lists = {token_type: [] for token_type in self.token_types}
+            for (token_type, _), token_counts in zip(merging_tasks, merged_token_counts):
+                next_token_counts_lists[token_type].append(token_counts)
+            for token_type, token_counts_list in token_counts_lists.items():
+                if len(token_counts_list) % 2:
+                    next_token_counts_lists[token_type].append(token_counts_list[-1])
+            token_counts_lists = next_token_counts_lists
+
+        return {
+            token_type: token_counts_list[0] if token_counts_list else TokenCounts()
+            for token_type, token_counts_list in token_counts_lists.items()
+        }
+
+    @staticmethod
+    def __set_document_list__(document_list: list[list[str]] | EncodedDocumentList) -> None:
+        ShardedTokenCounter.document_list = document_list
+
+    @staticmethod
+    def __count_shard__(
+            token_types: list[TokenType],
+            start: int,
+            stop: int,
+            vocabulary_size: int | None,
+            max_partial_counts: int
+    ) -> dict[TokenType, TokenCounts] | tuple[list[str], dict[TokenType, TokenCounts]]:
+        document_list = ShardedTokenCounter.document_list
+        if isinstance(document_list, EncodedDocumentList):
+            encoded_shard = document_list.get_documents_slice(start=start, stop=stop)
+        else:
+            shard_vocabulary = Vocabulary()
+            encoded_shard = shard_vocabulary.encode_documents(document_list=document_list[start:stop])
+            vocabulary_size = len(shard_vocabulary)
+
+        shard_token_counts = {
+            token_type: CorpusCounts.count_tokens(
+                encoded_document_list=encoded_shard,
+                token_type=token_type,
+                vocabulary_size=vocabulary_size,
+                max_partial_counts=max_partial_counts
+            ) for token_type in token_types
+        }
+
+        if isinstance(document_list, EncodedDocumentList):
+            return shard_token_counts
+        return shard_vocabulary.tokens, shard_token_counts
+
+    @staticmethod
+    def __remap_token_counts__(
+            shard_token_counts: dict[TokenType, TokenCounts],
+            token_ids_mapping: np.ndarray,
+            vocabulary_size: int
+    ) -> dict[TokenType, TokenCounts]:
+        remapped_token_counts = {}
+        for token_type, token_counts in shard_token_counts.items():
+            n = token_type.ngram_size
+            if n == 1:
+                keys = token_ids_mapping[token_counts.keys]
+            else:
+                token_ids_matrix = ngram_keys.unpack_ngram_keys(ngram_keys=token_counts.keys, n=n)
+                keys = ngram_keys.pack_ngram_keys(
+                    token_ids_columns=[token_ids_mapping[token_ids_matrix[:, position]] for position in range(n)],
+                    wide=ngram_keys.needs_wide_ngram_keys(n=n, vocabulary_size=vocabulary_size)
+                )
+
+            # The keys of a shard stay unique with the shared ids, but have to be sorted again
+            sorting_indexes = ngram_keys.argsort_ngram_keys(ngram_keys=keys)
+            remapped_token_counts[token_type] = TokenCounts(
+                keys=keys[sorting_indexes],
+                counts=token_counts.counts[sorting_indexes]
+            )
+
+        return remapped_token_counts
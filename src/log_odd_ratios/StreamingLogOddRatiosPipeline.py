@@ -0,0 +1,211 @@
+import os
+import tempfile
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, StorageFormat, TokenType
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.get_hyperpartisan_data.HyperpartisanDocumentsProcessor import HyperpartisanDocumentsProcessor
+from src.get_hyperpartisan_data.InfrequentWordsFilter import InfrequentWordsFilter
+from src.log_odd_ratios.CorpusCounts import CorpusCounts
+from src.log_odd_ratios.LogOddRatios import LogOddRatios
+from src.log_odd_ratios.LogOddRatiosEngine import LogOddRatiosEngine
+from src.log_odd_ratios.LogOddRatiosStorage import LogOddRatiosStorage
+from src.log_odd_ratios.NGramCounter import NGramCounter
+from src.utils import instrumentation
+
+
+class StreamingLogOddRatiosPipeline:
+
+    def __init__(
+            self,
+            token_types: Iterable[TokenType],
+            hyperpartisan_documents_processor: HyperpartisanDocumentsProcessor | None = None,
+            threshold_value: int = 20,
+            pickle_data_folder_path=Path('../data/pickle'),
+            chunk_size: int = 10_000_000,
+            max_partial_counts: int = 50_000_000,
+            min_count: int = 1,
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            spill_folder_path: str | Path | None = None,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            smoothing_value: float = 1.0
+    ) -> None:
+        self.token_types = sorted(set(token_types), key=lambda token_type: token_type.ngram_size)
+        self.hyperpartisan_documents_processor = hyperpartisan_documents_processor or HyperpartisanDocumentsProcessor()
+        self.threshold_value = threshold_value
+        self.pickle_data_folder_path = os.path.join(pickle_data_folder_path, 'log_odd_ratios')
+        self.corpus_counts_pickle_data_folder_path = pickle_data_folder_path
+        self.chunk_size = chunk_size
+        self.max_partial_counts = max_partial_counts
+        self.min_count = min_count
+        self.estimator = estimator
+        self.smoothing_value = smoothing_value
+        self.spill_folder_path = spill_folder_path
+        if not os.path.exists(self.pickle_data_folder_path):
+            os.makedirs(self.pickle_data_folder_path)
+        self.log_odd_ratios_storage = LogOddRatiosStorage(
+            folder_path=self.pickle_data_folder_path,
+            storage_format=storage_format
+        )
+
+        self.vocabulary = Vocabulary()
+        self.unigrams_frequency = np.zeros(0, dtype=np.int64)
+        self.log_odd_ratios: dict[TokenType, LogOddRatios] = {}
+
+    def run(self) -> dict[TokenType, LogOddRatios]:
+        # Clean documents are only kept on disk as token ids, so memory is bounded by the vocabulary (not the corpus)
+        with tempfile.TemporaryDirectory(prefix='clean-documents-', dir=self.spill_folder_path) as spill_folder:
+            instrumentation.log("Pass 1: cleaning documents and counting unigrams on the whole corpus ...")
+            spilled_document_lists = {
+                document_type: self.__spill_clean_documents_with_stage__(
+                    document_type=document_type,
+                    spill_folder=spill_folder
+                ) for document_type in DocumentType
+            }
+            instrumentation.log("Pass 1 finished. \n")
+
+            token_types_names = ', '.join(f'{token_type.value}s' for token_type in self.token_types)
+            instrumentation.log(f"Pass 2: removing infrequent words and calculating {token_types_names} frequency ...")
+            frequent_tokens_mask = self.unigrams_frequency >= self.threshold_value
+            corpus_counts = {token_type: CorpusCounts(token_type=token_type, vocabulary=self.vocabulary)
+                             for token_type in self.token_types}
+            # Each spilled document list is dropped once counted, so no reference keeps its token ids memory-mapped
+            # when the spill folder is removed (a mapped file cannot be deleted on Windows)
+            for document_type in DocumentType:
+                self.__count_tokens__(
+                    document_type=document_type,
+                    encoded_document_list=spilled_document_lists.pop(document_type),
+                    frequent_tokens_mask=frequent_tokens_mask,
+                    corpus_counts=corpus_counts
+                )
+            instrumentation.log("Pass 2 finished. \n")
+
+        for token_type in self.token_types:
+            self.log_odd_ratios[token_type] = self.__calculate_log_odd_ratios__(corpus_counts=corpus_counts[token_type])
+
+        return self.log_odd_ratios
+
+    def __spill_clean_documents_with_stage__(
+            self,
+            document_type: DocumentType,
+            spill_folder: str
+    ) -> EncodedDocumentList:
+        with instrumentation.stage(
+                'spill_clean_documents',
+                component='streaming',
+                document_type=document_type.value
+        ) as stage_event:
+            encoded_document_list = self.__spill_clean_documents__(
+                document_type=document_type,
+                spill_folder=spill_folder
+            )
+            stage_event.items['articles'] = len(encoded_document_list)
+            stage_event.items['tokens'] = encoded_document_list.word_count
+
+        return encoded_document_list
+
+    def __spill_clean_documents__(self, document_type: DocumentType, spill_folder: str) -> EncodedDocumentList:
+        token_ids_file_path = os.path.join(spill_folder, f'{document_type.value}-token_ids.bin')
+        document_offsets = array('q', [0])
+        token_ids = array('i')
+
+        with open(token_ids_file_path, 'wb') as token_ids_file:
+            for document in self.hyperpartisan_documents_processor.stream_clean_documents(document_type=document_type):
+                token_ids.extend(map(self.vocabulary.add_token, document))
+                document_offsets.append(document_offsets[-1] + len(document))
+
+                if len(token_ids) >= self.chunk_size:
+                    self.__add_unigrams_frequency__(token_ids=token_ids)
+                    token_ids.tofile(token_ids_file)
+                    token_ids = array('i')
+
+            self.__add_unigrams_frequency__(token_ids=token_ids)
+            token_ids.tofile(token_ids_file)
+
+        # Token ids are read back memory-mapped, only the offsets (one per document) are kept in memory
+        return EncodedDocumentList(
+            token_ids=np.memmap(token_ids_file_path, dtype=np.intc, mode='r') if document_offsets[-1]
+            else np.empty(0, dtype=np.intc),
+            document_offsets=np.frombuffer(document_offsets, dtype=np.int64)
+        )
+
+    def __add_unigrams_frequency__(self, token_ids: array) -> None:
+        chunk_unigrams_frequency = np.bincount(np.frombuffer(token_ids, dtype=np.intc), minlength=len(self.vocabulary))
+        chunk_unigrams_frequency[:len(self.unigrams_frequency)] += self.unigrams_frequency
+        self.unigrams_frequency = chunk_unigrams_frequency
+
+    def __count_tokens__(
+            self,
+            document_type: DocumentType,
+            encoded_document_list: EncodedDocumentList,
+            frequent_tokens_mask: np.ndarray,
+            corpus_counts: dict[TokenType, CorpusCounts]
+    ) -> None:
+        ngram_counters = {
+            token_type: NGramCounter(
+                n=token_type.ngram_size,
+                vocabulary_size=len(self.vocabulary),
+                chunk_size=self.chunk_size,
+                max_partial_counts=self.max_partial_counts,
+                spill_folder_path=self.spill_folder_path
+            ) for token_type in self.token_types
+        }
+        word_count = 0
+
+        with instrumentation.stage(
+                'count_tokens',
+                component='streaming',
+                token_types=[token_type.value for token_type in self.token_types],
+                document_type=document_type.value
+        ) as stage_event:
+            for documents_chunk in instrumentation.progress_bar(
+                    encoded_document_list.iterate_chunks(chunk_size=self.chunk_size),
+                    description=f"Calculating tokens frequency for {document_type.value.upper()} ...",
+                    total=encoded_document_list.count_chunks(chunk_size=self.chunk_size)
+            ):
+                documents_chunk = InfrequentWordsFilter.filter_encoded_documents(
+                    encoded_document_list=documents_chunk,
+                    frequent_tokens_mask=frequent_tokens_mask
+                )
+                word_count += documents_chunk.word_count
+                for ngram_counter in ngram_counters.values():
+                    ngram_counter.add_documents(encoded_document_list=documents_chunk)
+            stage_event.items['articles'] = len(encoded_document_list)
+            stage_event.items['tokens'] = encoded_document_list.word_count
+
+        for token_type, ngram_counter in ngram_counters.items():
+            if document_type == DocumentType.HYPERPARTISAN:
+                corpus_counts[token_type].hyperpartisan_token_counts = ngram_counter.get_token_counts()
+                corpus_counts[token_type].hyperpartisan_word_count = word_count
+            else:
+                corpus_counts[token_type].non_hyperpartisan_token_counts = ngram_counter.get_token_counts()
+                corpus_counts[token_type].non_hyperpartisan_word_count = word_count
+
+    def __calculate_log_odd_ratios__(self, corpus_counts: CorpusCounts) -> LogOddRatios:
+        instrumentation.log(f"Calculating log-odd ratios on {corpus_counts.type.value}s (vectorized) ...")
+        corpus_counts.save(folder_path=CorpusCounts.get_folder_path(
+            pickle_data_folder_path=self.corpus_counts_pickle_data_folder_path,
+            token_type=corpus_counts.type
+        ))
+        log_odd_ratios_engine = LogOddRatiosEngine(
+            hyperpartisan_word_count=corpus_counts.hyperpartisan_word_count,
+            non_hyperpartisan_word_count=corpus_counts.non_hyperpartisan_word_count,
+            estimator=self.estimator,
+            smoothing_value=self.smoothing_value
+        )
+        log_odd_ratios = log_odd_ratios_engine.get_log_odd_ratios_from_token_counts(
+            token_type=corpus_counts.type,
+            hyperpartisan_token_counts=corpus_counts.hyperpartisan_token_counts,
+            non_hyperpartisan_token_counts=corpus_counts.non_hyperpartisan_token_counts,
+            vocabulary=self.vocabulary,
+            min_count=self.min_count
+        )
+        instrumentation.log("Log-odd ratios calculated successfully.")
+
+        self.log_odd_ratios_storage.save(log_odd_ratios=log_odd_ratios)
+        return log_odd_ratios
@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.encoded_corpus import ngram_keys
+
+
+@dataclass
+class TokenCounts:
+    # Sorted unique token keys (vocabulary ids, packed or wide n-gram keys) and the frequency of each one
+    keys: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    counts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_keys(cls, keys: np.ndarray) -> 'TokenCounts':
+        if not ngram_keys.is_wide(ngram_keys=keys):
+            unique_keys, counts = np.unique(keys, return_counts=True)
+            return cls(keys=unique_keys, counts=counts.astype(np.int64))
+
+        return cls.__add_up_sorted_keys__(
+            keys=keys[ngram_keys.argsort_ngram_keys(ngram_keys=keys)],
+            counts=np.ones(len(keys), dtype=np.int64)
+        )
+
+    @staticmethod
+    def merge(token_counts_list: list['TokenCounts']) -> 'TokenCounts':
+        # Empty counts are skipped, their (default) keys may not have the same type as the others
+        token_counts_list = [token_counts for token_counts in token_counts_list if len(token_counts)]
+        if not token_counts_list:
+            return TokenCounts()
+
+        keys = np.concatenate([token_counts.keys for token_counts in token_counts_list])
+        counts = np.concatenate([token_counts.counts for token_counts in token_counts_list])
+
+        # Sort all the keys and add up the counts of each run of equal keys
+        sorting_indexes = ngram_keys.argsort_ngram_keys(ngram_keys=keys)
+        return TokenCounts.__add_up_sorted_keys__(keys=keys[sorting_indexes], counts=counts[sorting_indexes])
+
+    @staticmethod
+    def merge_sorted(
+            token_counts_list: list['TokenCounts'],
+            min_count: int = 1,
+            block_size: int = 1_000_000
+    ) -> 'TokenCounts':
+        # K-way merge of sorted token counts (which may be memory-mapped), a block of keys of each one at a time, so
+        # only the merged result and the current blocks are held in memory. Keys whose merged count is lower than
+        # 'min_count' are discarded as soon as their count is complete
+        token_counts_list = [token_counts for token_counts in token_counts_list if len(token_counts)]
+        positions = [0] * len(token_counts_list)
+        merged_keys_blocks = []
+        merged_counts_blocks = []
+
+        while active_indexes := [index for index, token_counts in enumerate(token_counts_list)
+                                 if positions[index] < len(token_counts)]:
+            # Keys up to the smallest last key of the current blocks cannot appear in any later block
+            block_stops = {index: min(positions[index] + block_size, len(token_counts_list[index]))
+                           for index in active_indexes}
+            last_keys = np.concatenate([
+                token_counts_list[index].keys[block_stops[index] - 1:block_stops[index]] for index in active_indexes
+            ])
+            merge_bound = last_keys[ngram_keys.argsort_ngram_keys(ngram_keys=last_keys)[:1]]
+
+            blocks = []
+            for index in active_indexes:
+                token_counts = token_counts_list[index]
+                block_keys = token_counts.keys[positions[index]:block_stops[index]]
+                block_stop = positions[index] + int(ngram_keys.searchsorted_ngram_keys(
+                    sorted_ngram_keys=block_keys,
+                    query_ngram_keys=merge_bound,
+                    side='right'
+                )[0])
+                blocks.append(TokenCounts(
+                    keys=np.asarray(token_counts.keys[positions[index]:block_stop]),
+                    counts=np.asarray(token_counts.counts[positions[index]:block_stop])
+                ))
+                positions[index] = block_stop
+
+            merged_block = TokenCounts.merge(token_counts_list=blocks)
+            if min_count > 1:
+                frequent_tokens = merged_block.counts >= min_count
+                merged_block = TokenCounts(keys=merged_block.keys[frequent_tokens],
+                                           counts=merged_block.counts[frequent_tokens])
+            merged_keys_blocks.append(merged_block.keys)
+            merged_counts_blocks.append(merged_block.counts)
+
+        if not merged_keys_blocks:
+            return TokenCounts()
+        return TokenCounts(keys=np.concatenate(merged_keys_blocks), counts=np.concatenate(merged_counts_blocks))
+
+    @staticmethod
+    def __add_up_sorted_keys__(keys: np.ndarray, counts: np.ndarray) -> 'TokenCounts':
+        if not len(keys):
+            return TokenCounts(keys=keys, counts=counts)
+
+        run_starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        return TokenCounts(keys=keys[run_starts], counts=np.add.reduceat(counts, run_starts))
@@ -0,0 +1,247 @@
+import contextlib
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+
+from src.constant_values import constants
+from src.constant_values.enums import LogOddRatiosEstimator, ScoreAggregation, StorageFormat, TokenType
+from src.encoded_corpus import ngram_keys
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.log_odd_ratios.ColumnarLogOddRatios import ColumnarLogOddRatios
+from src.log_odd_ratios.LogOddRatiosAnalyzer import LogOddRatiosAnalyzer
+from src.utils import instrumentation
+
+
+class HyperpartisanDocumentScorer:
+
+    def __init__(
+            self,
+            token_types: Iterable[TokenType] = (TokenType.UNIGRAM, TokenType.BIGRAM),
+            pickle_data_folder_path=Path('../data/pickle'),
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            aggregation: ScoreAggregation = ScoreAggregation.MEAN,
+            document_cleaner: DocumentCleaner | None = None,
+            number_of_workers: int = 1,
+            chunksize: int = 64,
+            log_odd_ratios_analyzers: dict[TokenType, LogOddRatiosAnalyzer] | None = None
+    ) -> None:
+        self.token_types = sorted(set(token_types), key=lambda token_type: token_type.ngram_size)
+        self.aggregation = aggregation
+        # Articles must be cleaned exactly like the corpus the log-odd ratios were calculated on
+        self.document_cleaner = document_cleaner or DocumentCleaner()
+        self.number_of_workers = number_of_workers
+        self.chunksize = chunksize
+        # Analyzers that are already loaded (e.g. to answer top-k queries) are reused instead of loaded again
+        self.log_odd_ratios_analyzers = dict(log_odd_ratios_analyzers or {})
+
+        # Every token type is encoded with the same vocabulary, so each article is only encoded once. The n-grams of the
+        # corpus were formed once its infrequent words were removed, so words missing from the unigram log-odd ratios
+        # (infinite ones included) are removed from the articles before their n-grams are formed
+        self.vocabulary = Vocabulary()
+        if any(token_type.ngram_size > 1 for token_type in self.token_types):
+            self.__add_corpus_vocabulary__(
+                pickle_data_folder_path=pickle_data_folder_path,
+                storage_format=storage_format,
+                estimator=estimator
+            )
+        token_ids_and_scores = {
+            token_type: self.__load_token_ids_and_scores__(
+                token_type=token_type,
+                pickle_data_folder_path=pickle_data_folder_path,
+                storage_format=storage_format,
+                estimator=estimator
+            ) for token_type in self.token_types
+        }
+
+        # Words of the vocabulary without a finite log-odd ratio have no score
+        self.unigram_scores = np.zeros(len(self.vocabulary), dtype=np.float64)
+        self.unigram_known = np.zeros(len(self.vocabulary), dtype=bool)
+        self.ngram_keys: dict[TokenType, np.ndarray] = {}
+        self.ngram_scores: dict[TokenType, np.ndarray] = {}
+        for token_type, (token_ids, scores) in token_ids_and_scores.items():
+            if token_type.ngram_size == 1:
+                self.unigram_scores[token_ids] = scores
+                self.unigram_known[token_ids] = True
+            else:
+                # N-grams cannot be indexed by id, they are looked up by binary search on their sorted keys
+                wide_keys = ngram_keys.needs_wide_ngram_keys(
+                    n=token_type.ngram_size,
+                    vocabulary_size=len(self.unigram_scores)
+                )
+                keys = ngram_keys.pack_ngram_keys(token_ids_columns=list(token_ids.T.astype(np.int64)), wide=wide_keys)
+                sorted_indexes = ngram_keys.argsort_ngram_keys(ngram_keys=keys)
+                self.ngram_keys[token_type] = keys[sorted_indexes]
+                self.ngram_scores[token_type] = scores[sorted_indexes]
+
+    def __add_corpus_vocabulary__(
+            self,
+            pickle_data_folder_path: str | Path,
+            storage_format: StorageFormat,
+            estimator: LogOddRatiosEstimator
+    ) -> None:
+        # The unigram analyzer is kept when unigrams are also scored, so their log-odd ratios are only loaded once
+        log_odd_ratios_analyzer = self.log_odd_ratios_analyzers.get(TokenType.UNIGRAM) or LogOddRatiosAnalyzer(
+            token_type=TokenType.UNIGRAM,
+            pickle_data_folder_path=pickle_data_folder_path,
+            build_sorted_index=False,
+            storage_format=storage_format,
+            estimator=estimator if TokenType.UNIGRAM in self.token_types else LogOddRatiosEstimator.RAW
+        )
+        if TokenType.UNIGRAM in self.token_types:
+            self.log_odd_ratios_analyzers[TokenType.UNIGRAM] = log_odd_ratios_analyzer
+
+        log_odd_ratios = log_odd_ratios_analyzer.log_odd_ratios
+        if isinstance(log_odd_ratios, ColumnarLogOddRatios):
+            tokens = log_odd_ratios.get_tokens(indexes=np.arange(len(log_odd_ratios)))
+        else:
+            tokens = log_odd_ratios.get_tokens()
+        for token in tokens:
+            self.vocabulary.add_token(token=token)
+
+    def __load_token_ids_and_scores__(
+            self,
+            token_type: TokenType,
+            pickle_data_folder_path: str | Path,
+            storage_format: StorageFormat,
+            estimator: LogOddRatiosEstimator
+    ) -> tuple[np.ndarray, np.ndarray]:
+        log_odd_ratios_analyzer = self.log_odd_ratios_analyzers.get(token_type) or LogOddRatiosAnalyzer(
+            token_type=token_type,
+            pickle_data_folder_path=pickle_data_folder_path,
+            build_sorted_index=False,
+            storage_format=storage_format,
+            estimator=estimator
+        )
+        scores = np.asarray(log_odd_ratios_analyzer.scores, dtype=np.float64)
+
+        # Infinite log-odd ratios (tokens seen on a single document group) would outweigh any other token
+        finite_indexes = np.flatnonzero(np.isfinite(scores))
+        log_odd_ratios = log_odd_ratios_analyzer.log_odd_ratios
+        if isinstance(log_odd_ratios, ColumnarLogOddRatios):
+            tokens = log_odd_ratios.get_tokens(indexes=finite_indexes)
+        else:
+            all_tokens = log_odd_ratios.get_tokens()
+            tokens = [all_tokens[index] for index in finite_indexes.tolist()]
+
+        add_token = self.vocabulary.add_token
+        if token_type.ngram_size == 1:
+            token_ids = np.fromiter(map(add_token, tokens), dtype=np.int64, count=len(tokens))
+        else:
+            token_ids = np.array(
+                [[add_token(token) for token in ngram] for ngram in tokens],
+                dtype=np.int64
+            ).reshape(len(tokens), token_type.ngram_size)
+
+        return token_ids, scores[finite_indexes]
+
+    def score_documents(self, documents: Iterable[str], batch_size: int = 1024) -> np.ndarray:
+        document_scores = list(self.score_documents_in_batches(documents=documents, batch_size=batch_size))
+        if not document_scores:
+            return np.zeros(0, dtype=np.float64)
+
+        return np.concatenate(document_scores)
+
+    def score_documents_in_batches(self, documents: Iterable[str], batch_size: int = 1024) -> Iterator[np.ndarray]:
+        # Articles are cleaned one by one (in parallel with 'imap'), but their tokens are scored a batch at a time
+        with contextlib.ExitStack() as pool_stack:
+            if self.number_of_workers > 1:
+                pool = pool_stack.enter_context(Pool(processes=self.number_of_workers))
+                clean_documents = pool.imap(self.document_cleaner.clean_document, documents, chunksize=self.chunksize)
+            else:
+                clean_documents = map(self.document_cleaner.clean_document, documents)
+
+            while clean_documents_batch := list(islice(clean_documents, batch_size)):
+                yield self.score_clean_documents(document_list=clean_documents_batch)
+
+    def score_clean_documents(self, document_list: list[list[str]]) -> np.ndarray:
+        with instrumentation.stage(
+                'score_documents',
+                component='scorer',
+                token_types=[token_type.value for token_type in self.token_types],
+                aggregation=self.aggregation.value
+        ) as stage_event:
+            encoded_document_list = self.vocabulary.encode_documents(
+                document_list=document_list,
+                add_missing_tokens=False
+            )
+            document_scores = self.__score_encoded_documents__(encoded_document_list=encoded_document_list)
+            stage_event.items['articles'] = len(encoded_document_list)
+            stage_event.items['tokens'] = encoded_document_list.word_count
+
+        return document_scores
+
+    def __score_encoded_documents__(self, encoded_document_list: EncodedDocumentList) -> np.ndarray:
+        number_of_documents = len(encoded_document_list)
+        known_tokens = encoded_document_list.token_ids != constants.UNKNOWN_TOKEN_ID
+        token_ids = encoded_document_list.token_ids[known_tokens].astype(np.int64)
+        document_indexes = np.repeat(
+            np.arange(number_of_documents),
+            np.diff(encoded_document_list.document_offsets)
+        )[known_tokens]
+
+        scores_sum = np.zeros(number_of_documents, dtype=np.float64)
+        scored_tokens_count = np.zeros(number_of_documents, dtype=np.float64)
+        for token_type in self.token_types:
+            if token_type.ngram_size == 1:
+                token_scores = self.unigram_scores[token_ids]
+                token_known = self.unigram_known[token_ids]
+                token_document_indexes = document_indexes
+            else:
+                token_scores, token_known, token_document_indexes = self.__look_up_ngrams__(
+                    token_type=token_type,
+                    token_ids=token_ids,
+                    document_indexes=document_indexes
+                )
+            scores_sum += np.bincount(token_document_indexes, weights=token_scores, minlength=number_of_documents)
+            scored_tokens_count += np.bincount(
+                token_document_indexes,
+                weights=token_known,
+                minlength=number_of_documents
+            )
+
+        match self.aggregation:
+            case ScoreAggregation.SUM:
+                return scores_sum
+            case ScoreAggregation.MEAN:
+                # Articles without any scored token are neutral
+                return np.divide(
+                    scores_sum,
+                    scored_tokens_count,
+                    out=np.zeros(number_of_documents, dtype=np.float64),
+                    where=scored_tokens_count > 0
+                )
+
+    def __look_up_ngrams__(
+            self,
+            token_type: TokenType,
+            token_ids: np.ndarray,
+            document_indexes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = token_type.ngram_size
+        keys = self.ngram_keys[token_type]
+        scores = self.ngram_scores[token_type]
+
+        # Only the n-grams whose first and last tokens belong to the same document are kept
+        ngram_starts = np.flatnonzero(document_indexes[:len(document_indexes) - n + 1] == document_indexes[n - 1:])
+        query_keys = ngram_keys.pack_ngram_keys(
+            token_ids_columns=[token_ids[ngram_starts + position] for position in range(n)],
+            wide=ngram_keys.is_wide(ngram_keys=keys)
+        )
+
+        if len(keys) == 0:
+            return np.zeros(len(query_keys)), np.zeros(len(query_keys), dtype=bool), document_indexes[ngram_starts]
+
+        key_indexes = np.minimum(
+            ngram_keys.searchsorted_ngram_keys(sorted_ngram_keys=keys, query_ngram_keys=query_keys),
+            len(keys) - 1
+        )
+        ngram_known = keys[key_indexes] == query_keys
+        ngram_scores = np.where(ngram_known, scores[key_indexes], 0.0)
+
+        return ngram_scores, ngram_known, document_indexes[ngram_starts]
@@ -0,0 +1,88 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+
+class MicroBatcher:
+
+    def __init__(
+            self,
+            process_batch: Callable[[list], list],
+            max_batch_size: int = 256,
+            max_batch_delay: float = 0.0,
+            executor: Executor | None = None
+    ) -> None:
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+
+        # Batches run on the event loop by default: scoring holds the GIL, so a thread would only add switches
+        # (requests that arrive meanwhile wait in the socket buffers, and are all taken by the next batch)
+        self.executor = executor
+        self.queue: asyncio.Queue[tuple[list, asyncio.Future]] | None = None
+        self.worker_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.worker_task = asyncio.create_task(self.__process_requests__())
+
+    async def stop(self) -> None:
+        if self.worker_task is not None:
+            self.worker_task.cancel()
+            try:
+                await self.worker_task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, items: list) -> list:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((items, future))
+        return await future
+
+    async def __process_requests__(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = await self.__get_batch_requests__()
+            items = [item for request_items, _ in requests for item in request_items]
+
+            try:
+                if self.executor is None:
+                    results = self.process_batch(items)
+                else:
+                    results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as exception:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(exception)
+                continue
+
+            # Each request gets back the results of its own items, in the same order
+            start = 0
+            for request_items, future in requests:
+                if not future.done():
+                    future.set_result(results[start:start + len(request_items)])
+                start += len(request_items)
+
+    async def __get_batch_requests__(self) -> list[tuple[list, asyncio.Future]]:
+        # Requests queued while the previous batch was running are all taken, optionally waiting for more of them
+        requests = [await self.queue.get()]
+        batch_size = len(requests[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_batch_delay
+
+        while batch_size < self.max_batch_size:
+            if self.queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    # Only an alias of the built-in 'TimeoutError' from Python 3.11
+                    break
+            else:
+                request = self.queue.get_nowait()
+
+            requests.append(request)
+            batch_size += len(request[0])
+
+        return requests
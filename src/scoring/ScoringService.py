@@ -0,0 +1,161 @@
+import asyncio
+import json
+import math
+from collections.abc import Iterable
+from http import HTTPStatus
+from pathlib import Path
+
+from src.constant_values.enums import DocumentType, LogOddRatiosEstimator, ScoreAggregation, StorageFormat, TokenType
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.log_odd_ratios.LogOddRatiosAnalyzer import LogOddRatiosAnalyzer
+from src.scoring.HyperpartisanDocumentScorer import HyperpartisanDocumentScorer
+from src.scoring.MicroBatcher import MicroBatcher
+from src.utils import instrumentation
+
+
+class ScoringService:
+
+    def __init__(
+            self,
+            token_types: Iterable[TokenType] = (TokenType.UNIGRAM, TokenType.BIGRAM),
+            pickle_data_folder_path=Path('../data/pickle'),
+            storage_format: StorageFormat = StorageFormat.PICKLE,
+            estimator: LogOddRatiosEstimator = LogOddRatiosEstimator.RAW,
+            aggregation: ScoreAggregation = ScoreAggregation.MEAN,
+            document_cleaner: DocumentCleaner | None = None,
+            max_batch_size: int = 256,
+            max_batch_delay: float = 0.0
+    ) -> None:
+        # The log-odd ratios are loaded once, and shared by the top-k queries and the document scorer
+        self.log_odd_ratios_analyzers = {
+            token_type: LogOddRatiosAnalyzer(
+                token_type=token_type,
+                pickle_data_folder_path=pickle_data_folder_path,
+                storage_format=storage_format,
+                estimator=estimator
+            ) for token_type in token_types
+        }
+        self.document_scorer = HyperpartisanDocumentScorer(
+            token_types=self.log_odd_ratios_analyzers.keys(),
+            pickle_data_folder_path=pickle_data_folder_path,
+            storage_format=storage_format,
+            estimator=estimator,
+            aggregation=aggregation,
+            document_cleaner=document_cleaner,
+            log_odd_ratios_analyzers=self.log_odd_ratios_analyzers
+        )
+        self.document_scorer.document_cleaner.warm_up()
+        self.micro_batcher = MicroBatcher(
+            process_batch=self.__score_articles__,
+            max_batch_size=max_batch_size,
+            max_batch_delay=max_batch_delay
+        )
+
+    def __score_articles__(self, articles: list[str]) -> list[float]:
+        return self.document_scorer.score_documents(documents=articles, batch_size=len(articles) or 1).tolist()
+
+    async def serve(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 8000,
+            unix_socket_path: str | Path | None = None
+    ) -> None:
+        await self.micro_batcher.start()
+        if unix_socket_path is not None:
+            server = await asyncio.start_unix_server(self.__handle_connection__, path=unix_socket_path)
+            instrumentation.log(f'Scoring service listening on {unix_socket_path} ...')
+        else:
+            server = await asyncio.start_server(self.__handle_connection__, host=host, port=port)
+            instrumentation.log(f'Scoring service listening on http://{host}:{port} ...')
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.micro_batcher.stop()
+
+    async def __handle_connection__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Minimal HTTP/1.1 with keep-alive: JSON bodies with a 'Content-Length' header, no chunked encoding
+        try:
+            while True:
+                try:
+                    request_head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+
+                request_line, *header_lines = request_head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                method, path, _ = request_line.split(' ', 2)
+                headers = {
+                    header_name.strip().lower(): header_value.strip()
+                    for header_name, header_value in (header_line.split(':', 1) for header_line in header_lines)
+                }
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, response = await self.__handle_request__(method=method, path=path, body=body)
+                response_body = json.dumps(response).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(response_body)}\r\n\r\n'.encode('latin-1') + response_body
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # The client went away or sent a malformed request, the connection is dropped
+            pass
+        finally:
+            writer.close()
+
+    async def __handle_request__(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict]:
+        try:
+            # Every endpoint expects a JSON object as body (or no body at all)
+            request = json.loads(body) if body else {}
+            if not isinstance(request, dict):
+                raise ValueError('The request body must be a JSON object')
+
+            match method, path:
+                case 'GET', '/health':
+                    return HTTPStatus.OK, {
+                        'status': 'ok',
+                        'token_types': [token_type.value for token_type in self.log_odd_ratios_analyzers]
+                    }
+                case 'POST', '/score':
+                    articles = request['articles']
+                    if not isinstance(articles, list) or not all(isinstance(article, str) for article in articles):
+                        raise ValueError("'articles' must be a list of strings")
+                    return HTTPStatus.OK, {'scores': await self.micro_batcher.submit(items=articles)}
+                case 'POST', '/top':
+                    return HTTPStatus.OK, self.__get_most_relevant_words__(request=request)
+                case _:
+                    return HTTPStatus.NOT_FOUND, {'error': f'Unknown endpoint: {method} {path}'}
+        except (KeyError, TypeError, ValueError) as error:
+            return HTTPStatus.BAD_REQUEST, {'error': f'Invalid request: {error!r}'}
+        except Exception as error:
+            # Any other error comes from the service itself, the connection stays open for the next requests
+            instrumentation.log(f'Error while handling {method} {path}: {error!r}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Internal error: {error!r}'}
+
+    def __get_most_relevant_words__(self, request: dict) -> dict:
+        token_type = TokenType(request.get('token_type', TokenType.UNIGRAM.value))
+        document_type = DocumentType(request.get('document_type', DocumentType.HYPERPARTISAN.value))
+        if token_type not in self.log_odd_ratios_analyzers:
+            raise ValueError(f'The {token_type.value}s log-odd ratios are not loaded')
+
+        most_relevant_words = self.log_odd_ratios_analyzers[token_type].get_most_relevant_words(
+            document_type=document_type,
+            amount=int(request.get('amount', 50)),
+            infinite_values=bool(request.get('infinite_values', True))
+        )
+
+        # N-grams are returned as lists of tokens, infinite scores as the strings 'inf' and '-inf' (standard JSON has
+        # no infinity)
+        return {
+            'token_type': token_type.value,
+            'document_type': document_type.value,
+            'tokens': [
+                (token, score if math.isfinite(score) else str(score))
+                for token, score in most_relevant_words.items()
+            ]
+        }
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.benchmarks.SyntheticCorpusGenerator import SyntheticCorpusGenerator
+from src.constant_values.enums import DocumentType
+
+
+class ScoringServiceClient:
+
+    def __init__(self, host: str, port: int, unix_socket_path: str | Path | None = None) -> None:
+        self.host = host
+        self.port = port
+        self.unix_socket_path = unix_socket_path
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        if self.unix_socket_path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(path=self.unix_socket_path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host=self.host, port=self.port)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def send(self, method: str, path: str, request: dict | None = None) -> tuple[int, dict]:
+        request_body = json.dumps(request).encode('utf-8') if request is not None else b''
+        self.writer.write(
+            f'{method} {path} HTTP/1.1\r\n'
+            f'Host: {self.host}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(request_body)}\r\n\r\n'.encode('latin-1') + request_body
+        )
+        await self.writer.drain()
+
+        status_line, *header_lines = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        content_length = next(
+            int(header_line.split(':', 1)[1]) for header_line in header_lines
+            if header_line.lower().startswith('content-length:')
+        )
+        response_body = await self.reader.readexactly(content_length)
+
+        return int(status_line.split(' ', 2)[1]), json.loads(response_body)
+
+
+def get_requests(
+        number_of_requests: int,
+        articles_per_request: int,
+        top_k_proportion: float,
+        articles: list[str],
+        token_types: list[str],
+        seed: int
+) -> list[tuple[str, dict]]:
+    random_generator = random.Random(seed)
+    requests = []
+    for _ in range(number_of_requests):
+        if random_generator.random() < top_k_proportion:
+            requests.append(('/top', {
+                'token_type': random_generator.choice(token_types),
+                'document_type': random_generator.choice(list(DocumentType)).value,
+                'amount': 50,
+                'infinite_values': random_generator.random() < 0.5
+            }))
+        else:
+            requests.append(('/score', {'articles': random_generator.sample(articles, k=articles_per_request)}))
+
+    return requests
+
+
+async def run_client(
+        client: ScoringServiceClient,
+        requests: list[tuple[str, dict]],
+        latencies: dict[str, list[float]]
+) -> None:
+    for path, request in requests:
+        start_time = time.perf_counter()
+        status, response = await client.send(method='POST', path=path, request=request)
+        latency = time.perf_counter() - start_time
+        if status != 200:
+            raise RuntimeError(f'{path} request failed with status {status}: {response}')
+        latencies[path].append(latency)
+
+
+async def run_requests(
+        clients: list[ScoringServiceClient],
+        requests: list[tuple[str, dict]]
+) -> tuple[dict[str, list[float]], float]:
+    # Every client sends its requests one after another, so there are as many requests in flight as clients
+    latencies = {'/score': [], '/top': []}
+    start_time = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(client=client, requests=requests[client_index::len(clients)], latencies=latencies)
+        for client_index, client in enumerate(clients)
+    ))
+
+    return latencies, time.perf_counter() - start_time
+
+
+async def run_load_test(arguments: argparse.Namespace) -> dict:
+    if arguments.articles_file is not None:
+        # One article per line
+        with open(arguments.articles_file, encoding='utf-8', mode='r') as articles_file:
+            articles = [line.strip() for line in articles_file if line.strip()]
+    else:
+        synthetic_corpus_generator = SyntheticCorpusGenerator(number_of_articles=0, seed=arguments.seed)
+        articles = [synthetic_corpus_generator.generate_article_text() for _ in range(1_000)]
+
+    clients = [
+        ScoringServiceClient(host=arguments.host, port=arguments.port, unix_socket_path=arguments.unix_socket)
+        for _ in range(arguments.concurrency)
+    ]
+    await asyncio.gather(*(client.connect() for client in clients))
+    token_types = arguments.token_types or (await clients[0].send(method='GET', path='/health'))[1]['token_types']
+
+    requests = get_requests(
+        number_of_requests=arguments.warmup_requests + arguments.requests,
+        articles_per_request=arguments.articles_per_request,
+        top_k_proportion=arguments.top_k_proportion,
+        articles=articles,
+        token_types=token_types,
+        seed=arguments.seed
+    )
+    await run_requests(clients=clients, requests=requests[:arguments.warmup_requests])
+    latencies, wall_time = await run_requests(clients=clients, requests=requests[arguments.warmup_requests:])
+    await asyncio.gather(*(client.close() for client in clients))
+
+    all_latencies = latencies['/score'] + latencies['/top']
+    return {
+        'configuration': {
+            'concurrency': arguments.concurrency,
+            'requests': arguments.requests,
+            'articles_per_request': arguments.articles_per_request,
+            'top_k_proportion': arguments.top_k_proportion
+        },
+        'wall_time': wall_time,
+        'requests_per_second': len(all_latencies) / wall_time,
+        'articles_per_second': len(latencies['/score']) * arguments.articles_per_request / wall_time,
+        'latencies': {
+            path: get_latency_percentiles(latencies=path_latencies)
+            for path, path_latencies in [('all', all_latencies), *latencies.items()] if path_latencies
+        }
+    }
+
+
+def get_latency_percentiles(latencies: list[float]) -> dict[str, float]:
+    # Latencies are reported in milliseconds
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'count': len(latencies_ms),
+        'p50': float(np.percentile(latencies_ms, 50)),
+        'p90': float(np.percentile(latencies_ms, 90)),
+        'p99': float(np.percentile(latencies_ms, 99)),
+        'max': float(latencies_ms.max())
+    }
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description='Measure the latency of a running scoring service')
+    argument_parser.add_argument('--host', default='127.0.0.1')
+    argument_parser.add_argument('--port', type=int, default=8000)
+    argument_parser.add_argument('--unix-socket', type=Path, default=None)
+    argument_parser.add_argument('--concurrency', type=int, default=4, help='number of concurrent connections')
+    argument_parser.add_argument('--requests', type=int, default=5_000)
+    argument_parser.add_argument('--warmup-requests', type=int, default=200)
+    argument_parser.add_argument('--articles-per-request', type=int, default=1)
+    argument_parser.add_argument('--top-k-proportion', type=float, default=0.2,
+                                 help='proportion of top-k queries (the others are scoring requests)')
+    argument_parser.add_argument('--token-types', nargs='+', default=None,
+                                 help='token types of the top-k queries (every loaded one by default)')
+    argument_parser.add_argument('--articles-file', type=Path, default=None,
+                                 help='articles to score, one per line (synthetic articles by default)')
+    argument_parser.add_argument('--max-p99-ms', type=float, default=None,
+                                 help='exit with an error when the p99 latency is higher')
+    argument_parser.add_argument('--output-file', type=Path, default=None, help='JSON results file')
+    argument_parser.add_argument('--seed', type=int, default=0)
+    arguments = argument_parser.parse_args()
+
+    results = asyncio.run(run_load_test(arguments=arguments))
+
+    print(f'{results["requests_per_second"]:.0f} requests/s, {results["articles_per_second"]:.0f} articles/s')
+    for path, percentiles in results['latencies'].items():
+        print(f'{path:<8} {percentiles["count"]:>8} requests   p50 {percentiles["p50"]:7.2f} ms   '
+              f'p90 {percentiles["p90"]:7.2f} ms   p99 {percentiles["p99"]:7.2f} ms   max {percentiles["max"]:7.2f} ms')
+
+    if arguments.output_file is not None:
+        with open(arguments.output_file, encoding='utf-8', mode='w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if arguments.max_p99_ms is not None and results['latencies']['all']['p99'] > arguments.max_p99_ms:
+        print(f'The p99 latency is higher than {arguments.max_p99_ms} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from src.constant_values.enums import LogOddRatiosEstimator, ScoreAggregation, StopwordsSource, StorageFormat, TokenType
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.scoring.ScoringService import ScoringService
+from src.utils import instrumentation
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description='Serve top-k queries and article scores over HTTP')
+    argument_parser.add_argument('--host', default='127.0.0.1')
+    argument_parser.add_argument('--port', type=int, default=8000)
+    argument_parser.add_argument('--unix-socket', type=Path, default=None,
+                                 help='listen on a Unix socket instead of a TCP port')
+    argument_parser.add_argument('--pickle-data-folder', type=Path, default=Path('../data/pickle'))
+    argument_parser.add_argument('--token-types', nargs='+', default=[TokenType.UNIGRAM.value, TokenType.BIGRAM.value],
+                                 choices=[token_type.value for token_type in TokenType])
+    argument_parser.add_argument('--storage-format', default=StorageFormat.PICKLE.value,
+                                 choices=[storage_format.value for storage_format in StorageFormat])
+    argument_parser.add_argument('--estimator', default=LogOddRatiosEstimator.RAW.value,
+                                 choices=[estimator.value for estimator in LogOddRatiosEstimator])
+    argument_parser.add_argument('--aggregation', default=ScoreAggregation.MEAN.value,
+                                 choices=[aggregation.value for aggregation in ScoreAggregation])
+    argument_parser.add_argument('--stopwords-source', default=StopwordsSource.NLTK.value,
+                                 choices=[stopwords_source.value for stopwords_source in StopwordsSource])
+    argument_parser.add_argument('--stopwords-file', type=Path, default=None)
+    argument_parser.add_argument('--max-batch-size', type=int, default=256,
+                                 help='maximum number of articles scored together')
+    argument_parser.add_argument('--max-batch-delay', type=float, default=0.0,
+                                 help='seconds to wait for more requests before scoring a batch')
+    argument_parser.add_argument('--events-file', type=Path, default=None, help='JSON lines file for stage events')
+    argument_parser.add_argument('--verbose', action='store_true', help='log every query and batch')
+    arguments = argument_parser.parse_args()
+
+    # Loading messages are shown, but the messages of each query are not (unless the service is verbose)
+    instrumentation.configure(events_file_path=arguments.events_file)
+    scoring_service = ScoringService(
+        token_types=[TokenType(token_type) for token_type in arguments.token_types],
+        pickle_data_folder_path=arguments.pickle_data_folder,
+        storage_format=StorageFormat(arguments.storage_format),
+        estimator=LogOddRatiosEstimator(arguments.estimator),
+        aggregation=ScoreAggregation(arguments.aggregation),
+        document_cleaner=DocumentCleaner(
+            stopwords_source=StopwordsSource(arguments.stopwords_source),
+            stopwords_file_path=arguments.stopwords_file
+        ),
+        max_batch_size=arguments.max_batch_size,
+        max_batch_delay=arguments.max_batch_delay
+    )
+    instrumentation.configure(quiet=not arguments.verbose, events_file_path=arguments.events_file)
+
+    try:
+        asyncio.run(scoring_service.serve(
+            host=arguments.host,
+            port=arguments.port,
+            unix_socket_path=arguments.unix_socket
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from src.encoded_corpus.EncodedDocumentList import EncodedDocumentList
+from src.encoded_corpus.Vocabulary import Vocabulary
+
+
+class CacheManifest:
+
+    def __init__(self, manifest_file_path: str | Path = Path('../data/manifest.json')) -> None:
+        self.manifest_file_path = manifest_file_path
+
+        # 'files' caches the content hash of each input file (recomputed only when its size or mtime change)
+        # 'artifacts' stores the input hashes and the processing parameters each artifact was built from
+        self.files: dict[str, dict] = {}
+        self.artifacts: dict[str, dict] = {}
+        if os.path.exists(self.manifest_file_path):
+            with open(self.manifest_file_path, encoding='utf-8', mode='r') as manifest_file:
+                manifest = json.load(manifest_file)
+            self.files = manifest['files']
+            self.artifacts = manifest['artifacts']
+
+    def is_up_to_date(
+            self,
+            artifact_path: str | Path,
+            input_hashes: dict[str, str],
+            parameters: dict | None = None
+    ) -> bool:
+        artifact = self.artifacts.get(os.path.abspath(artifact_path))
+        if artifact is None or not os.path.exists(artifact_path):
+            return False
+
+        return artifact['inputs'] == input_hashes and artifact['parameters'] == self.__normalize__(parameters or {})
+
+    def get_input_hashes(self, artifact_path: str | Path) -> dict[str, str]:
+        artifact = self.artifacts.get(os.path.abspath(artifact_path))
+        return artifact['inputs'] if artifact is not None else {}
+
+    def record(self, artifact_path: str | Path, input_hashes: dict[str, str], parameters: dict | None = None) -> None:
+        self.artifacts[os.path.abspath(artifact_path)] = {
+            'inputs': input_hashes,
+            'parameters': self.__normalize__(parameters or {})
+        }
+        self.__save__()
+
+    def get_files_hashes(self, file_paths: Iterable[str | Path]) -> dict[str, str]:
+        return {os.path.basename(file_path): self.get_file_hash(file_path=file_path) for file_path in file_paths}
+
+    def get_file_hash(self, file_path: str | Path) -> str:
+        file_stats = os.stat(file_path)
+        cached_file = self.files.get(os.path.abspath(file_path))
+        if cached_file and cached_file['size'] == file_stats.st_size and cached_file['mtime'] == file_stats.st_mtime_ns:
+            return cached_file['sha256']
+
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                file_hash.update(block)
+
+        self.files[os.path.abspath(file_path)] = {
+            'size': file_stats.st_size,
+            'mtime': file_stats.st_mtime_ns,
+            'sha256': file_hash.hexdigest()
+        }
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def get_derived_hash(input_hashes: dict[str, str], parameters: dict | None = None) -> str:
+        # Hash of an intermediate result, identified by the inputs and the parameters it is derived from
+        return hashlib.sha256(json.dumps(
+            {'inputs': input_hashes, 'parameters': parameters or {}},
+            sort_keys=True
+        ).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_documents_hash(
+            document_list: list[list[str]] | EncodedDocumentList,
+            vocabulary: Vocabulary | None = None,
+            block_size: int = 1024 * 1024
+    ) -> str:
+        # Documents are hashed a block at a time, so memory-mapped arrays are never copied as a whole
+        documents_hash = hashlib.sha256()
+
+        if isinstance(document_list, EncodedDocumentList):
+            for array in [document_list.token_ids, document_list.document_offsets]:
+                for start in range(0, len(array), block_size):
+                    documents_hash.update(memoryview(np.ascontiguousarray(array[start:start + block_size])))
+            for start in range(0, len(vocabulary.tokens), block_size):
+                documents_hash.update('\n'.join(vocabulary.tokens[start:start + block_size]).encode('utf-8'))
+                documents_hash.update(b'\n')
+        else:
+            for document in document_list:
+                documents_hash.update(' '.join(document).encode('utf-8'))
+                documents_hash.update(b'\n')
+
+        return documents_hash.hexdigest()
+
+    @staticmethod
+    def __normalize__(parameters: dict) -> dict:
+        # Parameters are compared as they are stored in JSON (e.g. tuples become lists)
+        return json.loads(json.dumps(parameters))
+
+    def __save__(self) -> None:
+        manifest_folder_path = os.path.dirname(os.path.abspath(self.manifest_file_path))
+        if not os.path.exists(manifest_folder_path):
+            os.makedirs(manifest_folder_path)
+
+        temporary_manifest_file_path = f'{self.manifest_file_path}.tmp'
+        with open(temporary_manifest_file_path, encoding='utf-8', mode='w') as manifest_file:
+            json.dump({'files': self.files, 'artifacts': self.artifacts}, manifest_file, indent=2)
+        os.replace(temporary_manifest_file_path, self.manifest_file_path)
@@ -0,0 +1,117 @@
+import contextlib
+import json
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+if TYPE_CHECKING:
+    from tqdm import tqdm
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the peak RSS is then not reported
+    resource = None
+
+
+@dataclass
+class StageEvent:
+    stage: str
+    component: str
+    attributes: dict = field(default_factory=dict)
+    items: dict[str, int] = field(default_factory=dict)
+    cache: str | None = None
+    status: str = 'ok'
+    started_at: str = ''
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss: int | None = None
+    throughput: dict[str, float] = field(default_factory=dict)
+
+
+# Module-wide settings, shared by every component of the pipeline (only the latest events are kept in memory)
+quiet_mode = False
+log_output: TextIO | None = None
+events_output: TextIO | None = None
+events_file: TextIO | None = None
+events: deque[StageEvent] = deque(maxlen=10_000)
+
+
+def configure(
+        quiet: bool = False,
+        log_stream: TextIO | None = None,
+        events_file_path: str | Path | None = None,
+        events_stream: TextIO | None = None
+) -> None:
+    # Messages are printed to the log stream (standard output by default). Events are written as JSON lines to a
+    # file (appended) or a stream
+    global quiet_mode, log_output, events_output, events_file
+    quiet_mode = quiet
+    log_output = log_stream
+    if events_file is not None:
+        events_file.close()
+
+    events_file = open(events_file_path, encoding='utf-8', mode='a') if events_file_path else None
+    events_output = events_file or events_stream
+    events.clear()
+
+
+def log(message: str = '') -> None:
+    if not quiet_mode:
+        print(message, file=log_output)
+
+
+def progress_bar(iterable: Iterable | None = None, description: str = '', total: int | None = None) -> 'tqdm':
+    # 'tqdm' is only imported by the stages that show progress, which keeps query commands quick to start
+    from tqdm import tqdm
+
+    return tqdm(iterable, desc=description, total=total, disable=quiet_mode)
+
+
+@contextlib.contextmanager
+def stage(stage_name: str, component: str, **attributes) -> Iterator[StageEvent]:
+    # The stage sets 'items' (e.g. articles, tokens) and 'cache' ('hit' or 'miss') on the yielded event
+    stage_event = StageEvent(
+        stage=stage_name,
+        component=component,
+        attributes=attributes,
+        started_at=datetime.now(timezone.utc).isoformat()
+    )
+    wall_start_time = time.perf_counter()
+    cpu_start_time = time.process_time()
+    try:
+        yield stage_event
+    except BaseException:
+        stage_event.status = 'error'
+        raise
+    finally:
+        stage_event.wall_time = time.perf_counter() - wall_start_time
+        stage_event.cpu_time = time.process_time() - cpu_start_time
+        stage_event.peak_rss = get_peak_rss()
+        if stage_event.wall_time > 0:
+            stage_event.throughput = {
+                f'{item_name}_per_second': count / stage_event.wall_time
+                for item_name, count in stage_event.items.items()
+            }
+        emit(stage_event=stage_event)
+
+
+def emit(stage_event: StageEvent) -> None:
+    events.append(stage_event)
+    if events_output is not None:
+        events_output.write(json.dumps({'event': 'stage', **asdict(stage_event)}) + '\n')
+        events_output.flush()
+
+
+def get_peak_rss() -> int | None:
+    if resource is None:
+        return None
+
+    # 'ru_maxrss' is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
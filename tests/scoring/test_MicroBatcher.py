@@ -0,0 +1,22 @@
+import asyncio
+
+from src.scoring.MicroBatcher import MicroBatcher
+
+
+def test_requests_are_batched_until_the_delay_expires():
+    batches = []
+
+    def process_batch(items: list) -> list:
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run() -> list[list]:
+        micro_batcher = MicroBatcher(process_batch=process_batch, max_batch_size=10, max_batch_delay=0.05)
+        await micro_batcher.start()
+        try:
+            return await asyncio.gather(micro_batcher.submit(items=[1, 2]), micro_batcher.submit(items=[3]))
+        finally:
+            await micro_batcher.stop()
+
+    assert asyncio.run(run()) == [[2, 4], [6]]
+    assert batches == [[1, 2, 3]]
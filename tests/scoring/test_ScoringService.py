@@ -0,0 +1,95 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from src.constant_values.enums import StopwordsSource, TokenType
+from src.get_hyperpartisan_data.DocumentCleaner import DocumentCleaner
+from src.log_odd_ratios.LogOddRatiosCalculator import LogOddRatiosCalculator
+from src.scoring.ScoringService import ScoringService
+from src.utils import instrumentation
+
+
+class WhitespaceDocumentCleaner(DocumentCleaner):
+
+    # Splits on whitespace, so no NLTK tokenizer data is needed
+    def clean_document(self, document: str) -> list[str]:
+        return document.lower().split()
+
+
+@pytest.fixture
+def scoring_service(tmp_path) -> ScoringService:
+    instrumentation.configure(quiet=True)
+    hyperpartisan_documents = [['war', 'enemy', 'people'], ['enemy', 'elites', 'people']]
+    non_hyperpartisan_documents = [['budget', 'vote', 'people'], ['vote', 'committee', 'budget']]
+    for token_type in [TokenType.UNIGRAM, TokenType.BIGRAM]:
+        LogOddRatiosCalculator(
+            hyperpartisan_documents=hyperpartisan_documents,
+            non_hyperpartisan_documents=non_hyperpartisan_documents,
+            token_type=token_type,
+            pickle_data_folder_path=tmp_path,
+            vectorized=True
+        ).calculate_log_odd_ratios()
+
+    return ScoringService(
+        pickle_data_folder_path=tmp_path,
+        document_cleaner=WhitespaceDocumentCleaner(stopwords_source=StopwordsSource.NONE)
+    )
+
+
+def handle_request(scoring_service: ScoringService, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict]:
+    async def run() -> tuple[HTTPStatus, dict]:
+        await scoring_service.micro_batcher.start()
+        try:
+            return await scoring_service.__handle_request__(method=method, path=path, body=body)
+        finally:
+            await scoring_service.micro_batcher.stop()
+
+    return asyncio.run(run())
+
+
+def test_score(scoring_service):
+    status, response = handle_request(scoring_service, 'POST', '/score', b'{"articles": ["enemy people", "vote"]}')
+    assert status == HTTPStatus.OK
+    assert len(response['scores']) == 2
+
+
+def test_top_serializes_infinite_scores(scoring_service):
+    status, response = handle_request(scoring_service, 'POST', '/top', b'{"amount": 3}')
+    assert status == HTTPStatus.OK
+    json.dumps(response, allow_nan=False)
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/score', b'{"articles": [1]}'),
+    ('/score', b'{}'),
+    ('/score', b'not json'),
+    ('/top', b'{"token_type": "unknown"}'),
+])
+def test_invalid_request_returns_400(scoring_service, path, body):
+    status, response = handle_request(scoring_service, 'POST', path, body)
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'error' in response
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/score', b'["enemy people"]'),
+    ('/top', b'["unigram"]'),
+    ('/top', b'"unigram"'),
+    ('/top', b'3'),
+])
+def test_non_object_body_returns_400(scoring_service, path, body):
+    status, response = handle_request(scoring_service, 'POST', path, body)
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'JSON object' in response['error']
+
+
+def test_internal_error_returns_500(scoring_service):
+    def fail(articles: list[str]) -> list[float]:
+        raise LookupError('resource not found')
+
+    scoring_service.micro_batcher.process_batch = fail
+    status, response = handle_request(scoring_service, 'POST', '/score', b'{"articles": ["enemy people"]}')
+    assert status == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert 'LookupError' in response['error']